@@ -0,0 +1,157 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process-wide boto3 clients.
+
+Creating a boto3 session or client resolves credentials and endpoints and
+every new client opens its own connection pool, so the Boss keeps one
+client per service and region in each process and shares it between
+threads.  The clients are recreated after a fork, as uwsgi workers must
+not share connections with the master process.
+"""
+
+import os
+import threading
+
+from botocore.config import Config
+from django.conf import settings
+
+import bossutils
+
+
+class ClientPool(object):
+    """Thread-safe registry of boto3 clients, one per service and region
+
+    Attributes:
+        config (botocore.config.Config): Configuration used for all clients
+    """
+
+    def __init__(self, config=None):
+        self.config = config
+        self.lock = threading.Lock()
+        self.pid = None
+        self.session = None
+        self.clients = {}
+
+    def _check_process(self):
+        # Called with the lock held
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.session = None
+            self.clients = {}
+
+    def get_session(self):
+        """Get the boto3 session used to create the clients
+
+        Returns:
+            (boto3.session.Session)
+        """
+        with self.lock:
+            self._check_process()
+            if self.session is None:
+                self.session = bossutils.aws.get_session()
+            return self.session
+
+    def get_client(self, service, region_name=None):
+        """Get the shared client for a service
+
+        Args:
+            service (str): Name of the AWS service, e.g. 'sqs'
+            region_name (optional[str]): Region of the client, defaults to the region of the session
+
+        Returns:
+            (botocore.client.BaseClient)
+        """
+        key = (service, region_name)
+        with self.lock:
+            self._check_process()
+            client = self.clients.get(key)
+            if client is None:
+                if self.session is None:
+                    self.session = bossutils.aws.get_session()
+                # boto3 sessions are not thread-safe, so clients are created under the lock
+                client = self.session.client(service, region_name=region_name, config=self.config)
+                self.clients[key] = client
+            return client
+
+    def clear(self):
+        """Drop all clients, they are recreated on their next use"""
+        with self.lock:
+            self.session = None
+            self.clients = {}
+
+
+class PooledSession(object):
+    """Stand-in for a boto3 session that hands out the shared clients
+
+    Allows passing the shared clients to helpers, like the bossutils.aws
+    step function methods, that take a session and create their own client.
+    Everything other than client() is delegated to the real session.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def client(self, service_name, region_name=None, **kwargs):
+        if len(kwargs) > 0:
+            # Custom endpoints or credentials cannot use the shared clients
+            return self._pool.get_session().client(service_name, region_name=region_name, **kwargs)
+        return self._pool.get_client(service_name, region_name)
+
+    def __getattr__(self, name):
+        return getattr(self._pool.get_session(), name)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Get the client pool of this process, created from the AWS_* settings
+
+    Returns:
+        (ClientPool)
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = Config(max_pool_connections=getattr(settings, 'AWS_MAX_POOL_CONNECTIONS', 10),
+                                retries={'max_attempts': getattr(settings, 'AWS_MAX_ATTEMPTS', 5)})
+                _pool = ClientPool(config)
+    return _pool
+
+
+def get_client(service, region_name=None):
+    """Get the shared boto3 client for a service
+
+    Args:
+        service (str): Name of the AWS service, e.g. 'sqs'
+        region_name (optional[str]): Region of the client, defaults to the region of the session
+
+    Returns:
+        (botocore.client.BaseClient)
+    """
+    return get_pool().get_client(service, region_name)
+
+
+def get_session():
+    """Get a session whose client() method returns the shared clients
+
+    Returns:
+        (PooledSession)
+    """
+    return PooledSession(get_pool())
@@ -0,0 +1,207 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Buffered usage metrics.
+
+Requests add their metrics to a per-process buffer with emit().  Metrics
+with the same namespace, name, unit and dimensions are aggregated into a
+single statistic set and a background thread sends the buffer to the
+configured sink every METRICS_FLUSH_INTERVAL seconds, so requests never
+wait on CloudWatch.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from boss import aws
+from bossutils.logger import bossLogger
+
+# Maximum number of datums CloudWatch accepts in one PutMetricData call
+MAX_DATUMS_PER_CALL = 1000
+
+
+class CloudWatchSink(object):
+    """Sends metrics to CloudWatch"""
+
+    def send(self, namespace, metric_data):
+        """Send metrics to CloudWatch
+
+        Args:
+            namespace (str): CloudWatch namespace
+            metric_data (list[dict]): MetricData entries, at most MAX_DATUMS_PER_CALL
+        """
+        aws.get_client('cloudwatch').put_metric_data(Namespace=namespace, MetricData=metric_data)
+
+
+class LocalSink(object):
+    """Keeps metrics in memory, for tests and local instances
+
+    Attributes:
+        sent (list[tuple]): (namespace, metric_data) of each send() call
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, namespace, metric_data):
+        self.sent.append((namespace, metric_data))
+
+
+class NullSink(object):
+    """Drops all metrics"""
+
+    def send(self, namespace, metric_data):
+        pass
+
+
+class MetricsEmitter(object):
+    """Per-process buffer of aggregated metrics
+
+    The buffer is reset after a fork so uwsgi workers never send metrics
+    recorded by their parent.
+
+    Attributes:
+        sink: Object with a send(namespace, metric_data) method
+        flush_interval (float): Seconds between background flushes
+        max_buffer (int): Number of distinct datums that triggers an immediate flush
+    """
+
+    def __init__(self, sink, flush_interval=10, max_buffer=MAX_DATUMS_PER_CALL):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.lock = threading.Lock()
+        self.buffer = {}
+        self.pid = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def _check_process(self):
+        # Called with the lock held
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.buffer = {}
+            self.thread = None
+
+        if self.flush_interval > 0 and (self.thread is None or not self.thread.is_alive()):
+            self.thread = threading.Thread(target=self._run, name='boss-metrics', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def emit(self, namespace, dimensions, metrics):
+        """Add metrics to the buffer
+
+        Args:
+            namespace (str): CloudWatch namespace
+            dimensions (list[dict]): CloudWatch dimensions ({'Name': ..., 'Value': ...}) shared by the metrics
+            metrics (list[tuple]): (metric name, value, unit) of each metric
+        """
+        dims = tuple((d['Name'], d['Value']) for d in dimensions)
+        with self.lock:
+            self._check_process()
+            for name, value, unit in metrics:
+                key = (namespace, name, unit, dims)
+                stats = self.buffer.get(key)
+                if stats is None:
+                    self.buffer[key] = [1, value, value, value]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    stats[2] = min(stats[2], value)
+                    stats[3] = max(stats[3], value)
+            full = len(self.buffer) >= self.max_buffer or self.flush_interval <= 0
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send all buffered metrics to the sink"""
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            buffer, self.buffer = self.buffer, {}
+        if len(buffer) == 0:
+            return
+
+        timestamp = time.time()
+        namespaces = {}
+        for (namespace, name, unit, dims), (count, total, minimum, maximum) in buffer.items():
+            namespaces.setdefault(namespace, []).append({
+                'MetricName': name,
+                'Dimensions': [{'Name': n, 'Value': v} for n, v in dims],
+                'Timestamp': timestamp,
+                'StatisticValues': {
+                    'SampleCount': float(count),
+                    'Sum': float(total),
+                    'Minimum': float(minimum),
+                    'Maximum': float(maximum),
+                },
+                'Unit': unit,
+            })
+
+        for namespace, metric_data in namespaces.items():
+            for i in range(0, len(metric_data), MAX_DATUMS_PER_CALL):
+                try:
+                    self.sink.send(namespace, metric_data[i:i + MAX_DATUMS_PER_CALL])
+                except Exception as e:
+                    log = bossLogger()
+                    log.exception('Error sending {} metrics: {}'.format(namespace, e))
+
+
+_emitter = None
+_emitter_lock = threading.Lock()
+
+
+def get_emitter():
+    """Get the metrics emitter of this process, created from the METRICS_* settings
+
+    Returns:
+        (MetricsEmitter)
+    """
+    global _emitter
+    if _emitter is None:
+        with _emitter_lock:
+            if _emitter is None:
+                sink = import_string(getattr(settings, 'METRICS_SINK', 'boss.metrics.CloudWatchSink'))()
+                emitter = MetricsEmitter(sink,
+                                         getattr(settings, 'METRICS_FLUSH_INTERVAL', 10),
+                                         getattr(settings, 'METRICS_MAX_BUFFER', MAX_DATUMS_PER_CALL))
+                atexit.register(emitter.flush)
+                _emitter = emitter
+    return _emitter
+
+
+def emit(namespace, dimensions, metrics):
+    """Record metrics without blocking the request on the sink
+
+    Args:
+        namespace (str): CloudWatch namespace
+        dimensions (list[dict]): CloudWatch dimensions shared by the metrics
+        metrics (list[tuple]): (metric name, value, unit) of each metric
+    """
+    try:
+        get_emitter().emit(namespace, dimensions, metrics)
+    except Exception as e:
+        log = bossLogger()
+        log.exception('Error recording {} metrics: {}'.format(namespace, e))
@@ -0,0 +1,140 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compression of JSON responses.
+
+JSON responses larger than JSON_COMPRESSION_MIN_SIZE bytes are compressed
+with the first encoding of JSON_COMPRESSION_ENCODINGS that the client
+accepts.  zstd and br are only offered if the zstandard and brotli packages
+are installed.  Binary cutout and tile formats are already compressed and
+are left alone.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=6)
+
+
+def _compress_br(data):
+    return brotli.compress(data, quality=5)
+
+
+def _compress_zstd(data):
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+COMPRESSORS = {'gzip': _compress_gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = _compress_br
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _compress_zstd
+
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header
+
+    Args:
+        header (str): Value of the header
+
+    Returns:
+        (dict): Quality value of each encoding, lower case
+    """
+    encodings = {}
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def choose_encoding(header, preferred):
+    """Choose the encoding of a response
+
+    Args:
+        header (str): Value of the Accept-Encoding header
+        preferred (iterable[str]): Encodings the server supports, most preferred first
+
+    Returns:
+        (str|None): Encoding or None to send the response uncompressed
+    """
+    accepted = parse_accept_encoding(header)
+    best = None
+    best_quality = 0.0
+    for name in preferred:
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class JSONCompressionMiddleware(object):
+    """Compress JSON responses with gzip, br or zstd, as negotiated with Accept-Encoding"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (response.streaming or response.has_header('Content-Encoding') or
+                not response.get('Content-Type', '').startswith('application/json') or
+                len(response.content) < getattr(settings, 'JSON_COMPRESSION_MIN_SIZE', 1024)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        preferred = [e for e in getattr(settings, 'JSON_COMPRESSION_ENCODINGS', ('gzip',)) if e in COMPRESSORS]
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), preferred)
+        if encoding is None:
+            return response
+
+        compressed = COMPRESSORS[encoding](response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # The compressed body is not byte for byte the entity the ETag was computed for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,72 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+JSON rendering of API responses.
+
+BossJSONRenderer produces the same JSON as DRF's JSONRenderer, using orjson
+when it is installed.  NumPy arrays and scalars are serialized directly,
+without converting them to Python lists first.
+"""
+
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class BossJSONEncoder(JSONEncoder):
+    """DRF's JSON encoder, extended with NumPy types"""
+
+    def default(self, obj):
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return super().default(obj)
+
+
+_encoder = BossJSONEncoder()
+
+
+def _orjson_default(obj):
+    # Types orjson does not handle itself (e.g. Decimal, lazy strings, datetimes formatted as DRF does)
+    return _encoder.default(obj)
+
+
+class BossJSONRenderer(JSONRenderer):
+    """ A DRF renderer for JSON, using orjson if it is installed
+
+    Requests for indented JSON (e.g. Accept: application/json; indent=4) are rendered by DRF's JSONRenderer.
+    """
+    encoder_class = BossJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes go through the default hook so they are formatted as DRF formats them
+        ret = orjson.dumps(data, default=_orjson_default,
+                           option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS |
+                           orjson.OPT_PASSTHROUGH_DATETIME)
+
+        # Escape the line separators JavaScript does not allow in strings, as DRF does
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -76,6 +76,7 @@ INSTALLED_APPS = [
 
 #MIDDLEWARE_CLASSES = (
 MIDDLEWARE = (
+    'boss.middleware.JSONCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -147,15 +148,151 @@ REST_FRAMEWORK = {
         #'rest_framework.permissions.DjangoModelPermissions'
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
 
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'boss.renderers.BossJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 
 }
+
+# JSON responses of at least JSON_COMPRESSION_MIN_SIZE bytes are compressed with the first of
+# JSON_COMPRESSION_ENCODINGS the client accepts (zstd and br require the zstandard and brotli packages)
+JSON_COMPRESSION_MIN_SIZE = 1024
+JSON_COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
 # Version that unit tests are being run against
 BOSS_VERSION = 'v1'
 
 # Maximum number of bytes in an uncompressed matrix supported by the Cutout Service
 CUTOUT_MAX_SIZE = 520 * 1048576
 
+# Number of cuboids (in z) read and compressed at a time by the streaming cutout formats
+CUTOUT_STREAM_SLAB_CUBOIDS = 1
+
+# Blosc compression of cutout responses: codec (blosclz, lz4, lz4hc, zlib, zstd), level (0-9) and shuffle filter
+# (noshuffle, shuffle, bitshuffle). 'auto' picks the option from the channel's data type. Requests can override
+# them with the blosc-codec, blosc-clevel and blosc-shuffle query parameters.  The defaults are blosc's own, which
+# cutout responses have always been compressed with.
+BLOSC_CODEC = 'blosclz'
+BLOSC_CLEVEL = 9
+BLOSC_SHUFFLE = 'shuffle'
+
+# Number of threads blosc uses to compress a cutout in each process
+BLOSC_NTHREADS = 4
+
+# Number of threads in each process rendering the tiles around a requested XY tile into the tile cache, 0 disables
+# prefetching.  Each user may prefetch TILE_PREFETCH_RATE tiles per second with bursts of TILE_PREFETCH_BURST tiles,
+# and at most TILE_PREFETCH_MAX_PENDING tiles wait to be rendered in each process.
+TILE_PREFETCH_THREADS = 0
+TILE_PREFETCH_RATE = 10
+TILE_PREFETCH_BURST = 50
+TILE_PREFETCH_MAX_PENDING = 256
+
+# zlib level (0 to 9) of PNG tiles, can be overridden with the png-level query parameter
+TILE_PNG_COMPRESS_LEVEL = 6
+
+# Quality (1 to 95) of JPEG tiles and whether to optimize their Huffman tables, can be overridden with the quality
+# and optimize query parameters
+TILE_JPEG_QUALITY = 75
+TILE_JPEG_OPTIMIZE = False
+
+# Whether WebP tiles are lossless and their quality (0 to 100), can be overridden with the lossless and quality
+# query parameters.  The method (0 to 6) trades encoding time for size.
+TILE_WEBP_LOSSLESS = False
+TILE_WEBP_QUALITY = 80
+TILE_WEBP_METHOD = 4
+
+# Number of z-slices encoded concurrently for multipart/mixed JPEG cutouts
+JPEG_ENCODE_THREADS = 4
+
+# Maximum number of ids a cutout can be filtered by
+CUTOUT_FILTER_MAX_IDS = 1000000
+
+# Maximum number of regions in one request to the batch cutout service
+CUTOUT_BATCH_MAX_REGIONS = 1000
+
+# Number of regions the batch cutout service reads concurrently in each request
+CUTOUT_BATCH_THREADS = 8
+
+# Maximum number of bytes in the cuboids (times time samples) a single request to the cutout to_black service can zero
+CUTOUT_FILL_MAX_SIZE = CUTOUT_MAX_SIZE
+
+# Number of cuboids in x zeroed by each write of the cutout to_black service, bounding its memory use
+CUTOUT_FILL_ROW_CUBOIDS = 4
+
+# Threads applying cutout POSTs made with ?async=true in each process, 0 to always write synchronously.  Volumes are
+# staged in ASYNC_WRITE_DIR, at most ASYNC_WRITE_MAX_PENDING writes wait in each process (more are applied
+# synchronously) and job statuses are kept in the ASYNC_WRITE_CACHE_ALIAS cache for ASYNC_WRITE_STATUS_TTL seconds.
+# Each process sends a heartbeat every ASYNC_WRITE_HEARTBEAT seconds, the jobs of a process that stopped sending them
+# are reported as failed.
+ASYNC_WRITE_THREADS = 0
+ASYNC_WRITE_DIR = '/tmp/boss-writes'
+ASYNC_WRITE_MAX_PENDING = 16
+ASYNC_WRITE_CACHE_ALIAS = 'default'
+ASYNC_WRITE_STATUS_TTL = 86400
+ASYNC_WRITE_HEARTBEAT = 30
+
+# Id lists of the ids service with at least this many ids are streamed as JSON
+IDS_JSON_STREAM_MIN = 100000
+
+# Maximum number of ids or regions in one request to the batch bounding box and ids services
+OBJECT_BATCH_MAX_ITEMS = 1000
+
+# Number of ids or regions the batch bounding box and ids services look up concurrently in each request
+OBJECT_BATCH_THREADS = 8
+
+# Seconds the collection, experiment, channel and lookup key resolved for a data request are cached in each
+# process. 0 disables the cache.
+RESOURCE_CACHE_TTL = 60
+
+# Django cache used to broadcast resource cache invalidations to all processes. None keeps invalidations local.
+RESOURCE_CACHE_ALIAS = 'default'
+
+# Seconds a user's permissions on a channel are cached in each process for the data services. 0 disables the cache.
+PERMISSION_CACHE_TTL = 30
+
+# Django cache used to broadcast permission cache invalidations to all processes. None keeps invalidations local.
+PERMISSION_CACHE_ALIAS = 'default'
+
+# Where throttle usage is counted. 'database' updates the ThrottleUsage table on every request, 'redis' keeps the
+# counters in the Redis cache THROTTLE_REDIS_ALIAS and writes them to the database every THROTTLE_FLUSH_INTERVAL seconds.
+THROTTLE_BACKEND = 'database'
+THROTTLE_REDIS_ALIAS = 'default'
+THROTTLE_FLUSH_INTERVAL = 60
+
+# Seconds the throttle metrics and thresholds are cached in each process by the 'redis' throttle backend
+THROTTLE_THRESHOLD_CACHE_TTL = 60
+THROTTLE_THRESHOLD_CACHE_ALIAS = 'default'
+
+# Usage metrics are aggregated in each process and sent to METRICS_SINK by a background thread every
+# METRICS_FLUSH_INTERVAL seconds, or when METRICS_MAX_BUFFER distinct datums are buffered.
+# Sinks: boss.metrics.CloudWatchSink, boss.metrics.LocalSink, boss.metrics.NullSink
+METRICS_SINK = 'boss.metrics.CloudWatchSink'
+METRICS_FLUSH_INTERVAL = 10
+METRICS_MAX_BUFFER = 1000
+
+# Connection pool size and retry attempts of the boto3 clients shared by all threads of a process
+AWS_MAX_POOL_CONNECTIONS = 10
+AWS_MAX_ATTEMPTS = 5
+
+# Django cache holding the write generation of each channel, used to key cached tiles and HTTP validators
+GENERATION_CACHE_ALIAS = 'default'
+
+# Seconds after which cutout, image and tile ETags change even if the channel's write generation did not, bounding how
+# long clients reuse data written outside of the Boss API, e.g. by ingests
+ETAG_MAX_AGE = 3600
+
+# Cache of rendered tiles and images. None disables the cache, 'cache' stores tiles in the Django cache
+# TILE_CACHE_ALIAS and 'disk' in TILE_CACHE_DIR, evicting the least recently used over TILE_CACHE_MAX_BYTES every
+# TILE_CACHE_SWEEP_INTERVAL seconds.
+TILE_CACHE_BACKEND = None
+TILE_CACHE_ALIAS = 'default'
+TILE_CACHE_DIR = '/tmp/boss-tile-cache'
+TILE_CACHE_MAX_BYTES = 1024 ** 3
+TILE_CACHE_MAX_TILE_BYTES = 4 * 1024 ** 2
+TILE_CACHE_TTL = 3600
+TILE_CACHE_SWEEP_INTERVAL = 60
+
 # Maximum number of pixels that non-privileged users can ingest (200 x 200 x 200 cubes)
 INGEST_MAX_SIZE = (200 * 512) * (200 * 512) * (200 * 16)
 
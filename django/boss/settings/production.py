@@ -59,6 +59,16 @@ if config['aws']['cache-session'] != '':
     SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
     SESSION_CACHE_ALIAS = 'default'
 
+    # Count throttle usage atomically in Redis instead of the database
+    THROTTLE_BACKEND = 'redis'
+
+    # Keep rendered tiles on the local disk of each endpoint.  Tiles are keyed by the write generation of their
+    # channel, which has to be shared by all processes through Redis or other workers keep serving overwritten tiles.
+    TILE_CACHE_BACKEND = 'disk'
+
+    # Render the tiles around each requested XY tile in the background
+    TILE_PREFETCH_THREADS = 4
+
 # Set this here so it's not overriden by any other settings files.
 LOGIN_URL = BOSSOIDC_LOGIN_URL
 LOGOUT_URL = BOSSOIDC_LOGOUT_URL
@@ -23,9 +23,12 @@ from django.utils.translation import ugettext_lazy as _
 from django.conf import settings as django_settings
 
 import json
+import time
 import bossutils
 import redis
 
+from boss import aws
+from bosscore.local_cache import LocalCache
 from bosscore.models import ThrottleMetric, ThrottleThreshold, ThrottleUsage
 from bossutils.logger import bossLogger
 from datetime import date
@@ -53,6 +56,14 @@ class MetricDatabase(object):
         return ThrottleUsage.objects.filter()
     
     def getUsageAsJson(self, name=None):
+        counters = get_redis_counters()
+        if counters is not None:
+            # Make sure the usage in the database includes the increments still held in Redis
+            try:
+                counters.flush(force=True)
+            except redis.RedisError as e:
+                self.blog.error("Unable to flush throttle usage from Redis: {}".format(e))
+
         usage = []
         if name:
             thresholds = ThrottleThreshold.objects.filter(name=name)
@@ -135,12 +146,14 @@ class MetricDatabase(object):
             if 'def_system_limit' in m:
                 metric.def_system_limit = self.parseLimit(m['def_system_limit'])
             metric.save()
+        _threshold_cache.invalidate(_ALL_SCOPE)
 
     def updateThreshold(self, name, mtype, limit):
         metric = self.getMetric(mtype)
         threshold = self.getThreshold(name, metric)
         threshold.limit = limit
         threshold.save()
+        _threshold_cache.invalidate(_ALL_SCOPE)
 
     def parseLimit(self, limit):
         scalar = 1
@@ -166,6 +179,228 @@ class MetricDatabase(object):
             limit = self.parseLimit(t['limit'])
             self.updateThreshold(name, mtype, limit)    
 
+# Cache of the metric and threshold rows used by the Redis throttle counters
+_threshold_cache = LocalCache('throttle',
+                              getattr(django_settings, 'THROTTLE_THRESHOLD_CACHE_TTL', 0),
+                              getattr(django_settings, 'THROTTLE_THRESHOLD_CACHE_ALIAS', None))
+_ALL_SCOPE = '*'
+
+
+class RedisThrottleCounters(object):
+    """Throttle usage counters kept in Redis
+
+    The user, API and system counters for a call are checked and incremented
+    by a single Lua script, so concurrent requests never lose increments and
+    a check costs one round trip to Redis.  Counters are keyed by month, so
+    they reset at the start of each month like the ThrottleUsage rows do.
+
+    The counters are periodically written back to the ThrottleUsage table so
+    the /metric/ API keeps reporting usage.  Only one process performs the
+    write-back at a time.
+
+    Attributes:
+        conn (redis.StrictRedis): Redis connection holding the counters
+        flush_interval (float): Seconds between writes of the counters to the database
+    """
+    KEY_PREFIX = 'boss:throttle'
+
+    # Expire counters after the month they count has passed
+    COUNTER_EXPIRE = 40 * 24 * 60 * 60
+
+    # KEYS: usage counter of each level, followed by the set of counters to write back
+    # ARGV: cost, counter expiration, limit of each level, then the dirty set member of each level
+    # Returns {0, ''} if the cost was added or {level, current usage} if a level is throttled
+    CHECK_AND_INCREMENT = """
+local n = #KEYS - 1
+for i = 1, n do
+    local limit = tonumber(ARGV[2 + i])
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if limit > 0 and current > limit then
+        return {i, tostring(current)}
+    end
+end
+for i = 1, n do
+    redis.call('INCRBYFLOAT', KEYS[i], ARGV[1])
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+    redis.call('SADD', KEYS[n + 1], ARGV[2 + n + i])
+end
+return {0, ''}
+"""
+
+    def __init__(self, conn, flush_interval=60):
+        self.blog = bossLogger()
+        self.conn = conn
+        self.flush_interval = flush_interval
+        self.metricdb = MetricDatabase()
+        self.script = conn.register_script(self.CHECK_AND_INCREMENT)
+        self.next_flush = time.monotonic() + flush_interval
+
+    @staticmethod
+    def period(today=None):
+        """Get the name of the period the counters are accumulated over
+
+        Args:
+            today (optional[date]): Day to get the period for, defaults to today
+
+        Returns:
+            (str): Period name, YYYY-MM
+        """
+        if today is None:
+            today = date.today()
+        return today.strftime('%Y-%m')
+
+    def counter_key(self, period, threshold_id):
+        return '{}:usage:{}:{}'.format(self.KEY_PREFIX, period, threshold_id)
+
+    @property
+    def dirty_key(self):
+        return '{}:dirty'.format(self.KEY_PREFIX)
+
+    @property
+    def lock_key(self):
+        return '{}:flush-lock'.format(self.KEY_PREFIX)
+
+    def get_metric(self, mtype, units):
+        key = 'metric:{}:{}'.format(mtype, units)
+        metric = _threshold_cache.get(key)
+        if metric is None:
+            metric = self.metricdb.getMetric(mtype, units)
+            _threshold_cache.set(key, metric, [_ALL_SCOPE])
+        return metric
+
+    def get_threshold(self, name, metric, period):
+        """Get the id and limit of a threshold
+
+        The first time a threshold is loaded by the process the Redis counter
+        is seeded from the ThrottleUsage table, in case Redis lost the counter.
+
+        Args:
+            name (str): Encoded metric name
+            metric (ThrottleMetric): Metric the threshold belongs to
+            period (str): Current period
+
+        Returns:
+            (tuple): threshold id, limit
+        """
+        key = 'threshold:{}:{}'.format(metric.pk, name)
+        threshold = _threshold_cache.get(key)
+        if threshold is None:
+            row = self.metricdb.getThreshold(name, metric)
+            threshold = (row.pk, row.limit)
+
+            usage = ThrottleUsage.objects.filter(threshold=row).first()
+            if usage is not None and self.period(usage.since) == period and usage.value > 0:
+                self.conn.set(self.counter_key(period, row.pk), usage.value, nx=True, ex=self.COUNTER_EXPIRE)
+
+            _threshold_cache.set(key, threshold, [_ALL_SCOPE])
+        return threshold
+
+    def check(self, api, mtype, units, username, cost):
+        """Check the user, API and system limits and add the cost if none are exceeded
+
+        Args:
+            api (str): Name of the API call being made
+            mtype (str): Metric type
+            units (str): Metric units
+            username (str): Name of the user making the call
+            cost (float|int): Cost of the API call being made
+
+        Returns:
+            (None|tuple): None if not throttled, else (level, current usage, limit)
+
+        Raises:
+            redis.RedisError: If Redis could not be reached
+        """
+        period = self.period()
+        metric = self.get_metric(mtype, units)
+        levels = [(MetricDatabase.USER_LEVEL_METRIC, username),
+                  (MetricDatabase.API_LEVEL_METRIC, api),
+                  (MetricDatabase.SYSTEM_LEVEL_METRIC, None)]
+        thresholds = [self.get_threshold(self.metricdb.encodeMetric(level, name), metric, period)
+                      for level, name in levels]
+
+        keys = [self.counter_key(period, tid) for tid, _ in thresholds] + [self.dirty_key]
+        args = [cost, self.COUNTER_EXPIRE] + \
+               [limit for _, limit in thresholds] + \
+               ['{}:{}'.format(period, tid) for tid, _ in thresholds]
+        level, current = self.script(keys=keys, args=args)
+
+        self.maybe_flush()
+
+        if int(level) == 0:
+            return None
+        level = int(level) - 1
+        return levels[level][0], float(current), thresholds[level][1]
+
+    def maybe_flush(self):
+        """Write the counters back to the database if the flush interval has elapsed"""
+        if time.monotonic() < self.next_flush:
+            return
+        self.next_flush = time.monotonic() + self.flush_interval
+
+        try:
+            self.flush()
+        except Exception as e:
+            self.blog.error("Unable to write throttle usage to the database: {}".format(e))
+
+    def flush(self, force=False):
+        """Write the counters that changed since the last flush to the ThrottleUsage table
+
+        Args:
+            force (optional[bool]): Flush even if another process flushed within the flush interval
+        """
+        if not force:
+            # Lock expires by itself, limiting flushes to one per interval across all processes
+            if not self.conn.set(self.lock_key, 1, nx=True, ex=max(int(self.flush_interval), 1)):
+                return
+
+        pipe = self.conn.pipeline(transaction=True)
+        pipe.smembers(self.dirty_key)
+        pipe.delete(self.dirty_key)
+        members, _ = pipe.execute()
+
+        period = self.period()
+        ids = []
+        for member in members:
+            if isinstance(member, bytes):
+                member = member.decode()
+            member_period, tid = member.rsplit(':', 1)
+            # Counters of a previous month no longer reflect the current usage
+            if member_period == period:
+                ids.append(int(tid))
+        if len(ids) == 0:
+            return
+
+        values = self.conn.mget([self.counter_key(period, tid) for tid in ids])
+        since = date.today().replace(day=1)
+        for tid, value in zip(ids, values):
+            if value is None:
+                continue
+            value = int(float(value))
+            updated = ThrottleUsage.objects.filter(threshold_id=tid, since__gte=since).update(value=value)
+            if not updated:
+                ThrottleUsage.objects.update_or_create(threshold_id=tid, defaults={'value': value, 'since': since})
+
+
+_redis_counters = None
+
+
+def get_redis_counters():
+    """Get the Redis throttle counters if Redis is the configured throttle backend
+
+    Returns:
+        (None|RedisThrottleCounters): None if the database backend is used
+    """
+    global _redis_counters
+    if getattr(django_settings, 'THROTTLE_BACKEND', 'database') != 'redis':
+        return None
+    if _redis_counters is None:
+        from django_redis import get_redis_connection
+        conn = get_redis_connection(getattr(django_settings, 'THROTTLE_REDIS_ALIAS', 'default'))
+        _redis_counters = RedisThrottleCounters(conn, getattr(django_settings, 'THROTTLE_FLUSH_INTERVAL', 60))
+    return _redis_counters
+
+
 class BossThrottle(object):
     """Object for checking if a given API call is throttled
 
@@ -215,7 +450,7 @@ class BossThrottle(object):
             ex_msg = self.system_error_detail
             sns_msg = "Throttling system: {}".format(json.dumps(details))
 
-        client = bossutils.aws.get_session().client('sns')
+        client = aws.get_client('sns')
         client.publish(TopicArn = self.topic,
                        Subject = 'Boss Request Throttled',
                        Message = sns_msg)
@@ -238,6 +473,26 @@ class BossThrottle(object):
         details = {'api': api, 'user': user.username, 'cost': cost, 'fqdn': self.fqdn}
         self.blog.info("Checking for throttling: {},{},{},{},{},{}".format(api,mtype,user.username,cost,units,self.fqdn))
 
+        counters = get_redis_counters()
+        if counters is not None:
+            try:
+                throttled = counters.check(api, mtype, units, user.username, cost)
+            except redis.RedisError as e:
+                self.blog.error("Unable to check throttle counters in Redis, using the database: {}".format(e))
+            else:
+                if throttled is not None:
+                    level, current, limit = throttled
+                    self.blog.info("Current use of {} exceeds threshold {}".format(current, limit))
+                    details['current_metric'] = current
+                    details['max_metric'] = limit
+                    if level == MetricDatabase.USER_LEVEL_METRIC:
+                        self.error(user = user, details = details)
+                    elif level == MetricDatabase.API_LEVEL_METRIC:
+                        self.error(api = api, details = details)
+                    else:
+                        self.error(system = MetricDatabase.SYSTEM_LEVEL_METRIC, details = details)
+                return
+
         metric = self.metricdb.getMetric(mtype, units)
 
         self.check_user(user, metric, cost, details)
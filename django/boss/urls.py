@@ -71,6 +71,9 @@ urlpatterns = [
     url(r'^v1/groups/', include('bosscore.urls.group-urls', namespace='v1')),
     url(r'^v1/cutout/', include('bossspatialdb.urls', namespace='v1')),
     url(r'^v1/cutout/to_black/', include('bossspatialdb.urls_to_black', namespace='v1')),
+    url(r'^v1/cutout/batch/', include('bossspatialdb.urls_batch', namespace='v1')),
+    url(r'^v1/cutout/filter/', include('bossspatialdb.urls_filter', namespace='v1')),
+    url(r'^v1/cutout/jobs/', include('bossspatialdb.urls_jobs', namespace='v1')),
     url(r'^v1/downsample/', include('bossspatialdb.urls_downsample', namespace='v1')),
     url(r'^v1/image/', include('bosstiles.image_urls', namespace='v1')),
     url(r'^v1/tile/', include('bosstiles.tile_urls', namespace='v1')),
@@ -12,7 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import time
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
 from bosscore.error import BossHTTPError, ErrorCodes
+from bosscore.generation import get_generation, is_shared
+from bosscore.models import Channel
 
 def get_access_mode(request):
     """
@@ -54,4 +63,90 @@ def get_access_mode(request):
             access_mode = "cache"
         else:
             return BossHTTPError("Incorrect access_mode, possible values are [raw, no-cache, cache]", ErrorCodes.INVALID_CUTOUT_ARGS)
-    return access_mode
\ No newline at end of file
+    return access_mode
+
+
+def get_etag(request, req):
+    """
+        Method to compute the ETag of the data returned for a validated cutout, image or tile request
+
+        The ETag changes whenever the channel's write generation or downsample status changes, or at least
+        every ETAG_MAX_AGE seconds so data written outside of the Boss API (e.g. ingests) is eventually seen.
+        No ETag is returned when the write generation is not shared by all processes, or for the downsampled
+        resolutions of a channel that is being downsampled since they change without writes.
+
+        Args:
+            request : DRF request
+            req (BossRequest) : Validated request
+
+        Returns:
+            etag (str|None) : Quoted ETag or None if the data can not be validated
+    """
+    channel = req.channel
+    if (channel.downsample_status in (Channel.DownsampleStatus.QUEUED, Channel.DownsampleStatus.IN_PROGRESS) and
+            req.get_resolution() != channel.base_resolution):
+        return None
+
+    if not is_shared():
+        return None
+
+    generation = get_generation(channel.pk)
+    if generation is None:
+        return None
+
+    max_age = getattr(settings, 'ETAG_MAX_AGE', 3600)
+    epoch = int(time.time() // max_age) if max_age else 0
+
+    time_range = req.get_time()
+    parts = [req.get_lookup_key(), generation, channel.downsample_status, epoch, req.get_resolution(),
+             req.get_x_start(), req.get_x_stop(), req.get_y_start(), req.get_y_stop(),
+             req.get_z_start(), req.get_z_stop(), time_range.start, time_range.stop,
+             request.accepted_media_type, sorted(request.query_params.lists())]
+    digest = hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()
+    return '"{}"'.format(digest)
+
+
+def not_modified(request, etag):
+    """
+        Method to check a request's If-None-Match header against the current ETag
+
+        Args:
+            request : DRF request
+            etag (str|None) : Current ETag from get_etag()
+
+        Returns:
+            response (HttpResponseNotModified|None) : 304 response if the client's copy is current, else None
+    """
+    if etag is None:
+        return None
+
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+
+    # If-None-Match uses the weak comparison
+    etags = [e[2:] if e.startswith('W/') else e for e in parse_etags(header)]
+    if '*' not in etags and etag not in etags:
+        return None
+
+    response = HttpResponseNotModified()
+    add_validators(response, etag)
+    return response
+
+
+def add_validators(response, etag):
+    """
+        Method to add the ETag and matching cache headers to a response
+
+        Args:
+            response : Django or DRF response
+            etag (str|None) : ETag from get_etag()
+
+        Returns:
+            response : The response
+    """
+    if etag is not None:
+        response['ETag'] = etag
+        # Data is access controlled, so only the client may cache it and must revalidate before reuse
+        response['Cache-Control'] = 'private, no-cache'
+    return response
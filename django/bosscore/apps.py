@@ -17,3 +17,14 @@ from django.apps import AppConfig
 
 class BosscoreConfig(AppConfig):
     name = 'bosscore'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from . import resource_cache
+        from .models import Collection, Experiment, Channel, CoordinateFrame, BossLookup
+
+        for model in (Collection, Experiment, Channel, CoordinateFrame, BossLookup):
+            post_save.connect(resource_cache.on_resource_changed, sender=model,
+                              dispatch_uid='resource_cache_{}_save'.format(model.__name__))
+            post_delete.connect(resource_cache.on_resource_changed, sender=model,
+                                dispatch_uid='resource_cache_{}_delete'.format(model.__name__))
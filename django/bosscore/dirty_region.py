@@ -0,0 +1,86 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Dirty region of channels, used to downsample only what changed.
+
+Each channel keeps the bounding box of the voxels written at its base
+resolution since its last downsample was queued, in the dirty_* columns:
+
+    NULL          Unknown, e.g. data written before tracking started.  The
+                  whole coordinate frame has to be downsampled.
+    EMPTY_REGION  Nothing was written since the last downsample was queued.
+    start < stop  The bounding box of the writes.
+
+Writes grow the box with LEAST/GREATEST in the same UPDATE that records the
+write, so concurrent writers never lose each other's regions.
+"""
+
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Least
+
+AXES = ('x', 'y', 'z')
+
+# Empty box, any write grows it to the written region
+EMPTY_START = 2 ** 31 - 1
+EMPTY_STOP = 0
+EMPTY_REGION = {}
+for _axis in AXES:
+    EMPTY_REGION['dirty_{}_start'.format(_axis)] = EMPTY_START
+    EMPTY_REGION['dirty_{}_stop'.format(_axis)] = EMPTY_STOP
+
+
+def _grow(field, value, func):
+    # An unknown (NULL) region stays unknown, LEAST/GREATEST of NULL differ between databases
+    return Case(When(**{'{}__isnull'.format(field): True}, then=Value(None)),
+                default=func(F(field), Value(value)))
+
+
+def grow_region(corner, extent):
+    """Get the UPDATE expressions adding a written region to a channel's dirty region
+
+    Args:
+        corner ((int, int, int)): (x, y, z) corner written, at the channel's base resolution
+        extent ((int, int, int)): (x, y, z) extent written
+
+    Returns:
+        (dict): Keyword arguments for QuerySet.update()
+    """
+    updates = {}
+    for idx, axis in enumerate(AXES):
+        updates['dirty_{}_start'.format(axis)] = _grow('dirty_{}_start'.format(axis), int(corner[idx]), Least)
+        updates['dirty_{}_stop'.format(axis)] = _grow('dirty_{}_stop'.format(axis), int(corner[idx] + extent[idx]),
+                                                     Greatest)
+    return updates
+
+
+def get_region(channel):
+    """Get the dirty region of a channel
+
+    Args:
+        channel (Channel): Channel model
+
+    Returns:
+        (dict|None): x, y and z start and stop of the region, None if unknown, {} if nothing was written
+    """
+    region = {}
+    for axis in AXES:
+        for bound in ('start', 'stop'):
+            value = getattr(channel, 'dirty_{}_{}'.format(axis, bound))
+            if value is None:
+                return None
+            region['{}_{}'.format(axis, bound)] = value
+    if any(region['{}_start'.format(axis)] >= region['{}_stop'.format(axis)] for axis in AXES):
+        return {}
+    return region
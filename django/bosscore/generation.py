@@ -0,0 +1,127 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Write generation of channels.
+
+The generation of a channel changes every time the Boss writes to the
+channel's data, so anything derived from the data (rendered tiles, HTTP
+validators) can be keyed by it instead of being explicitly invalidated.
+Generations live in a shared Django cache.  A generation that was evicted
+is re-seeded from the clock so it never repeats an earlier value.
+
+record_write() also keeps a durable count of writes in the channel's
+write_generation column and the region written in its dirty_* columns.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Case, F, Q, Value, When
+
+from bosscore import dirty_region
+from bosscore.models import Channel
+from bossutils.logger import bossLogger
+
+
+def _key(channel_id):
+    return 'boss:generation:{}'.format(channel_id)
+
+
+def _cache():
+    return caches[getattr(settings, 'GENERATION_CACHE_ALIAS', 'default')]
+
+
+def _seed():
+    return int(time.time() * 1000)
+
+
+def is_shared():
+    """Check if the generations are shared by all processes
+
+    With a per-process cache a write only changes the generation in the process that handled it, so generations must
+    not be used to validate data served by other processes.
+
+    Returns:
+        (bool)
+    """
+    return not isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def get_generation(channel_id):
+    """Get the current write generation of a channel
+
+    Args:
+        channel_id (int): Id of the channel
+
+    Returns:
+        (int|None): Generation or None if the shared cache is unavailable
+    """
+    cache = _cache()
+    key = _key(channel_id)
+    try:
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, _seed(), timeout=None)
+            generation = cache.get(key)
+        return generation
+    except Exception as e:
+        bossLogger().warning("Unable to get the write generation of channel {}: {}".format(channel_id, e))
+        return None
+
+
+def bump_generation(channel_id):
+    """Record that the data of a channel changed
+
+    Args:
+        channel_id (int): Id of the channel
+    """
+    cache = _cache()
+    key = _key(channel_id)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, _seed(), timeout=None):
+                cache.incr(key)
+    except Exception as e:
+        bossLogger().error("Unable to update the write generation of channel {}: {}".format(channel_id, e))
+
+
+def record_write(channel_id, region=None):
+    """Record a write to the data of a channel
+
+    Increments the channel's write_generation, resets a DOWNSAMPLED channel to NOT_DOWNSAMPLED and grows the
+    channel's dirty region with a single UPDATE, so the write path does not read the row first and concurrent writers
+    do not overwrite each other's changes, then bumps the cached generation.
+
+    Args:
+        channel_id (int): Id of the channel
+        region (optional[tuple]): (x, y, z) corner and extent written at the channel's base resolution, None if the
+            write does not change the data downsampling starts from
+    """
+    downsampled = Q(downsample_status=Channel.DownsampleStatus.DOWNSAMPLED)
+    updates = {'write_generation': F('write_generation') + 1}
+    # MySQL applies the assignments in order, so downsample_arn must be tested before downsample_status changes
+    updates['downsample_arn'] = Case(When(downsampled, then=Value('')), default=F('downsample_arn'))
+    updates['downsample_status'] = Case(When(downsampled, then=Value(Channel.DownsampleStatus.NOT_DOWNSAMPLED)),
+                                        default=F('downsample_status'))
+    if region is not None:
+        updates.update(dirty_region.grow_region(*region))
+
+    Channel.objects.filter(pk=channel_id).update(**updates)
+    bump_generation(channel_id)
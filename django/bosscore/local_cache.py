@@ -0,0 +1,160 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+from django.core.cache import caches
+
+from bossutils.logger import bossLogger
+
+
+class LocalCache:
+    """
+    Thread safe, per-process cache with a TTL and scoped invalidation.
+
+    Values are kept in process memory so a hit costs no network round trips to MySQL. Every entry is tagged with
+    one or more scopes (e.g. a collection name).  Invalidating a scope drops matching entries in this process and
+    increments a version number for the scope in a shared Django cache (e.g. django-redis), which other processes
+    compare against when reading so they drop their copies as well.  Without a shared cache alias entries are only
+    invalidated in the current process and otherwise expire after the TTL.
+
+    Attributes:
+        name (str): Name used to namespace the shared version keys
+        ttl (float): Number of seconds an entry is valid for, 0 disables the cache
+        alias (str|None): Django cache alias used to share scope versions between processes
+        max_entries (int): Maximum number of entries kept in memory
+    """
+
+    def __init__(self, name, ttl, alias=None, max_entries=10000):
+        self.name = name
+        self.ttl = ttl
+        self.alias = alias
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl is not None and self.ttl > 0
+
+    def _version_key(self, scope):
+        return 'boss:{}:version:{}'.format(self.name, scope)
+
+    def get_versions(self, scopes):
+        """Get the current shared version of each scope
+
+        Call before loading a value from the database and pass the result to set() so an invalidation that happens
+        while the value is being loaded is not missed.
+
+        Args:
+            scopes (list[str]): Scopes to look up
+
+        Returns:
+            (tuple): Versions, in the order of scopes.  None if a scope has never been invalidated
+        """
+        if not self.alias or len(scopes) == 0:
+            return ()
+        keys = [self._version_key(scope) for scope in scopes]
+        versions = caches[self.alias].get_many(keys)
+        return tuple(versions.get(key) for key in keys)
+
+    def get(self, key):
+        """Get a value from the cache
+
+        Args:
+            key (str): Key of the value
+
+        Returns:
+            The cached value or None if missing, expired or invalidated
+        """
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires, scopes, versions, value = entry
+        try:
+            valid = expires > time.monotonic() and versions == self.get_versions(scopes)
+        except Exception as e:
+            bossLogger().warning("Unable to check {} cache versions: {}".format(self.name, e))
+            valid = False
+
+        if not valid:
+            with self.lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+            return None
+        return value
+
+    def set(self, key, value, scopes=(), versions=None):
+        """Add a value to the cache
+
+        Args:
+            key (str): Key of the value
+            value: Value to cache
+            scopes (list[str]): Scopes the value belongs to
+            versions (tuple|None): Result of get_versions(scopes) taken before the value was loaded
+        """
+        if not self.enabled:
+            return
+
+        scopes = tuple(scopes)
+        try:
+            if versions is None:
+                versions = self.get_versions(scopes)
+        except Exception as e:
+            bossLogger().warning("Unable to get {} cache versions: {}".format(self.name, e))
+            return
+
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                now = time.monotonic()
+                self.entries = {k: v for k, v in self.entries.items() if v[0] > now}
+                if len(self.entries) >= self.max_entries:
+                    self.entries.clear()
+            self.entries[key] = (time.monotonic() + self.ttl, scopes, versions, value)
+
+    def invalidate(self, scope):
+        """Invalidate all entries in the given scope, in this and other processes
+
+        Args:
+            scope (str): Scope to invalidate
+        """
+        with self.lock:
+            self.entries = {k: v for k, v in self.entries.items() if scope not in v[1]}
+
+        if not self.alias:
+            return
+
+        shared = caches[self.alias]
+        key = self._version_key(scope)
+        try:
+            try:
+                shared.incr(key)
+            except ValueError:
+                # Seed missing versions from the clock so a version that was evicted from the shared cache never
+                # repeats a value another process may still have cached
+                if not shared.add(key, int(time.time() * 1000), timeout=None):
+                    shared.incr(key)
+        except Exception as e:
+            bossLogger().error("Unable to invalidate {} cache scope {}: {}".format(self.name, scope, e))
+
+    def clear(self):
+        """Drop all entries held by this process"""
+        with self.lock:
+            self.entries.clear()
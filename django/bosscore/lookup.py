@@ -16,6 +16,7 @@ import re
 from .serializers import BossLookupSerializer
 from .models import BossLookup
 from .error import BossError, ErrorCodes
+from . import resource_cache
 
 
 class LookUpKey:
@@ -77,6 +78,7 @@ class LookUpKey:
 
         """
 
+        resource_cache.invalidate_collection(collection)
         try:
             if channel and experiment and collection:
                 lookup_obj = BossLookup.objects.get(collection_name=collection, experiment_name=experiment,
@@ -116,6 +118,7 @@ class LookUpKey:
                        'channel_name': channel_name
                        }
         lookup_obj = BossLookup.objects.get(lookup_key=lookup_key)
+        resource_cache.invalidate_collection(lookup_obj.collection_name)
         serializer = BossLookupSerializer(lookup_obj, data=lookup_data, partial=True)
 
         if serializer.is_valid():
@@ -140,6 +143,7 @@ class LookUpKey:
                            }
             lookup_obj = BossLookup.objects.get(lookup_key=lookup_key)
             old_collection_name = lookup_obj.collection_name
+            resource_cache.invalidate_collection(old_collection_name)
             serializer = BossLookupSerializer(lookup_obj, data=lookup_data, partial=True)
 
             if serializer.is_valid():
@@ -188,6 +192,7 @@ class LookUpKey:
                            }
             lookup_obj = BossLookup.objects.get(lookup_key=lookup_key)
             old_experiment_name = lookup_obj.experiment_name
+            resource_cache.invalidate_collection(collection_name)
             serializer = BossLookupSerializer(lookup_obj, data=lookup_data, partial=True)
 
             if serializer.is_valid():
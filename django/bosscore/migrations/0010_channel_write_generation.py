@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2021-06-02 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bosscore', '0009_auto_20210517_2146'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='write_generation',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2021-06-09 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bosscore', '0010_channel_write_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_x_start',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_x_stop',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_y_start',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_y_stop',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_z_start',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='dirty_z_stop',
+            field=models.IntegerField(null=True),
+        ),
+    ]
@@ -294,6 +294,18 @@ class Channel(models.Model):
     downsample_status = models.CharField(choices=DOWNSAMPLE_STATUS_CHOICES, default=DownsampleStatus.NOT_DOWNSAMPLED, max_length=100)
     downsample_arn = models.CharField(max_length=4096, null=True)
 
+    # Number of writes to the channel's data through the Boss API, see bosscore.generation.record_write()
+    write_generation = models.BigIntegerField(default=0)
+
+    # Bounding box of the voxels written at the base resolution since the last downsample was queued, NULL if unknown.
+    # See bosscore.dirty_region.
+    dirty_x_start = models.IntegerField(null=True)
+    dirty_x_stop = models.IntegerField(null=True)
+    dirty_y_start = models.IntegerField(null=True)
+    dirty_y_stop = models.IntegerField(null=True)
+    dirty_z_start = models.IntegerField(null=True)
+    dirty_z_stop = models.IntegerField(null=True)
+
     # Is this a public channel?
     public = models.BooleanField(null=False, default=False)
 
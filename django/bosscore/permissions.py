@@ -12,14 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.contrib.contenttypes.models import ContentType
 
+from guardian.core import ObjectPermissionChecker
 from guardian.shortcuts import assign_perm, get_perms, remove_perm, get_perms_for_model
 from .error import ErrorCodes, BossError
-from bosscore.models import BossGroup
+from .local_cache import LocalCache
+from bosscore.models import BossGroup, Channel
 from bosscore.constants import ADMIN_USER, ADMIN_GRP
 
+# Cache of the permissions users have on channels, used by the data services
+_data_perm_cache = LocalCache('permission',
+                              getattr(settings, 'PERMISSION_CACHE_TTL', 0),
+                              getattr(settings, 'PERMISSION_CACHE_ALIAS', None))
+ALL_SCOPE = '*'
+
+
 def check_is_member_or_maintainer(user, group_name):
     """
     Check if a user is a member or maintainer of the a group
@@ -41,8 +51,117 @@ def check_is_member_or_maintainer(user, group_name):
         return BossError("{} does not exist".format(group_name), ErrorCodes.RESOURCE_NOT_FOUND)
 
 
+def _data_perm_scopes(user, channel):
+    return (ALL_SCOPE, 'user:{}'.format(user.pk), 'channel:{}'.format(channel.pk))
+
+
+def _data_perm_key(user, channel):
+    return '{}:{}'.format(user.pk, channel.pk)
+
+
+def _data_perm_versions(user, channel):
+    # Versions must be read before loading permissions so a concurrent invalidation is not lost
+    if not _data_perm_cache.enabled:
+        return None
+    try:
+        return _data_perm_cache.get_versions(_data_perm_scopes(user, channel))
+    except Exception:
+        return None
+
+
 class BossPermissionManager:
 
+    @staticmethod
+    def get_data_permissions(user, channel):
+        """
+        Get the permissions a user has on a channel, using the permission cache
+        Args:
+            user: User
+            channel: Channel
+
+        Returns:
+            set. Permission codenames
+
+        """
+        key = _data_perm_key(user, channel)
+        perms = _data_perm_cache.get(key)
+        if perms is None:
+            versions = _data_perm_versions(user, channel)
+            perms = frozenset(get_perms(user, channel))
+            _data_perm_cache.set(key, perms, _data_perm_scopes(user, channel), versions)
+        return perms
+
+    @staticmethod
+    def get_data_permissions_bulk(user, channels):
+        """
+        Get the permissions a user has on many channels, resolving all cache misses with a single pair of queries
+        Args:
+            user: User
+            channels: List of Channels
+
+        Returns:
+            dict. Channel id to set of permission codenames
+
+        """
+        result = {}
+        missing = []
+        for channel in channels:
+            perms = _data_perm_cache.get(_data_perm_key(user, channel))
+            if perms is None:
+                missing.append(channel)
+            else:
+                result[channel.pk] = perms
+
+        if len(missing) > 0:
+            versions = {channel.pk: _data_perm_versions(user, channel) for channel in missing}
+            checker = ObjectPermissionChecker(user)
+            checker.prefetch_perms(missing)
+            for channel in missing:
+                perms = frozenset(checker.get_perms(channel))
+                _data_perm_cache.set(_data_perm_key(user, channel), perms, _data_perm_scopes(user, channel),
+                                     versions[channel.pk])
+                result[channel.pk] = perms
+
+        return result
+
+    @staticmethod
+    def invalidate_user_permissions(user):
+        """
+        Drop cached permissions for a user, e.g. after their group membership changed
+        Args:
+            user: User
+
+        Returns:
+            None
+
+        """
+        _data_perm_cache.invalidate('user:{}'.format(user.pk))
+
+    @staticmethod
+    def invalidate_object_permissions(obj):
+        """
+        Drop cached permissions for a resource, e.g. after group permissions on it changed
+        Args:
+            obj: Resource
+
+        Returns:
+            None
+
+        """
+        if isinstance(obj, Channel):
+            _data_perm_cache.invalidate('channel:{}'.format(obj.pk))
+
+    @staticmethod
+    def invalidate_all_permissions():
+        """
+        Drop all cached permissions, e.g. after a group was deleted
+
+        Returns:
+            None
+
+        """
+        _data_perm_cache.invalidate(ALL_SCOPE)
+
     @staticmethod
     def is_in_group(user, group_name):
         """
@@ -105,6 +224,7 @@ class BossPermissionManager:
         group = Group.objects.get(name=group_name)
         for perm in perm_list:
             assign_perm(perm, group, obj)
+        BossPermissionManager.invalidate_object_permissions(obj)
 
     @staticmethod
     def get_permissions_group(group_name, obj):
@@ -138,6 +258,7 @@ class BossPermissionManager:
         group = Group.objects.get(name=group_name)
         for perm in perm_list:
             remove_perm(perm, group, obj)
+        BossPermissionManager.invalidate_object_permissions(obj)
 
     @staticmethod
     def delete_all_permissions_group(group_name, obj):
@@ -156,6 +277,7 @@ class BossPermissionManager:
         perm_list = get_perms(group, obj)
         for perm in perm_list:
             remove_perm(perm, group, obj)
+        BossPermissionManager.invalidate_object_permissions(obj)
 
     @staticmethod
     def add_permissions_admin_group(obj):
@@ -242,11 +364,36 @@ class BossPermissionManager:
         else:
             raise BossError("Unable to get permissions for this request", ErrorCodes.INVALID_POST_ARGUMENT)
 
-        if permission in get_perms(user, obj):
+        if permission in BossPermissionManager.get_data_permissions(user, obj):
             return True
         else:
             return False
 
+    @staticmethod
+    def check_data_permissions_bulk(user, channels, method_type):
+        """
+        Check user permissions for data in many channels
+        Args:
+            user: User name
+            channels: List of channels
+            method_type: Method type specified in the request
+
+        Returns:
+            dict. Channel id to True if the user has the permission on the channel
+
+        """
+        if method_type == 'GET':
+            permission = 'read_volumetric_data'
+        elif method_type == 'POST' or method_type == 'PUT':
+            permission = 'add_volumetric_data'
+        elif method_type == 'DELETE':
+            permission = 'delete_volumetric_data'
+        else:
+            raise BossError("Unable to get permissions for this request", ErrorCodes.INVALID_POST_ARGUMENT)
+
+        perms = BossPermissionManager.get_data_permissions_bulk(user, channels)
+        return {chan_id: permission in chan_perms for chan_id, chan_perms in perms.items()}
+
     @staticmethod
     def check_object_permissions(user, obj, method_type):
         """
@@ -265,7 +412,7 @@ class BossPermissionManager:
         else:
             raise BossError("Invalid method type. This query only supports a GET", ErrorCodes.INVALID_POST_ARGUMENT)
 
-        if permission in get_perms(user, obj):
+        if permission in BossPermissionManager.get_data_permissions(user, obj):
             return True
         else:
             return False
@@ -15,6 +15,7 @@ from django.contrib.auth.models import User, Group
 from functools import wraps
 from bosscore.constants import PUBLIC_GRP
 from bosscore.error import BossHTTPError, ErrorCodes
+from bosscore.permissions import BossPermissionManager
 from bosscore.serializers import BossRoleSerializer
 from .models import BossRole, BossGroup
 
@@ -63,6 +64,7 @@ def load_user_roles(user, roles):
             bgroup = BossGroup.objects.create(group=group, creator=user)
         if group not in groups:
             user.groups.add(group)
+            BossPermissionManager.invalidate_user_permissions(user)
 
 
 # Decorators to check that the user has the right role
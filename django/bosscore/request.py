@@ -12,16 +12,62 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import re
 import numpy as np
+from django.conf import settings
 
 from .models import Collection, Experiment, Channel
 from .lookup import LookUpKey
 from .error import BossHTTPError, BossError, ErrorCodes
 from .permissions import BossPermissionManager
+from . import resource_cache
 
 META_CONNECTOR = "&"
 
+# Services whose resource lookups may be served from the per-process resource cache
+CACHED_SERVICES = ('cutout', 'image', 'tile', 'ids', 'boundingbox')
+
+
+def parse_filter_ids(ids):
+    """
+    Parse and validate the ids a cutout is filtered by
+    Args:
+        ids (str|numpy.ndarray|list): Comma separated ids (e.g. the filter query parameter), or an array or list of ids
+
+    Returns:
+        numpy.ndarray: Sorted, unique uint64 ids
+
+    Raises:
+        BossError: If an id is not a valid uint64 or there are more than CUTOUT_FILTER_MAX_IDS ids
+
+    """
+    try:
+        if isinstance(ids, str):
+            values = np.array(ids.split(','))
+            values = np.char.strip(values)
+            if not np.char.isdigit(values).all():
+                raise ValueError("ids must be non-negative integers")
+            ids = values.astype(np.uint64)
+        elif isinstance(ids, np.ndarray):
+            if ids.dtype.kind not in 'ui' or (ids.dtype.kind == 'i' and (ids < 0).any()):
+                raise ValueError("ids must be non-negative integers")
+            ids = ids.astype(np.uint64, copy=False)
+        else:
+            if not all(isinstance(i, int) and not isinstance(i, bool) and i >= 0 for i in ids):
+                raise ValueError("ids must be non-negative integers")
+            ids = np.array(ids, dtype=np.uint64)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise BossError("Invalid id in list of filter ids. {}".format(e), ErrorCodes.INVALID_CUTOUT_ARGS)
+
+    # Sorted and unique, so membership tests can use binary search or np.isin(..., assume_unique=True)
+    ids = np.unique(ids.ravel())
+    max_ids = getattr(settings, 'CUTOUT_FILTER_MAX_IDS', None)
+    if max_ids is not None and ids.size > max_ids:
+        raise BossError("Cutout is filtered by {} ids, the maximum is {}".format(ids.size, max_ids),
+                        ErrorCodes.REQUEST_TOO_LARGE)
+    return ids
+
 
 class BossRequest:
     """
@@ -47,6 +93,7 @@ class BossRequest:
 
         self.default_time = None
         self.coord_frame = None
+        self.lookup_key = None
 
         # Endpoint service and version number from the request
         self.service = None
@@ -75,7 +122,8 @@ class BossRequest:
 
         # Request variables
         self.user = request.user
-        self.method = request.method
+        # Services that read data with a POST body (e.g. batch cutouts) validate as the method they stand in for
+        self.method = bossrequest.get('method', request.method)
         self.version = request.version
 
         # object service
@@ -157,18 +205,14 @@ class BossRequest:
                                 self.bossrequest['channel_name'])
 
         # Validate filter arguments if any
-        if 'ids' in self.bossrequest and self.bossrequest['ids']!= None:
+        if 'ids' in self.bossrequest and self.bossrequest['ids'] is not None:
 
             if self.channel.type != 'annotation':
                 raise BossError("The channel in request has type {}. Filter is only valid for annotation channels"
                       .format(self.channel.type), ErrorCodes.DATATYPE_NOT_SUPPORTED)
             else:
                 # convert ids to ints
-                try:
-                    self.filter_ids = np.fromstring(self.bossrequest['ids'], sep= ',', dtype=np.uint64)
-                except (TypeError, ValueError)as e:
-                    raise BossError("Invalid id in list of filter ids {}. {}".format(self.bossrequest['ids'], str(e)),
-                                    ErrorCodes.INVALID_CUTOUT_ARGS)
+                self.filter_ids = parse_filter_ids(self.bossrequest['ids'])
 
         time = self.bossrequest['time_args']
         if not time:
@@ -335,16 +379,50 @@ class BossRequest:
             channel_name: Channel name from the request
 
         """
-        if collection_name:
-            colstatus = self.set_collection(collection_name)
-            if experiment_name and colstatus:
-                expstatus = self.set_experiment(experiment_name)
-                if channel_name and expstatus:
-                    self.set_channel(channel_name)
+        cacheable = (self.method == 'GET' and self.service in CACHED_SERVICES and
+                     collection_name and experiment_name and channel_name)
+        boss_key = None
+        resolved = None
+        if cacheable:
+            boss_key = META_CONNECTOR.join((str(collection_name), str(experiment_name), str(channel_name)))
+            resolved = resource_cache.get(boss_key)
+
+        downsample_status = None
+        if resolved:
+            # downsample_status is changed by queryset updates and the downsample step function, which do not
+            # invalidate the cache, so it is always read from the database
+            downsample_status = (Channel.objects.filter(pk=resolved.channel.pk)
+                                 .values_list('downsample_status', flat=True).first())
+            if downsample_status is None:
+                # The channel was deleted
+                resolved = None
+
+        if resolved:
+            self.collection = resolved.collection
+            self.experiment = resolved.experiment
+            # Copy so the shared cached instance is never modified
+            self.channel = copy.copy(resolved.channel)
+            self.channel.downsample_status = downsample_status
+            self.coord_frame = resolved.coord_frame
+            self.lookup_key = resolved.lookup_key
+        else:
+            versions = resource_cache.get_versions(str(collection_name)) if cacheable else None
+            if collection_name:
+                colstatus = self.set_collection(collection_name)
+                if experiment_name and colstatus:
+                    expstatus = self.set_experiment(experiment_name)
+                    if channel_name and expstatus:
+                        self.set_channel(channel_name)
 
         self.check_permissions()
         self.set_boss_key()
 
+        if cacheable and not resolved:
+            resource_cache.put(boss_key, resource_cache.ResolvedResource(self.collection, self.experiment,
+                                                                         self.channel, self.coord_frame,
+                                                                         self.get_lookup_key()),
+                               versions)
+
     def set_cutoutargs(self, resolution, x_range, y_range, z_range):
         """
         Validate and initialize cutout arguments in the request
@@ -388,6 +466,38 @@ class BossRequest:
             raise BossError("Type error in cutout argument{}/{}/{}/{}".format(resolution, x_range, y_range, z_range),
                             ErrorCodes.TYPE_ERROR)
 
+    def copy_for_region(self, resolution, x_range, y_range, z_range, time_args=None):
+        """
+        Create a request for another region of the same channel, without resolving the resources and checking
+        permissions again
+        Args:
+            resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+            x_range: Python style range indicating the X coordinates  (eg. 100:200)
+            y_range: Python style range indicating the Y coordinates (eg. 100:200)
+            z_range: Python style range indicating the Z coordinates (eg. 100:200)
+            time_args: Python style range indicating the time samples (eg. 0:2), None for the default time sample
+
+        Returns:
+            BossRequest: Validated request for the region
+
+        Raises:
+            BossError: For invalid regions
+
+        """
+        req = copy.copy(self)
+        req.bossrequest = dict(self.bossrequest, resolution=resolution, x_args=x_range, y_args=y_range,
+                               z_args=z_range, time_args=time_args)
+        if time_args:
+            req.set_time(time_args)
+            req.time_request = True
+        else:
+            req.time_start = self.channel.default_time_sample
+            req.time_stop = self.channel.default_time_sample + 1
+            req.time_request = False
+
+        req.set_cutoutargs(resolution, x_range, y_range, z_range)
+        return req
+
     def set_imageargs(self, orientation, resolution, x_args, y_args, z_args):
         """
         Validate and initialize tile service arguments in the request
@@ -542,16 +652,16 @@ class BossRequest:
         Raises : BossError is the collection is not found.
 
         """
-        if Collection.objects.filter(name=str(collection_name)).exists():
-            self.collection = Collection.objects.get(name=collection_name)
-            if self.collection.to_be_deleted is not None:
-                raise BossError("Invalid Request. This resource {} has been marked for deletion"
-                                .format(collection_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
-
-            return True
-        else:
+        try:
+            self.collection = Collection.objects.get(name=str(collection_name))
+        except Collection.DoesNotExist:
             raise BossError("Collection {} not found".format(collection_name), ErrorCodes.RESOURCE_NOT_FOUND)
 
+        if self.collection.to_be_deleted is not None:
+            raise BossError("Invalid Request. This resource {} has been marked for deletion"
+                            .format(collection_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
+        return True
+
     def get_collection(self):
         """
         Get the collection name for the current collection
@@ -572,15 +682,17 @@ class BossRequest:
         Returns: BossError is the experiment with the matching name is not found in the db
 
         """
-        if Experiment.objects.filter(name=experiment_name, collection=self.collection).exists():
-            self.experiment = Experiment.objects.get(name=experiment_name, collection=self.collection)
-            if self.experiment.to_be_deleted is not None:
-                raise BossError("Invalid Request. This resource {} has been marked for deletion"
-                                .format(experiment_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
-            self.coord_frame = self.experiment.coord_frame
-        else:
+        try:
+            self.experiment = Experiment.objects.select_related('coord_frame').get(name=experiment_name,
+                                                                                  collection=self.collection)
+        except Experiment.DoesNotExist:
             raise BossError("Experiment {} not found".format(experiment_name), ErrorCodes.RESOURCE_NOT_FOUND)
 
+        if self.experiment.to_be_deleted is not None:
+            raise BossError("Invalid Request. This resource {} has been marked for deletion"
+                            .format(experiment_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
+        self.coord_frame = self.experiment.coord_frame
+
         return True
 
     def get_experiment(self):
@@ -603,15 +715,16 @@ class BossRequest:
         Returns:
 
         """
-        if Channel.objects.filter(name=channel_name, experiment=self.experiment).exists():
+        try:
             self.channel = Channel.objects.get(name=channel_name, experiment=self.experiment)
-            if self.channel.to_be_deleted is not None:
-                raise BossError("Invalid Request. This resource {} has been marked for deletion"
-                                .format(channel_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
-            return True
-        else:
+        except Channel.DoesNotExist:
             raise BossError("Channel {} not found".format(channel_name), ErrorCodes.RESOURCE_NOT_FOUND)
 
+        if self.channel.to_be_deleted is not None:
+            raise BossError("Invalid Request. This resource {} has been marked for deletion"
+                            .format(channel_name),ErrorCodes.RESOURCE_MARKED_FOR_DELETION)
+        return True
+
     def get_channel(self):
         """
         Return the channel name for the channel
@@ -838,7 +951,9 @@ class BossRequest:
             lookup (str) : The base lookup key that correspond to the request
 
         """
-        return LookUpKey.get_lookup_key(self.base_boss_key).lookup_key
+        if self.lookup_key is None:
+            self.lookup_key = LookUpKey.get_lookup_key(self.base_boss_key).lookup_key
+        return self.lookup_key
 
     def set_time(self, time):
         """
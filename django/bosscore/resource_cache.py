@@ -0,0 +1,120 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-process cache of the collection, experiment, channel, coordinate frame and
+lookup key resolved by BossRequest for data requests, keyed by boss key.
+
+Entries are scoped by collection name so renaming or deleting a collection,
+experiment or channel only drops the entries for that collection.  Changes to
+coordinate frames invalidate every entry.  Writes and downsamples change a
+channel's row with QuerySet.update(), which sends no post_save, so the
+downsample_status of a cached channel can be stale: BossRequest re-reads it on
+every request instead of using the cached value.  The other columns those
+updates change (write_generation, downsample_arn and the dirty region) are
+only read from the database, never from a cached channel.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+
+from .local_cache import LocalCache
+
+ALL_SCOPE = '*'
+
+ResolvedResource = namedtuple('ResolvedResource', ['collection', 'experiment', 'channel', 'coord_frame',
+                                                   'lookup_key'])
+
+_cache = LocalCache('resource',
+                    getattr(settings, 'RESOURCE_CACHE_TTL', 0),
+                    getattr(settings, 'RESOURCE_CACHE_ALIAS', None))
+
+
+def _scopes(collection_name):
+    return (ALL_SCOPE, collection_name)
+
+
+def get_versions(collection_name):
+    """Get the invalidation versions to pass to put() before resolving resources from the database
+
+    Args:
+        collection_name (str): Name of the collection
+
+    Returns:
+        (tuple)
+    """
+    if not _cache.enabled:
+        return ()
+    return _cache.get_versions(_scopes(collection_name))
+
+
+def get(boss_key):
+    """Get the resolved resources for a boss key
+
+    Args:
+        boss_key (str): collection&experiment&channel
+
+    Returns:
+        (ResolvedResource|None)
+    """
+    return _cache.get(boss_key)
+
+
+def put(boss_key, resolved, versions=None):
+    """Cache the resolved resources for a boss key
+
+    Args:
+        boss_key (str): collection&experiment&channel
+        resolved (ResolvedResource): Resources to cache
+        versions (tuple|None): Result of get_versions() taken before the resources were loaded
+    """
+    _cache.set(boss_key, resolved, _scopes(resolved.collection.name), versions)
+
+
+def invalidate_collection(collection_name):
+    """Drop all cached resources that belong to the given collection
+
+    Args:
+        collection_name (str): Name of the collection
+    """
+    _cache.invalidate(collection_name)
+
+
+def invalidate_all():
+    """Drop all cached resources"""
+    _cache.invalidate(ALL_SCOPE)
+
+
+def on_resource_changed(sender, instance, **kwargs):
+    """Signal handler that invalidates cached resources when a data model object is saved or deleted
+
+    Connected in BosscoreConfig.ready() so changes that do not go through the resource views (admin console,
+    management commands, tests) are also picked up.
+    """
+    name = sender.__name__
+    try:
+        if name == 'Collection':
+            invalidate_collection(instance.name)
+        elif name == 'Experiment':
+            invalidate_collection(instance.collection.name)
+        elif name == 'Channel':
+            invalidate_collection(instance.experiment.collection.name)
+        elif name == 'BossLookup':
+            invalidate_collection(instance.collection_name)
+        else:
+            invalidate_all()
+    except Exception:
+        # The related object may already be gone, fall back to dropping everything
+        invalidate_all()
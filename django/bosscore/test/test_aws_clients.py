@@ -0,0 +1,46 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from boss.aws import ClientPool, PooledSession
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.session = MagicMock()
+        self.session.client.side_effect = lambda service, **kwargs: MagicMock(name=service)
+        patcher = patch('bossutils.aws.get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ClientPool()
+
+    def test_client_reused(self):
+        sqs = self.pool.get_client('sqs')
+        self.assertIs(self.pool.get_client('sqs'), sqs)
+        self.assertIsNot(self.pool.get_client('sns'), sqs)
+        self.assertIsNot(self.pool.get_client('sqs', 'us-west-2'), sqs)
+        self.assertEqual(self.session.client.call_count, 3)
+
+    def test_fork(self):
+        sqs = self.pool.get_client('sqs')
+        with patch('boss.aws.os.getpid', return_value=-1):
+            self.assertIsNot(self.pool.get_client('sqs'), sqs)
+
+    def test_pooled_session(self):
+        session = PooledSession(self.pool)
+        self.assertIs(session.client('stepfunctions'), self.pool.get_client('stepfunctions'))
+        self.assertIs(session.region_name, self.session.region_name)
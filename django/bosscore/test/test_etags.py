@@ -0,0 +1,85 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from unittest.mock import MagicMock, patch
+
+from boss.utils import get_etag, not_modified
+from bosscore.generation import bump_generation
+from bosscore.models import Channel
+
+
+class TestETags(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+        # The tests use a per-process cache
+        patcher = patch('boss.utils.is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.req = MagicMock()
+        self.req.channel.pk = 1
+        self.req.channel.downsample_status = 'NOT_DOWNSAMPLED'
+        self.req.channel.base_resolution = 0
+        self.req.get_resolution.return_value = 0
+        self.req.get_lookup_key.return_value = '1&1&1'
+        self.req.get_time.return_value = range(0, 1)
+
+        self.request = MagicMock()
+        self.request.META = {}
+        self.request.accepted_media_type = 'application/blosc'
+        self.request.query_params.lists.return_value = []
+
+    def test_etag_changes_on_write(self):
+        etag = get_etag(self.request, self.req)
+        self.assertEqual(etag, get_etag(self.request, self.req))
+
+        bump_generation(1)
+        self.assertNotEqual(etag, get_etag(self.request, self.req))
+
+    def test_etag_changes_with_format(self):
+        etag = get_etag(self.request, self.req)
+        self.request.accepted_media_type = 'application/npygz'
+        self.assertNotEqual(etag, get_etag(self.request, self.req))
+
+    def test_not_modified(self):
+        etag = get_etag(self.request, self.req)
+        self.assertIsNone(not_modified(self.request, etag))
+
+        self.request.META['HTTP_IF_NONE_MATCH'] = '"other", {}'.format(etag)
+        response = not_modified(self.request, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.request.META['HTTP_IF_NONE_MATCH'] = 'W/{}'.format(etag)
+        self.assertEqual(not_modified(self.request, etag).status_code, 304)
+
+        self.request.META['HTTP_IF_NONE_MATCH'] = '"other"'
+        self.assertIsNone(not_modified(self.request, etag))
+
+    def test_no_etag_without_shared_generation(self):
+        with patch('boss.utils.is_shared', return_value=False):
+            self.assertIsNone(get_etag(self.request, self.req))
+
+    def test_no_etag_for_resolutions_being_downsampled(self):
+        for status in (Channel.DownsampleStatus.QUEUED, Channel.DownsampleStatus.IN_PROGRESS):
+            self.req.channel.downsample_status = status
+            self.req.get_resolution.return_value = 1
+            self.assertIsNone(get_etag(self.request, self.req))
+
+            self.req.get_resolution.return_value = 0
+            self.assertIsNotNone(get_etag(self.request, self.req))
@@ -0,0 +1,46 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from bosscore.error import BossError, ErrorCodes
+from bosscore.request import parse_filter_ids
+
+
+@override_settings(CUTOUT_FILTER_MAX_IDS=5)
+class TestParseFilterIds(SimpleTestCase):
+
+    def test_string(self):
+        ids = parse_filter_ids('4, 2,2,18446744073709551615')
+        self.assertEqual(ids.dtype, np.uint64)
+        self.assertEqual(ids.tolist(), [2, 4, 2 ** 64 - 1])
+
+    def test_array(self):
+        ids = parse_filter_ids(np.array([9, 3, 9], dtype='<u8'))
+        self.assertEqual(ids.tolist(), [3, 9])
+
+    def test_list(self):
+        self.assertEqual(parse_filter_ids([5, 1]).tolist(), [1, 5])
+
+    def test_invalid(self):
+        for ids in ('1,a', '1,,2', '-1', [1, 'a'], [-1], np.array([-1, 2])):
+            with self.assertRaises(BossError) as ctx:
+                parse_filter_ids(ids)
+            self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_CUTOUT_ARGS)
+
+    def test_too_many(self):
+        with self.assertRaises(BossError) as ctx:
+            parse_filter_ids(np.arange(6))
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.REQUEST_TOO_LARGE)
@@ -0,0 +1,75 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import gzip
+import json
+
+import numpy as np
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from boss.middleware import JSONCompressionMiddleware, choose_encoding
+from boss.renderers import BossJSONRenderer
+
+
+class TestBossJSONRenderer(SimpleTestCase):
+
+    def test_numpy(self):
+        data = {'ids': np.array([1, 2 ** 63], dtype=np.uint64), 'count': np.uint64(2)}
+        self.assertEqual(json.loads(BossJSONRenderer().render(data)), {'ids': [1, 2 ** 63], 'count': 2})
+
+    def test_matches_drf(self):
+        data = {'name': 'chan ', 'created': datetime.datetime(2021, 5, 17, 12, 30, 1, 123456),
+                'list': [1, 2.5, None, True]}
+        self.assertEqual(BossJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(JSON_COMPRESSION_MIN_SIZE=100, JSON_COMPRESSION_ENCODINGS=('gzip',))
+class TestJSONCompressionMiddleware(SimpleTestCase):
+
+    def setUp(self):
+        self.body = json.dumps({'ids': [str(i) for i in range(1000)]}).encode()
+
+    def get_response(self, accept_encoding, body=None, content_type='application/json'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = JSONCompressionMiddleware(
+            lambda request: HttpResponse(body or self.body, content_type=content_type))
+        return middleware(request)
+
+    def test_gzip(self):
+        response = self.get_response('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_not_accepted(self):
+        response = self.get_response('gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_small(self):
+        response = self.get_response('gzip', body=b'{}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_binary(self):
+        response = self.get_response('gzip', content_type='application/blosc')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip;q=0.5, br', ('zstd', 'br', 'gzip')), 'br')
+        self.assertEqual(choose_encoding('*', ('zstd', 'gzip')), 'zstd')
+        self.assertEqual(choose_encoding('gzip;q=0.5, br;q=0.8', ('gzip', 'br')), 'br')
+        self.assertIsNone(choose_encoding('', ('gzip',)))
@@ -0,0 +1,68 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from bosscore.local_cache import LocalCache
+
+
+class TestLocalCache(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_get_set(self):
+        cache = LocalCache('test', 60, 'default')
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1, ['col1'])
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_disabled(self):
+        cache = LocalCache('test', 0, 'default')
+        cache.set('a', 1, ['col1'])
+        self.assertIsNone(cache.get('a'))
+
+    def test_expires(self):
+        cache = LocalCache('test', 60, 'default')
+        with patch('bosscore.local_cache.time.monotonic', return_value=1000):
+            cache.set('a', 1, ['col1'])
+        with patch('bosscore.local_cache.time.monotonic', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+
+    def test_invalidate_scope(self):
+        cache = LocalCache('test', 60, 'default')
+        cache.set('a', 1, ['col1'])
+        cache.set('b', 2, ['col2'])
+        cache.invalidate('col1')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+
+    def test_invalidate_other_process(self):
+        # Two instances sharing a Django cache stand in for two uwsgi processes
+        process1 = LocalCache('test', 60, 'default')
+        process2 = LocalCache('test', 60, 'default')
+        process1.set('a', 1, ['col1'])
+        process2.set('a', 1, ['col1'])
+
+        process2.invalidate('col1')
+        self.assertIsNone(process1.get('a'))
+
+    def test_stale_versions_not_cached(self):
+        cache = LocalCache('test', 60, 'default')
+        versions = cache.get_versions(['col1'])
+        cache.invalidate('col1')
+        cache.set('a', 1, ['col1'], versions)
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,58 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from boss.metrics import MetricsEmitter, LocalSink
+
+DIMENSIONS = [{'Name': 'User', 'Value': 'testuser'}, {'Name': 'Resource', 'Value': 'col1/exp1/channel1'}]
+
+
+class TestMetricsEmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.sink = LocalSink()
+        self.emitter = MetricsEmitter(self.sink, flush_interval=3600)
+
+    def test_aggregates(self):
+        self.emitter.emit('BOSS/Cutout', DIMENSIONS, [('InvokeCount', 1.0, 'Count'), ('EgressCost', 100, 'Bytes')])
+        self.emitter.emit('BOSS/Cutout', DIMENSIONS, [('InvokeCount', 1.0, 'Count'), ('EgressCost', 300, 'Bytes')])
+        self.assertEqual(self.sink.sent, [])
+
+        self.emitter.flush()
+        self.assertEqual(len(self.sink.sent), 1)
+        namespace, data = self.sink.sent[0]
+        self.assertEqual(namespace, 'BOSS/Cutout')
+
+        datums = {d['MetricName']: d for d in data}
+        self.assertEqual(datums['InvokeCount']['StatisticValues']['SampleCount'], 2)
+        self.assertEqual(datums['EgressCost']['StatisticValues'],
+                         {'SampleCount': 2.0, 'Sum': 400.0, 'Minimum': 100.0, 'Maximum': 300.0})
+        self.assertEqual(datums['EgressCost']['Dimensions'], DIMENSIONS)
+
+        self.emitter.flush()
+        self.assertEqual(len(self.sink.sent), 1)
+
+    def test_namespaces(self):
+        self.emitter.emit('BOSS/Cutout', DIMENSIONS, [('InvokeCount', 1.0, 'Count')])
+        self.emitter.emit('BOSS/Tile', DIMENSIONS, [('InvokeCount', 1.0, 'Count')])
+        self.emitter.flush()
+        self.assertEqual(sorted(ns for ns, _ in self.sink.sent), ['BOSS/Cutout', 'BOSS/Tile'])
+
+    def test_full_buffer_flushes(self):
+        emitter = MetricsEmitter(self.sink, flush_interval=3600, max_buffer=2)
+        emitter.emit('BOSS/Cutout', [{'Name': 'User', 'Value': 'a'}], [('InvokeCount', 1.0, 'Count')])
+        self.assertEqual(self.sink.sent, [])
+        emitter.emit('BOSS/Cutout', [{'Name': 'User', 'Value': 'b'}], [('InvokeCount', 1.0, 'Count')])
+        self.assertEqual(len(self.sink.sent[0][1]), 2)
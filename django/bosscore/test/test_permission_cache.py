@@ -0,0 +1,72 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import caches
+from django.contrib.auth.models import Group
+from rest_framework.test import APITestCase
+
+from bosscore.models import Channel
+from bosscore.permissions import BossPermissionManager, _data_perm_cache
+from .setup_db import SetupTestDB, EXP1
+
+
+class PermissionCacheTests(APITestCase):
+    """
+    Class to test caching of the permissions users have on channels
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        _data_perm_cache.clear()
+
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user('testuser')
+        dbsetup.set_user(self.user)
+        dbsetup.insert_test_data()
+
+        self.other = dbsetup.create_user('otheruser')
+        self.channels = list(Channel.objects.filter(experiment__name=EXP1, experiment__collection__name='col1'))
+
+    def test_check_data_permissions(self):
+        channel = self.channels[0]
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.user, channel, 'GET'))
+        self.assertFalse(BossPermissionManager.check_data_permissions(self.other, channel, 'GET'))
+
+    def test_permission_removed(self):
+        """Removing a group's permissions on a channel drops the cached permissions"""
+        channel = self.channels[0]
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.user, channel, 'POST'))
+
+        BossPermissionManager.delete_all_permissions_group('testuser-primary', channel)
+        self.assertFalse(BossPermissionManager.check_data_permissions(self.user, channel, 'POST'))
+
+    def test_user_added_to_group(self):
+        """Adding a user to a group drops the user's cached permissions"""
+        channel = self.channels[0]
+        self.assertFalse(BossPermissionManager.check_data_permissions(self.other, channel, 'GET'))
+
+        self.other.groups.add(Group.objects.get(name='testuser-primary'))
+        BossPermissionManager.invalidate_user_permissions(self.other)
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.other, channel, 'GET'))
+
+    def test_check_data_permissions_bulk(self):
+        channel = self.channels[0]
+        BossPermissionManager.check_data_permissions(self.user, channel, 'GET')
+
+        result = BossPermissionManager.check_data_permissions_bulk(self.user, self.channels, 'DELETE')
+        self.assertEqual(set(result.keys()), set(c.pk for c in self.channels))
+        self.assertTrue(all(result.values()))
+
+        result = BossPermissionManager.check_data_permissions_bulk(self.other, self.channels, 'GET')
+        self.assertFalse(any(result.values()))
@@ -0,0 +1,62 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+
+from bosscore.generation import get_generation, record_write
+from bosscore.models import Channel
+from .setup_db import SetupTestDB
+
+
+class TestRecordWrite(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        dbsetup = SetupTestDB()
+        user = dbsetup.create_user('testuser')
+        dbsetup.set_user(user)
+        dbsetup.insert_test_data()
+        self.channel = Channel.objects.get(name='channel1', experiment__name='exp1')
+
+    def test_write_increments_generation(self):
+        generation = get_generation(self.channel.pk)
+        record_write(self.channel.pk)
+        record_write(self.channel.pk)
+
+        self.channel.refresh_from_db()
+        self.assertEqual(self.channel.write_generation, 2)
+        self.assertGreater(get_generation(self.channel.pk), generation)
+
+    def test_write_resets_downsampled_channel(self):
+        self.channel.downsample_status = Channel.DownsampleStatus.DOWNSAMPLED
+        self.channel.downsample_arn = 'arn:aws:states:us-east-1:123456789012:execution:downsample:1'
+        self.channel.save()
+
+        record_write(self.channel.pk)
+
+        self.channel.refresh_from_db()
+        self.assertEqual(self.channel.downsample_status, Channel.DownsampleStatus.NOT_DOWNSAMPLED)
+        self.assertEqual(self.channel.downsample_arn, '')
+
+    def test_write_keeps_other_statuses(self):
+        self.channel.downsample_status = Channel.DownsampleStatus.IN_PROGRESS
+        self.channel.downsample_arn = 'arn:aws:states:us-east-1:123456789012:execution:downsample:1'
+        self.channel.save()
+
+        record_write(self.channel.pk)
+
+        self.channel.refresh_from_db()
+        self.assertEqual(self.channel.downsample_status, Channel.DownsampleStatus.IN_PROGRESS)
+        self.assertEqual(self.channel.downsample_arn, 'arn:aws:states:us-east-1:123456789012:execution:downsample:1')
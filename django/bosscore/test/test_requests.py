@@ -22,6 +22,7 @@ import numpy as np
 
 from ..request import BossRequest
 from bosscore.error import BossError
+from bosscore.models import Channel
 from .setup_db import SetupTestDB, NUM_HIERARCHY_LEVELS, BASE_RESOLUTION, EXP1, EXP_BASE_RES, CHAN_BASE_RES
 from bossspatialdb.views import Cutout
 
@@ -84,6 +85,39 @@ class CutoutRequestTests(APITestCase):
         self.assertEqual(ret.get_boss_key(), boss_key)
         self.assertEqual(ret.time_request, False)
 
+    def test_request_cutout_reads_current_downsample_status(self):
+        """
+        Test that cached resources report the current downsample status of the channel
+        :return:
+        """
+        url = '/' + version + '/cutout/col1/exp1/channel1/2/0:5/0:6/0:2/'
+        request_args = {
+            "service": "cutout",
+            "version": version,
+            "collection_name": 'col1',
+            "experiment_name": 'exp1',
+            "channel_name": 'channel1',
+            "resolution": 2,
+            "x_args": "0:5",
+            "y_args": "0:6",
+            "z_args": "0:2",
+            "time_args": None
+        }
+
+        def get_request():
+            request = self.rf.get(url)
+            force_authenticate(request, user=self.user)
+            drfrequest = Cutout().initialize_request(request)
+            drfrequest.version = version
+            return BossRequest(drfrequest, request_args)
+
+        self.assertEqual(get_request().channel.downsample_status, Channel.DownsampleStatus.NOT_DOWNSAMPLED)
+
+        # Queryset updates do not send post_save
+        Channel.objects.filter(name='channel1', experiment__name='exp1').update(
+            downsample_status=Channel.DownsampleStatus.QUEUED)
+        self.assertEqual(get_request().channel.downsample_status, Channel.DownsampleStatus.QUEUED)
+
     def test_request_cutout_init_cutoutargs_channel(self):
         """
         Test initialization of cutout arguments for a cutout request
@@ -0,0 +1,63 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import caches
+from django.test import TestCase
+from fakeredis import FakeStrictRedis
+
+from boss.throttling import RedisThrottleCounters, MetricDatabase, _threshold_cache
+from bosscore.models import ThrottleMetric, ThrottleUsage
+
+EGRESS = ThrottleMetric.METRIC_TYPE_EGRESS
+BYTES = ThrottleMetric.METRIC_UNITS_BYTES
+
+
+class TestRedisThrottleCounters(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        _threshold_cache.clear()
+
+        self.conn = FakeStrictRedis()
+        self.conn.flushall()
+        self.counters = RedisThrottleCounters(self.conn, flush_interval=60)
+
+    def test_check_increments(self):
+        self.assertIsNone(self.counters.check('cutout', EGRESS, BYTES, 'testuser', 100))
+        self.assertIsNone(self.counters.check('cutout', EGRESS, BYTES, 'testuser', 50.5))
+
+        self.counters.flush(force=True)
+        usage = MetricDatabase().getUsageAsJson('user:testuser')
+        self.assertEqual(usage[0]['value'], 150)
+
+    def test_user_throttled(self):
+        MetricDatabase().updateThreshold('user:testuser', EGRESS, 100)
+
+        # The call exceeding the limit is still allowed
+        self.assertIsNone(self.counters.check('cutout', EGRESS, BYTES, 'testuser', 150))
+        level, current, limit = self.counters.check('cutout', EGRESS, BYTES, 'testuser', 10)
+        self.assertEqual(level, MetricDatabase.USER_LEVEL_METRIC)
+        self.assertEqual(current, 150)
+        self.assertEqual(limit, 100)
+
+        # Throttled calls are not counted
+        self.counters.flush(force=True)
+        self.assertEqual(ThrottleUsage.objects.get(threshold__name='user:testuser').value, 150)
+
+    def test_system_throttled(self):
+        MetricDatabase().updateThreshold('system', EGRESS, 10)
+
+        self.assertIsNone(self.counters.check('cutout', EGRESS, BYTES, 'user1', 20))
+        level, _, _ = self.counters.check('cutout', EGRESS, BYTES, 'user2', 1)
+        self.assertEqual(level, MetricDatabase.SYSTEM_LEVEL_METRIC)
@@ -22,7 +22,7 @@ from guardian.shortcuts import get_objects_for_user, get_perms_for_model, assign
     remove_perm, get_objects_for_group
 
 from bosscore.privileges import check_role, BossPrivilegeManager
-from bosscore.permissions import check_is_member_or_maintainer
+from bosscore.permissions import check_is_member_or_maintainer, BossPermissionManager
 from bosscore.error import BossHTTPError, ErrorCodes, BossGroupNotFoundError, BossUserNotFoundError
 
 from bosscore.models import BossGroup, Collection, Experiment, Channel
@@ -98,6 +98,7 @@ class BossGroupMember(APIView):
             if request.user.has_perm("maintain_group", bgroup):
                 usr = User.objects.get(username=user_name)
                 bgroup.group.user_set.add(usr)
+                BossPermissionManager.invalidate_user_permissions(usr)
                 return HttpResponse(status=204)
             else:
                 return BossHTTPError('The user {} does not have the {} permission on the group {}'
@@ -137,6 +138,7 @@ class BossGroupMember(APIView):
             if request.user.has_perm("maintain_group", bgroup):
                 usr = User.objects.get(username=user_name)
                 bgroup.group.user_set.remove(usr)
+                BossPermissionManager.invalidate_user_permissions(usr)
                 return HttpResponse(status=204)
             else:
                 return BossHTTPError('The user {} does not have the {} permission on the group {}'
@@ -433,6 +435,7 @@ class BossUserGroup(APIView):
                                         ErrorCodes.BAD_REQUEST)  
                 else:
                     group.delete()
+                    BossPermissionManager.invalidate_all_permissions()
                     return Response(status=204)
             else:
                 return BossHTTPError('Groups can only be deleted by the creator or administrator',
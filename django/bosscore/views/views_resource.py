@@ -27,6 +27,7 @@ from bosscore.error import BossError, BossHTTPError, BossPermissionError, BossRe
 from bosscore.lookup import LookUpKey
 from bosscore.permissions import BossPermissionManager
 from bosscore.privileges import check_role
+from bosscore import resource_cache
 
 from bosscore.serializers import CollectionSerializer, ExperimentSerializer, ChannelSerializer, \
     CoordinateFrameSerializer, CoordinateFrameUpdateSerializer, ExperimentReadSerializer, ChannelReadSerializer, \
@@ -133,6 +134,7 @@ class CollectionDetail(APIView):
                 serializer = CollectionSerializer(collection_obj, data=request.data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
+                    resource_cache.invalidate_collection(collection)
 
                     # update the lookup key if you update the name
                     if 'name' in request.data and request.data['name'] != collection:
@@ -176,6 +178,7 @@ class CollectionDetail(APIView):
 
                 collection_obj.to_be_deleted = timezone.now()
                 collection_obj.save()
+                resource_cache.invalidate_collection(collection)
 
                 return HttpResponse(status=204)
             else:
@@ -260,6 +263,7 @@ class CoordinateFrameDetail(APIView):
                 serializer = CoordinateFrameUpdateSerializer(coordframe_obj, data=request.data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
+                    resource_cache.invalidate_all()
 
                     # return the object back to the user
                     coordframe = serializer.data['name']
@@ -298,6 +302,7 @@ class CoordinateFrameDetail(APIView):
 
                 coordframe_obj.to_be_deleted = timezone.now()
                 coordframe_obj.save()
+                resource_cache.invalidate_all()
                 return HttpResponse(status=204)
             else:
                 return BossPermissionError('delete', coordframe)
@@ -426,6 +431,7 @@ class ExperimentDetail(APIView):
                 serializer = ExperimentUpdateSerializer(experiment_obj, data=request.data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
+                    resource_cache.invalidate_collection(collection)
 
                     # update the lookup key if you update the name
                     if 'name' in request.data and request.data['name'] != experiment:
@@ -476,6 +482,7 @@ class ExperimentDetail(APIView):
 
                 experiment_obj.to_be_deleted = timezone.now()
                 experiment_obj.save()
+                resource_cache.invalidate_collection(collection)
 
                 return HttpResponse(status=204)
             else:
@@ -785,6 +792,7 @@ class ChannelDetail(APIView):
                 serializer = ChannelUpdateSerializer(channel_obj, data=data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
+                    resource_cache.invalidate_collection(collection)
 
                     channel_obj = Channel.objects.get(name=channel_name, experiment=experiment_obj)
                     # Save source and related channels if they are valid
@@ -844,6 +852,7 @@ class ChannelDetail(APIView):
                                          .format(channel), ErrorCodes.INTEGRITY_ERROR)
                 channel_obj.to_be_deleted = timezone.now()
                 channel_obj.save()
+                resource_cache.invalidate_collection(collection)
                 return HttpResponse(status=204)
             else:
                 return BossPermissionError('delete', channel)
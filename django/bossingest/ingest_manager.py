@@ -14,7 +14,6 @@
 
 import json
 import jsonschema
-import boto3
 import math
 from django.utils import timezone
 from django.conf import settings
@@ -25,10 +24,12 @@ from ingestclient.core.backend import BossBackend
 from bossingest.serializers import IngestJobCreateSerializer
 from bossingest.models import IngestJob
 from bossingest.utils import get_sqs_num_msgs
+from boss import aws
 
 from bosscore.error import BossError, ErrorCodes
 from bosscore.models import Collection, Experiment, Channel
 from bosscore.lookup import LookUpKey
+from bosscore.generation import record_write
 
 from ndingest.ndqueue.uploadqueue import UploadQueue
 from ndingest.ndqueue.ingestqueue import IngestQueue
@@ -562,6 +563,7 @@ class IngestManager:
         # If successfully set status to COMPLETING, kick off the completion
         # process.  Otherwise, completion already started.
         if rows_updated > 0:
+            self._record_ingest_write(ingest_job)
             self._start_completion_activity(ingest_job)
             log = bossLogger()
             log.info(f"Started completion step function for job: {ingest_job.id}")
@@ -569,6 +571,29 @@ class IngestManager:
 
         return completing_success
 
+    def _record_ingest_write(self, ingest_job):
+        """
+        Record the region uploaded by an ingest job as written, so its channel's tiles, validators and downsample
+        status are updated and a later downsample includes the region.
+
+        Args:
+            ingest_job: Ingest job model
+        """
+        if ingest_job.channel_id is None:
+            return
+        try:
+            channel = Channel.objects.get(id=ingest_job.channel_id)
+        except Channel.DoesNotExist:
+            return
+
+        region = None
+        if ingest_job.resolution == channel.base_resolution:
+            region = ((ingest_job.x_start, ingest_job.y_start, ingest_job.z_start),
+                      (ingest_job.x_stop - ingest_job.x_start,
+                       ingest_job.y_stop - ingest_job.y_start,
+                       ingest_job.z_stop - ingest_job.z_start))
+        record_write(channel.id, region)
+
     def _start_completion_activity(self, ingest_job):
         """
         Start the step function activity that checks a tile ingest job for
@@ -607,7 +632,7 @@ class IngestManager:
             'y_size': ingest_job.tile_size_y,
         }
 
-        session = bossutils.aws.get_session()
+        session = aws.get_session()
         scan_sfn = config['sfn']['complete_ingest_sfn']
         return bossutils.aws.sfn_execute(session, scan_sfn, args)
 
@@ -788,7 +813,7 @@ class IngestManager:
         Returns:
             (int): Number of seconds of the timeout.
         """
-        client = boto3.client('lambda', region_name=bossutils.aws.get_region())
+        client = aws.get_client('lambda', bossutils.aws.get_region())
         try:
             resp = client.get_function(FunctionName=name)
             return resp['Configuration']['Timeout']
@@ -817,7 +842,7 @@ class IngestManager:
         # AWS recommends that an SQS queue used as a lambda event source should
         # have a visibility timeout that's 6 times the lambda's timeout.
         queue.set_attributes(Attributes={'VisibilityTimeout': str(timeout * 6)})
-        client = boto3.client('lambda', region_name=bossutils.aws.get_region())
+        client = aws.get_client('lambda', bossutils.aws.get_region())
         try:
             client.create_event_source_mapping(
                 EventSourceArn=queue_arn,
@@ -836,7 +861,7 @@ class IngestManager:
             lambda_name (str): Lambda function name.
         """
         log = bossLogger()
-        client = boto3.client('lambda', region_name=bossutils.aws.get_region())
+        client = aws.get_client('lambda', bossutils.aws.get_region())
         try:
             resp = client.list_event_source_mappings(
                 EventSourceArn=queue_arn,
@@ -884,7 +909,7 @@ class IngestManager:
                 "Ingest job's ingest_type has invalid value: {}".format(
                     job.ingest_type), ErrorCodes.UNABLE_TO_VALIDATE)
 
-        session = bossutils.aws.get_session()
+        session = aws.get_session()
         populate_sfn = config['sfn']['populate_upload_queue']
         arn = bossutils.aws.sfn_execute(session, populate_sfn, args)
 
@@ -972,7 +997,7 @@ class IngestManager:
                  "lambda-name": "ingest"}
 
         # Invoke Ingest lambda functions
-        lambda_client = boto3.client('lambda', region_name=bossutils.aws.get_region())
+        lambda_client = aws.get_client('lambda', bossutils.aws.get_region())
         for _ in range(0, num_invokes):
             lambda_client.invoke(FunctionName=INGEST_LAMBDA,
                                  InvocationType='Event',
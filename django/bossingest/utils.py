@@ -1,4 +1,4 @@
-import boto3
+from boss import aws
 
 def get_sqs_num_msgs(url, region):
     """
@@ -11,6 +11,6 @@ def get_sqs_num_msgs(url, region):
     Returns:
         (int): Approximate number of messages in the queue.
     """
-    sqs = boto3.client('sqs', region)
+    sqs = aws.get_client('sqs', region)
     resp = sqs.get_queue_attributes(QueueUrl=url, AttributeNames=['ApproximateNumberOfMessages'])
     return int(resp['Attributes']['ApproximateNumberOfMessages'])
@@ -32,6 +32,7 @@ from bossingest.serializers import IngestJobListSerializer
 from bosscore.models import Collection, Experiment, Channel
 from bossingest.models import IngestJob
 from bossutils.logger import bossLogger
+from boss import aws, metrics
 from boss.throttling import BossThrottle
 from bosscore.models import ThrottleMetric
 
@@ -138,7 +139,7 @@ class IngestJobView(IngestServiceView):
 
             elif ingest_job.status == IngestJob.PREPARING:
                 # check status of the step function
-                session = bossutils.aws.get_session()
+                session = aws.get_session()
                 if bossutils.aws.sfn_status(session, ingest_job.step_function_arn) == 'SUCCEEDED':
                     # generate credentials
                     ingest_job.status = 1
@@ -237,28 +238,10 @@ class IngestJobView(IngestServiceView):
                 {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
             ]
 
-            session = bossutils.aws.get_session()
-            client = session.client('cloudwatch')
-
-            try:
-                client.put_metric_data(
-                    Namespace="BOSS/Ingest",
-                    MetricData=[{
-                        'MetricName': 'InvokeCount',
-                        'Dimensions': dimensions,
-                        'Value': 1.0,
-                        'Unit': 'Count'
-                    }, {
-                        'MetricName': 'IngressCost',
-                        'Dimensions': dimensions,
-                        'Value': cost,
-                        'Unit': 'Bytes'
-                    }]
-                )
-            except Exception as e:
-                log = bossLogger()
-                log.exception('Error during put_metric_data: {}'.format(e))
-                log.exception('Allowing bossDB to continue after logging')
+            metrics.emit("BOSS/Ingest", dimensions, [
+                ('InvokeCount', 1.0, 'Count'),
+                ('IngressCost', cost, 'Bytes'),
+            ])
 
         except BossError as err:
             return err.to_http()
@@ -0,0 +1,96 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Binary and streaming encodings of id lists.
+
+    application/octet-stream:  little endian uint64 number of ids, followed by the ids as little endian uint64
+    application/blosc:         the ids as little endian uint64, blosc compressed
+"""
+
+import struct
+
+import blosc
+import numpy as np
+from rest_framework import renderers
+
+from bosscore.renderer_helper import check_for_403, check_for_429
+
+COUNT = struct.Struct('<Q')
+
+# Number of ids formatted at a time by ids_json_stream()
+JSON_CHUNK = 65536
+
+
+def ids_to_array(ids):
+    """Convert a list of ids to a little endian uint64 array
+
+    Args:
+        ids (list|numpy.ndarray): Ids as ints or decimal strings
+
+    Returns:
+        (numpy.ndarray)
+    """
+    if isinstance(ids, np.ndarray):
+        return ids.astype('<u8', copy=False)
+    # Parsing an array of strings is done by NumPy in C
+    return np.array(ids).astype('<u8') if len(ids) > 0 else np.empty(0, dtype='<u8')
+
+
+def ids_json_stream(ids):
+    """Generator producing the JSON body of the ids service, a chunk of ids at a time
+
+    The ids are strings, as in the non-streaming response: {"ids": ["1", "2"]}
+
+    Args:
+        ids (list|numpy.ndarray): Ids as ints or decimal strings
+
+    Yields:
+        (bytes)
+    """
+    yield b'{"ids":['
+    for start in range(0, len(ids), JSON_CHUNK):
+        chunk = ','.join('"{}"'.format(i) for i in ids[start:start + JSON_CHUNK])
+        yield (',' + chunk if start > 0 else chunk).encode()
+    yield b']}'
+
+
+class IdsRawRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for a list of ids as a count followed by little endian uint64 ids
+    """
+    media_type = 'application/octet-stream'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        array = ids_to_array(data['ids'])
+        return COUNT.pack(array.size) + array.tobytes()
+
+
+class IdsBloscRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for a list of ids as blosc compressed little endian uint64 ids
+    """
+    media_type = 'application/blosc'
+    format = 'blosc'
+    charset = None
+    render_style = 'binary'
+
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        array = ids_to_array(data['ids'])
+        return blosc.compress(array.tobytes(), typesize=8, cname='zstd', clevel=1, shuffle=blosc.SHUFFLE)
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest.mock import patch
+
 from rest_framework.test import APITestCase
 from django.conf import settings
 from rest_framework.test import force_authenticate
@@ -20,7 +22,7 @@ from rest_framework.test import APIRequestFactory
 from bosscore.request import BossRequest
 from bosscore.error import BossError
 from bosscore.test.setup_db import SetupTestDB
-from bossobject.views import Reserve
+from bossobject.views import Reserve, BoundingBoxBatch
 
 version = settings.BOSS_VERSION
 
@@ -143,3 +145,64 @@ class BoundingBoxRequestTests(APITestCase):
             ret = BossRequest(drfrequest, request_args)
 
 
+class BoundingBoxBatchTests(APITestCase):
+    """
+    Class to test the batch bounding box service with a stubbed SpatialDB
+    """
+
+    def setUp(self):
+        """
+            Initialize the database
+            :return:
+        """
+        self.rf = APIRequestFactory()
+
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user()
+        dbsetup.set_user(self.user)
+        dbsetup.insert_spatialdb_test_data()
+
+    def post_ids(self, body, query=''):
+        url = '/' + version + '/boundingbox/batch/col1/exp1/layer1/0/' + query
+        request = self.rf.post(url, body, format='json')
+        force_authenticate(request, user=self.user)
+        return BoundingBoxBatch.as_view()(request, collection='col1', experiment='exp1', channel='layer1',
+                                          resolution='0')
+
+    @patch('bossobject.views.SpatialDB')
+    def test_bounding_boxes(self, fake_spdb):
+        """
+        Test that each unique id is looked up once and mapped to its bounding box, in the order of the request
+        :return:
+        """
+        boxes = {10: {'x_range': [0, 512], 'y_range': [0, 512], 'z_range': [0, 16], 't_range': [0, 1], 'id': 10},
+                 12: {'x_range': [512, 1024], 'y_range': [0, 512], 'z_range': [0, 16], 't_range': [0, 1], 'id': 12}}
+        get_bounding_box = fake_spdb.return_value.get_bounding_box
+        get_bounding_box.side_effect = lambda resource, resolution, obj_id, bb_type: boxes.get(obj_id)
+
+        response = self.post_ids({'ids': [12, '10', 12, 99]}, '?type=tight')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data.keys()), ['12', '10', '99'])
+        self.assertEqual(response.data['12'], boxes[12])
+        self.assertEqual(response.data['10'], boxes[10])
+        self.assertIsNone(response.data['99'])
+        self.assertEqual(sorted(call[0][2] for call in get_bounding_box.call_args_list), [10, 12, 99])
+        for call in get_bounding_box.call_args_list:
+            self.assertEqual(call[0][1], 0)
+            self.assertEqual(call[1], {'bb_type': 'tight'})
+
+    @patch('bossobject.views.SpatialDB')
+    def test_invalid_ids(self, fake_spdb):
+        """
+        Test that invalid id lists are rejected before SpatialDB is used
+        :return:
+        """
+        for body in ({}, {'ids': []}, {'ids': 10}, [10], {'ids': ['a']}, {'ids': [None]}):
+            self.assertEqual(self.post_ids(body).status_code, 400)
+
+        with self.settings(OBJECT_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self.post_ids({'ids': [1, 2, 3]}).status_code, 413)
+
+        self.assertEqual(self.post_ids({'ids': [1]}, '?type=exact').status_code, 400)
+        fake_spdb.assert_not_called()
@@ -0,0 +1,50 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from unittest.mock import patch
+
+import blosc
+import numpy as np
+from django.test import SimpleTestCase
+
+from bossobject import renderers
+from bossobject.renderers import IdsRawRenderer, IdsBloscRenderer, ids_json_stream, ids_to_array
+
+
+class TestIdsRenderers(SimpleTestCase):
+
+    def setUp(self):
+        self.ids = ['1', '5', str(2 ** 64 - 1)]
+
+    def test_ids_to_array(self):
+        array = ids_to_array(self.ids)
+        self.assertEqual(array.dtype, np.dtype('<u8'))
+        self.assertEqual(array.tolist(), [1, 5, 2 ** 64 - 1])
+        self.assertEqual(ids_to_array([]).size, 0)
+
+    def test_raw(self):
+        data = IdsRawRenderer().render({'ids': self.ids})
+        self.assertEqual(int.from_bytes(data[:8], 'little'), 3)
+        self.assertEqual(np.frombuffer(data[8:], dtype='<u8').tolist(), [1, 5, 2 ** 64 - 1])
+
+    def test_blosc(self):
+        data = IdsBloscRenderer().render({'ids': self.ids})
+        self.assertEqual(np.frombuffer(blosc.decompress(data), dtype='<u8').tolist(), [1, 5, 2 ** 64 - 1])
+
+    def test_json_stream(self):
+        with patch.object(renderers, 'JSON_CHUNK', 2):
+            body = b''.join(ids_json_stream(self.ids))
+        self.assertEqual(json.loads(body), {'ids': self.ids})
+        self.assertEqual(json.loads(b''.join(ids_json_stream([]))), {'ids': []})
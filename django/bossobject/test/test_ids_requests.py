@@ -20,7 +20,7 @@ from rest_framework.test import APIRequestFactory
 from bosscore.request import BossRequest
 from bosscore.error import BossError
 from bosscore.test.setup_db import SetupTestDB
-from bossobject.views import Reserve
+from bossobject.views import Reserve, IdsBatch
 
 version = settings.BOSS_VERSION
 
@@ -123,3 +123,43 @@ class ReserveIdRequestTests(APITestCase):
             ret = BossRequest(drfrequest, request_args)
 
 
+class IdsBatchRequestTests(APITestCase):
+    """
+    Class to test the validation of the regions of the batch ids service
+    """
+
+    def setUp(self):
+        """
+            Initialize the database
+            :return:
+        """
+        self.rf = APIRequestFactory()
+
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user()
+        dbsetup.set_user(self.user)
+        dbsetup.insert_spatialdb_test_data()
+
+    def post_regions(self, regions):
+        url = '/' + version + '/ids/batch/col1/exp1/layer1/'
+        request = self.rf.post(url, {'regions': regions}, format='json')
+        force_authenticate(request, user=self.user)
+        return IdsBatch.as_view()(request, collection='col1', experiment='exp1', channel='layer1')
+
+    def test_malformed_range(self):
+        """
+        Test that a region with a malformed range is a bad request, not a server error
+        :return:
+        """
+        for x_range in ('5', 5, '0:'):
+            response = self.post_regions([{'resolution': 0, 'x_range': x_range, 'y_range': '0:10', 'z_range': '0:2'}])
+            self.assertEqual(response.status_code, 400)
+
+    def test_malformed_range_after_first_region(self):
+        """
+        Test that every region is validated, not only the first one
+        :return:
+        """
+        response = self.post_regions([{'resolution': 0, 'x_range': '0:6', 'y_range': '0:10', 'z_range': '0:2'},
+                                      {'resolution': 0, 'x_range': '0:6', 'y_range': '10', 'z_range': '0:2'}])
+        self.assertEqual(response.status_code, 400)
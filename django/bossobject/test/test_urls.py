@@ -16,7 +16,7 @@ from rest_framework.test import APITestCase
 from django.urls import resolve
 from django.conf import settings
 
-from bossobject.views import Reserve, Ids, BoundingBox
+from bossobject.views import Reserve, Ids, BoundingBox, IdsBatch, BoundingBoxBatch
 
 version = version = settings.BOSS_VERSION
 
@@ -49,6 +49,16 @@ class IdsRoutingTests(APITestCase):
         match = resolve('/' + version + '/ids/col1/exp1/channel1/2/0:5/0:6/0:2/0:1')
         self.assertEqual(match.func.__name__, Ids.as_view().__name__)
 
+    def test_ids_batch_resolves(self):
+        """
+        Test that the batch ids url resolves
+
+        Returns: None
+
+        """
+        match = resolve('/' + version + '/ids/batch/col1/exp1/channel1')
+        self.assertEqual(match.func.__name__, IdsBatch.as_view().__name__)
+
 class BoundingBoxRoutingTests(APITestCase):
 
     def test_reserve_id_resolves(self):
@@ -60,3 +70,13 @@ class BoundingBoxRoutingTests(APITestCase):
         """
         match = resolve('/' + version + '/boundingbox/col1/exp1/channel1/0/10')
         self.assertEqual(match.func.__name__, BoundingBox.as_view().__name__)
+
+    def test_bounding_box_batch_resolves(self):
+        """
+        Test that the batch bounding box url resolves
+
+        Returns: None
+
+        """
+        match = resolve('/' + version + '/boundingbox/batch/col1/exp1/channel1/0')
+        self.assertEqual(match.func.__name__, BoundingBoxBatch.as_view().__name__)
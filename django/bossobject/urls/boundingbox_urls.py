@@ -18,6 +18,10 @@ from bossobject import views
 app_name = 'bossobject'
 urlpatterns = [
 
+    # Url to get the bounding boxes of many objects, listed in the body
+    url(r'^batch/(?P<collection>[\w_-]+)/(?P<experiment>[\w_-]+)/(?P<channel>[\w_-]+)/(?P<resolution>\d)/?$',
+        views.BoundingBoxBatch.as_view()),
+
     # Url to get the bouding box for an object
     url(r'(?P<collection>[\w_-]+)/(?P<experiment>[\w_-]+)/(?P<channel>[\w_-]+)/(?P<resolution>\d)/(?P<id>\d+)/?$',
         views.BoundingBox.as_view()),
@@ -22,6 +22,10 @@ urlpatterns = [
     url(r'^(?P<collection>[\w_-]+)/(?P<experiment>[\w_-]+)/(?P<channel>[\w_-]+)/(?P<resolution>\d)/(?P<x_range>\d+:\d+)/(?P<y_range>\d+:\d+)/(?P<z_range>\d+:\d+)/?(?P<t_range>\d+:\d+?)?/?$',
         views.Ids.as_view()),
 
+    # Url to get the ids in many regions with a collection, experiment, channel/annotation project
+    url(r'^batch/(?P<collection>[\w_-]+)/(?P<experiment>[\w_-]+)/(?P<channel>[\w_-]+)/?$',
+        views.IdsBatch.as_view()),
+
 
 
 ]
@@ -12,16 +12,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 
 from bosscore.request import BossRequest
 from bosscore.error import BossError, BossHTTPError, ErrorCodes
 
+from boss.renderers import BossJSONRenderer
+from bossspatialdb.batch import parse_regions
+from bossobject.renderers import IdsRawRenderer, IdsBloscRenderer, ids_json_stream
+
 from spdb.spatialdb.spatialdb import SpatialDB
 from spdb import project
 
 from django.conf import settings
+from django.http import StreamingHttpResponse
+
+
+def map_with_spdb(func, items, max_workers):
+    """
+    Call a function on each item concurrently, giving each worker thread its own interface to SPDB
+
+    Args:
+        func: Callable taking (spdb, item)
+        items: List of items
+        max_workers: Maximum number of concurrent calls
+
+    Returns:
+        List of results, in the order of items
+    """
+    local = threading.local()
+
+    def call(item):
+        if not hasattr(local, 'spdb'):
+            local.spdb = SpatialDB(settings.KVIO_SETTINGS, settings.STATEIO_CONFIG, settings.OBJECTIO_CONFIG)
+        return func(local.spdb, item)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(call, items))
 
 
 class Reserve(APIView):
@@ -78,7 +111,11 @@ class Ids(APIView):
     """
         View to get the ids of all the annotation objects in a spatial region
 
+        The ids are returned as JSON, as uint64 in application/octet-stream or as blosc compressed uint64 in
+        application/blosc.  See bossobject.renderers for the binary formats.
     """
+    renderer_classes = (BossJSONRenderer, IdsRawRenderer, IdsBloscRenderer, BrowsableAPIRenderer)
+
     def get(self, request, collection, experiment,channel, resolution, x_range, y_range, z_range, t_range=None):
         """
         Return a list of ids in the spatial region.
@@ -126,6 +163,10 @@ class Ids(APIView):
             # Reserve ids
             spdb = SpatialDB(settings.KVIO_SETTINGS, settings.STATEIO_CONFIG, settings.OBJECTIO_CONFIG)
             ids = spdb.get_ids_in_region(resource, int(resolution), corner, extent)
+            if (isinstance(request.accepted_renderer, BossJSONRenderer) and
+                    len(ids['ids']) >= settings.IDS_JSON_STREAM_MIN):
+                # Format large lists a chunk at a time instead of building the whole document
+                return StreamingHttpResponse(ids_json_stream(ids['ids']), content_type='application/json')
             return Response(ids, status=200)
         except (TypeError, ValueError) as e:
             return BossHTTPError("Type error in the ids view. {}".format(e), ErrorCodes.TYPE_ERROR)
@@ -191,3 +232,138 @@ class BoundingBox(APIView):
             return Response(data, status=200)
         except (TypeError, ValueError) as e:
             return BossHTTPError("Type error in the boundingbox view. {}".format(e), ErrorCodes.TYPE_ERROR)
+
+
+class IdsBatch(APIView):
+    """
+        View to get the ids of all the annotation objects in many spatial regions
+
+    """
+    parser_classes = (JSONParser,)
+
+    def post(self, request, collection, experiment, channel):
+        """
+        Return the list of ids in each spatial region.
+
+        The body is a JSON object with a list of regions in the format of the batch cutout service, e.g.
+        {"regions": [{"resolution": 0, "x_range": "0:512", "y_range": "0:512", "z_range": "0:16"}]}
+
+        Args:
+            request: DRF Request object
+            collection: Collection name specifying the collection you want
+            experiment: Experiment name specifying the experiment
+            channel: Channel_name
+        Returns:
+            JSON dict with the list of ids of each region, in the order of the regions
+        Raises:
+            BossHTTPError for an invalid request
+        """
+        # Reading ids with a POST so validate as a GET
+        try:
+            regions = parse_regions(request.data, settings.OBJECT_BATCH_MAX_ITEMS)
+            first = regions[0]
+            request_args = {
+                "service": "ids",
+                "method": "GET",
+                "collection_name": collection,
+                "experiment_name": experiment,
+                "channel_name": channel,
+                "resolution": first['resolution'],
+                "x_args": first['x_range'],
+                "y_args": first['y_range'],
+                "z_args": first['z_range'],
+                "time_args": first['t_range']
+            }
+            req = BossRequest(request, request_args)
+            reqs = [req] + [req.copy_for_region(r['resolution'], r['x_range'], r['y_range'], r['z_range'],
+                                                r['t_range'])
+                            for r in regions[1:]]
+        except BossError as err:
+            return err.to_http()
+
+        # create a resource
+        resource = project.BossResourceDjango(req)
+
+        def get_ids(spdb, region_req):
+            corner = (region_req.get_x_start(), region_req.get_y_start(), region_req.get_z_start())
+            extent = (region_req.get_x_span(), region_req.get_y_span(), region_req.get_z_span())
+            return spdb.get_ids_in_region(resource, region_req.get_resolution(), corner, extent)['ids']
+
+        try:
+            ids = map_with_spdb(get_ids, reqs, settings.OBJECT_BATCH_THREADS)
+            return Response({'ids': ids}, status=200)
+        except (TypeError, ValueError) as e:
+            return BossHTTPError("Type error in the ids view. {}".format(e), ErrorCodes.TYPE_ERROR)
+
+
+class BoundingBoxBatch(APIView):
+    """
+        View to get the bounding boxes of many annotation objects
+
+    """
+    parser_classes = (JSONParser,)
+
+    def post(self, request, collection, experiment, channel, resolution):
+        """
+        Return the bounding box containing each object
+
+        The body is a JSON object with the list of object ids, e.g. {"ids": [10, 11, 12]}
+
+        Args:
+            request: DRF Request object
+            collection: Collection name specifying the collection you want
+            experiment: Experiment name specifying the experiment
+            channel: Channel_name
+            resolution: Data resolution
+        Returns:
+            JSON dict mapping each id to its bounding box, or null if the id does not exist
+        Raises:
+            BossHTTPError for an invalid request
+        """
+        if 'type' in request.query_params:
+            bb_type = request.query_params['type']
+            if bb_type != 'loose' and bb_type != 'tight':
+                return BossHTTPError("Invalid option for bounding box type {}. The valid options are : loose or tight"
+                                     .format(bb_type), ErrorCodes.INVALID_ARGUMENT)
+        else:
+            bb_type = 'loose'
+
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or len(ids) == 0:
+            return BossHTTPError("Batch request body must be an object with a non-empty list of ids",
+                                 ErrorCodes.INVALID_POST_ARGUMENT)
+        if len(ids) > settings.OBJECT_BATCH_MAX_ITEMS:
+            return BossHTTPError("Batch request has {} ids, the maximum is {}"
+                                 .format(len(ids), settings.OBJECT_BATCH_MAX_ITEMS), ErrorCodes.REQUEST_TOO_LARGE)
+        try:
+            ids = [int(obj_id) for obj_id in ids]
+        except (TypeError, ValueError):
+            return BossHTTPError("The ids of the objects must be valid ints", ErrorCodes.TYPE_ERROR)
+
+        # Reading bounding boxes with a POST so validate as a GET
+        try:
+            request_args = {
+                "service": "boundingbox",
+                "method": "GET",
+                "collection_name": collection,
+                "experiment_name": experiment,
+                "channel_name": channel,
+                "resolution": resolution,
+                "id": ids[0]
+            }
+            req = BossRequest(request, request_args)
+        except BossError as err:
+            return err.to_http()
+
+        # create a resource
+        resource = project.BossResourceDjango(req)
+
+        def get_bounding_box(spdb, obj_id):
+            return spdb.get_bounding_box(resource, int(resolution), obj_id, bb_type=bb_type)
+
+        try:
+            unique_ids = list(dict.fromkeys(ids))
+            boxes = map_with_spdb(get_bounding_box, unique_ids, settings.OBJECT_BATCH_THREADS)
+            return Response({str(obj_id): box for obj_id, box in zip(unique_ids, boxes)}, status=200)
+        except (TypeError, ValueError) as e:
+            return BossHTTPError("Type error in the boundingbox view. {}".format(e), ErrorCodes.TYPE_ERROR)
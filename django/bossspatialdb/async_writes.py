@@ -0,0 +1,267 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Asynchronous cutout writes.
+
+A cutout POST with ?async=true stages the parsed volume as a .npy file in
+ASYNC_WRITE_DIR and is answered with 202 Accepted and a write job id as
+soon as the volume is staged.  The write is applied by a bounded pool of
+background threads of the same process, which reads the staged file back
+memory mapped.  The status of each job is kept in the shared Django cache
+for ASYNC_WRITE_STATUS_TTL seconds, so any web server can report it.
+
+Jobs are not persisted, a job that was queued or running when its process
+exited is lost.  Each process refreshes a heartbeat in the cache every
+ASYNC_WRITE_HEARTBEAT seconds and records its id in the status of its jobs,
+so a queued or running job whose process stopped sending heartbeats is
+reported as failed.  Volumes staged by lost jobs are removed by the next
+process that starts a write queue.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from bossutils.logger import bossLogger
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETE = 'complete'
+FAILED = 'failed'
+
+# Error of the queued or running jobs whose process exited
+LOST_ERROR = 'The write was lost because the server applying it stopped, post the data again'
+
+# Number of heartbeat intervals without a heartbeat after which a process is considered gone
+HEARTBEAT_MISSES = 3
+
+
+def _key(job_id):
+    return 'boss:write-job:{}'.format(job_id)
+
+
+def _worker_key(worker):
+    return 'boss:write-worker:{}'.format(worker)
+
+
+def _cache():
+    return caches[getattr(settings, 'ASYNC_WRITE_CACHE_ALIAS', 'default')]
+
+
+def get_status(job_id):
+    """Get the status of a write job
+
+    Queued or running jobs whose process stopped sending heartbeats are reported as failed.
+
+    Args:
+        job_id (str): Id of the job
+
+    Returns:
+        (dict|None): Status or None if the job does not exist or its status expired
+    """
+    job = _cache().get(_key(job_id))
+    if job is not None and job['status'] in (QUEUED, RUNNING) and not is_alive(job.get('worker')):
+        job = dict(job, status=FAILED, error=LOST_ERROR)
+    return job
+
+
+def is_alive(worker):
+    """Check if the process that queued a job is still sending heartbeats
+
+    Args:
+        worker (str|None): Id of the write queue of the process, from the job status
+
+    Returns:
+        (bool)
+    """
+    return worker is not None and _cache().get(_worker_key(worker)) is not None
+
+
+def set_status(job_id, status, **fields):
+    """Update the status of a write job
+
+    Args:
+        job_id (str): Id of the job
+        status (str): QUEUED, RUNNING, COMPLETE or FAILED
+        **fields: Fields to add to the status, e.g. error
+
+    Returns:
+        (dict): New status
+    """
+    job = _cache().get(_key(job_id)) or {'id': job_id}
+    job.update(fields)
+    job['status'] = status
+    job['updated'] = time.time()
+    _cache().set(_key(job_id), job, timeout=getattr(settings, 'ASYNC_WRITE_STATUS_TTL', 86400))
+    return job
+
+
+class WriteQueue(object):
+    """Applies staged writes with a pool of background threads
+
+    The pool and the heartbeat thread are recreated after a fork so uwsgi workers never share them.
+
+    Attributes:
+        stage_dir (str): Directory the volumes are staged in
+        max_workers (int): Number of background threads
+        max_pending (int): Maximum number of jobs queued or running in the process
+        heartbeat (float): Seconds between the heartbeats of the process
+        worker (str): Id of the queue in the current process, recorded in the status of its jobs
+    """
+
+    def __init__(self, stage_dir, max_workers, max_pending, heartbeat=30):
+        self.stage_dir = stage_dir
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self.lock = threading.Lock()
+        self.pid = None
+        self.worker = None
+        self.executor = None
+        self.pending = 0
+
+    def _get_executor(self):
+        # Called with the lock held
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.pending = 0
+            self.worker = uuid.uuid4().hex
+            self.beat()
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='boss-write')
+            threading.Thread(target=self._heartbeat_loop, args=(pid,), name='boss-write-heartbeat',
+                             daemon=True).start()
+        return self.executor
+
+    def beat(self):
+        """Record that the process is alive, for HEARTBEAT_MISSES heartbeat intervals"""
+        _cache().set(_worker_key(self.worker), time.time(), timeout=self.heartbeat * HEARTBEAT_MISSES)
+
+    def _heartbeat_loop(self, pid):
+        try:
+            self.remove_lost_volumes()
+        except Exception as e:
+            bossLogger().warning("Unable to remove the volumes of lost write jobs: {}".format(e))
+
+        while os.getpid() == pid:
+            time.sleep(self.heartbeat)
+            try:
+                self.beat()
+            except Exception as e:
+                bossLogger().warning("Unable to record the heartbeat of the write queue: {}".format(e))
+
+    def remove_lost_volumes(self):
+        """Remove the staged volumes of the jobs that were lost or whose status expired
+
+        Volumes younger than HEARTBEAT_MISSES heartbeat intervals are kept, their job may not be queued yet.
+        """
+        try:
+            names = os.listdir(self.stage_dir)
+        except FileNotFoundError:
+            return
+
+        min_mtime = time.time() - self.heartbeat * HEARTBEAT_MISSES
+        for name in names:
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.stage_dir, name)
+            try:
+                if os.stat(path).st_mtime > min_mtime:
+                    continue
+                job = get_status(name[:-len('.npy')])
+                if job is None or job['status'] not in (QUEUED, RUNNING):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def submit(self, user, resource_name, data, write):
+        """Stage a volume and queue its write
+
+        Args:
+            user (User): User that posted the data
+            resource_name (str): collection/experiment/channel, reported in the status
+            data (numpy.ndarray): Volume to write
+            write (callable): Called with the staged volume to apply the write
+
+        Returns:
+            (str|None): Job id or None if the queue is full and the write should be applied synchronously
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                return None
+            executor = self._get_executor()
+            worker = self.worker
+            self.pending += 1
+
+        try:
+            job_id = uuid.uuid4().hex
+            os.makedirs(self.stage_dir, exist_ok=True)
+            path = os.path.join(self.stage_dir, '{}.npy'.format(job_id))
+            np.save(path, data, allow_pickle=False)
+
+            set_status(job_id, QUEUED, user=user.username or 'public', resource=resource_name,
+                       worker=worker, created=time.time())
+            executor.submit(self._run, job_id, path, write)
+            return job_id
+        except Exception:
+            with self.lock:
+                self.pending -= 1
+            raise
+
+    def _run(self, job_id, path, write):
+        try:
+            set_status(job_id, RUNNING)
+            write(np.load(path, mmap_mode='r', allow_pickle=False))
+            set_status(job_id, COMPLETE)
+        except Exception as e:
+            bossLogger().exception("Write job {} failed: {}".format(job_id, e))
+            set_status(job_id, FAILED, error=str(e))
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            close_old_connections()
+            with self.lock:
+                self.pending -= 1
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Get the write queue configured by the ASYNC_WRITE_* settings
+
+    Returns:
+        (WriteQueue|None): None if asynchronous writes are disabled
+    """
+    global _queue
+    if getattr(settings, 'ASYNC_WRITE_THREADS', 0) <= 0:
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteQueue(settings.ASYNC_WRITE_DIR, settings.ASYNC_WRITE_THREADS,
+                                    getattr(settings, 'ASYNC_WRITE_MAX_PENDING', 16),
+                                    getattr(settings, 'ASYNC_WRITE_HEARTBEAT', 30))
+    return _queue
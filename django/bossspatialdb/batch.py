@@ -0,0 +1,191 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batch cutout support.
+
+Many regions of one channel are read concurrently by a bounded pool of
+threads and returned in a single application/blosc-batch response:
+
+    header:  8 byte magic (b'BOSSBTCH')
+             little endian uint32 number of regions
+    regions: in the order they were requested, each one
+             little endian uint32 index of the region in the request
+             4 byte numpy dtype string (e.g. b'<u8\\x00')
+             1 byte number of dimensions (N)
+             N little endian uint64 dimensions (C order)
+             little endian uint64 number of compressed bytes
+             blosc compressed buffer, as returned by application/blosc
+
+As with application/blosc, the time dimension is dropped from regions that
+did not request a time range.
+"""
+
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import blosc
+import numpy as np
+
+from bosscore.error import BossError, ErrorCodes
+from bossutils.logger import bossLogger
+
+BATCH_MAGIC = b'BOSSBTCH'
+BATCH_HEADER = struct.Struct('<8sI')
+REGION_HEADER = struct.Struct('<I4sB')
+COUNT = struct.Struct('<Q')
+
+# Format of a range, as accepted by the cutout service URLs
+RANGE_PATTERN = re.compile(r'\d+:\d+')
+
+
+def parse_regions(body, max_regions):
+    """Validate the JSON body of a batch request
+
+    Args:
+        body (dict): Parsed JSON body, {"regions": [{"resolution": 0, "x_range": "0:512", ...}, ...]}
+        max_regions (int): Maximum number of regions allowed
+
+    Returns:
+        (list[dict]): resolution, x_range, y_range, z_range and t_range (or None) of each region
+
+    Raises:
+        (BossError): If the body is malformed
+    """
+    if not isinstance(body, dict) or not isinstance(body.get('regions'), list) or len(body['regions']) == 0:
+        raise BossError("Batch request body must be an object with a non-empty list of regions",
+                        ErrorCodes.INVALID_POST_ARGUMENT)
+
+    regions = body['regions']
+    if len(regions) > max_regions:
+        raise BossError("Batch request has {} regions, the maximum is {}".format(len(regions), max_regions),
+                        ErrorCodes.REQUEST_TOO_LARGE)
+
+    parsed = []
+    for region in regions:
+        if not isinstance(region, dict):
+            raise BossError("Each region must be an object", ErrorCodes.INVALID_POST_ARGUMENT)
+        try:
+            parsed.append({
+                'resolution': int(region['resolution']),
+                'x_range': str(region['x_range']),
+                'y_range': str(region['y_range']),
+                'z_range': str(region['z_range']),
+                't_range': str(region['t_range']) if region.get('t_range') is not None else None,
+            })
+        except KeyError as e:
+            raise BossError("Region is missing {}".format(e), ErrorCodes.INVALID_POST_ARGUMENT)
+        except (TypeError, ValueError):
+            raise BossError("Invalid resolution in region {}".format(region), ErrorCodes.TYPE_ERROR)
+
+        for key in ('x_range', 'y_range', 'z_range', 't_range'):
+            value = parsed[-1][key]
+            if value is not None and RANGE_PATTERN.fullmatch(value) is None:
+                raise BossError("Invalid {} {} in region, expected <start>:<stop>".format(key, region[key]),
+                                ErrorCodes.INVALID_POST_ARGUMENT)
+    return parsed
+
+
+def read_regions(cache_factory, resource, reqs, max_workers, **cutout_args):
+    """Read regions concurrently, yielding them in request order
+
+    Each worker thread uses its own spatial database interface.
+
+    Args:
+        cache_factory (callable): Returns a new SpatialDB (or compatible) instance
+        resource (BossResourceDjango): Channel being read
+        reqs (list[BossRequest]): Validated request of each region
+        max_workers (int): Maximum number of concurrent reads
+        **cutout_args: Additional keyword arguments passed to cache.cutout()
+
+    Yields:
+        (numpy.ndarray): C contiguous data of each region
+    """
+    local = threading.local()
+
+    def read(req):
+        if not hasattr(local, 'cache'):
+            local.cache = cache_factory()
+        cube = local.cache.cutout(resource, (req.get_x_start(), req.get_y_start(), req.get_z_start()),
+                                  (req.get_x_span(), req.get_y_span(), req.get_z_span()), req.get_resolution(),
+                                  [req.get_time().start, req.get_time().stop], **cutout_args)
+        data = cube.data if req.time_request else np.squeeze(cube.data, axis=(0,))
+        return np.ascontiguousarray(data)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(reqs)))) as executor:
+        yield from executor.map(read, reqs)
+
+
+def batch_stream(arrays, count, **compress_args):
+    """Generator producing an application/blosc-batch body
+
+    Args:
+        arrays (iterable[numpy.ndarray]): Data of each region, in request order
+        count (int): Number of regions
+        **compress_args: Additional keyword arguments passed to blosc.compress()
+
+    Yields:
+        (bytes)
+    """
+    def frames():
+        yield BATCH_HEADER.pack(BATCH_MAGIC, count)
+        for index, data in enumerate(arrays):
+            compressed = blosc.compress(data, typesize=data.dtype.itemsize, **compress_args)
+            yield (REGION_HEADER.pack(index, data.dtype.str.encode(), data.ndim) +
+                   struct.pack('<{}Q'.format(data.ndim), *data.shape) +
+                   COUNT.pack(len(compressed)) + compressed)
+
+    try:
+        yield from frames()
+    except Exception as e:
+        log = bossLogger()
+        log.exception('Error while streaming batch cutout: {}'.format(e))
+        raise
+
+
+def read_batch_stream(buffer):
+    """Decode a complete application/blosc-batch body
+
+    Args:
+        buffer (bytes): Response body
+
+    Returns:
+        (list[numpy.ndarray]): Data of each region, in request order
+
+    Raises:
+        (ValueError): If the body is malformed or truncated
+    """
+    view = memoryview(buffer)
+    magic, count = BATCH_HEADER.unpack_from(view, 0)
+    if magic != BATCH_MAGIC:
+        raise ValueError("Not a blosc batch")
+    offset = BATCH_HEADER.size
+
+    arrays = [None] * count
+    for _ in range(count):
+        index, dtype_str, ndim = REGION_HEADER.unpack_from(view, offset)
+        offset += REGION_HEADER.size
+        shape = struct.unpack_from('<{}Q'.format(ndim), view, offset)
+        offset += 8 * ndim
+        nbytes, = COUNT.unpack_from(view, offset)
+        offset += COUNT.size
+        if offset + nbytes > len(view):
+            raise ValueError("Blosc batch is truncated")
+        data = blosc.decompress(bytes(view[offset:offset + nbytes]))
+        offset += nbytes
+        dtype = np.dtype(dtype_str.rstrip(b'\x00').decode())
+        arrays[index] = np.frombuffer(data, dtype=dtype).reshape(shape)
+    return arrays
@@ -0,0 +1,75 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for splitting a cutout region into cuboid aligned pieces so that large
+requests can be processed a few cuboids at a time.
+"""
+
+
+def aligned_ranges(start, stop, step):
+    """Split [start, stop) into consecutive ranges whose boundaries fall on multiples of step
+
+    The first and last range may be partial if start or stop are not aligned.
+
+    Args:
+        start (int): Inclusive start of the range
+        stop (int): Exclusive end of the range
+        step (int): Alignment, typically one dimension of CUBOIDSIZE[resolution]
+
+    Returns:
+        (list[(int, int)]): List of (start, stop) tuples covering [start, stop)
+    """
+    ranges = []
+    current = start
+    while current < stop:
+        boundary = (current // step + 1) * step
+        ranges.append((current, min(boundary, stop)))
+        current = boundary
+    return ranges
+
+
+def z_slabs(z_start, z_stop, cuboid_size, num_cuboids=1):
+    """Split a z range into cuboid aligned slabs
+
+    Args:
+        z_start (int): Inclusive start of the z range
+        z_stop (int): Exclusive end of the z range
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the requested resolution
+        num_cuboids (int): Number of cuboids deep each slab should be
+
+    Returns:
+        (list[(int, int)]): List of (z_start, z_stop) tuples
+    """
+    return aligned_ranges(z_start, z_stop, cuboid_size[2] * max(int(num_cuboids), 1))
+
+
+def partial_cuboids(corner, extent, cuboid_size):
+    """Count the cuboids a region only partially covers
+
+    Args:
+        corner ((int, int, int)): (x, y, z) corner of the region
+        extent ((int, int, int)): (x, y, z) extent of the region
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the region's resolution
+
+    Returns:
+        (int): 0 if the region is cuboid aligned
+    """
+    touched = 1
+    covered = 1
+    for axis in range(3):
+        start, stop, step = corner[axis], corner[axis] + extent[axis], cuboid_size[axis]
+        touched *= len(aligned_ranges(start, stop, step))
+        covered *= max(stop // step - -(-start // step), 0)
+    return touched - covered
@@ -0,0 +1,132 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Blosc compression options for cutout responses.
+
+The codec, compression level and shuffle filter come from the BLOSC_*
+settings and can be overridden per request with the blosc-codec,
+blosc-clevel and blosc-shuffle query parameters.  A value of 'auto' picks
+the option from the data type of the channel.  Without settings the options
+are blosc's defaults.
+"""
+
+import threading
+
+import blosc
+import numpy as np
+from django.conf import settings
+
+from bosscore.error import BossError, ErrorCodes
+
+CODECS = ('blosclz', 'lz4', 'lz4hc', 'zlib', 'zstd')
+
+SHUFFLES = {
+    'noshuffle': blosc.NOSHUFFLE,
+    'shuffle': blosc.SHUFFLE,
+    'bitshuffle': blosc.BITSHUFFLE,
+}
+
+AUTO = 'auto'
+
+# Defaults of blosc.compress() and blosc.pack_array()
+DEFAULT_CODEC = 'blosclz'
+DEFAULT_CLEVEL = 9
+DEFAULT_SHUFFLE = 'shuffle'
+
+_threads_lock = threading.Lock()
+_threads_set = False
+
+
+def auto_blosc_args(dtype):
+    """Get the compression options best suited to a data type
+
+    Image channels (uint8, uint16) hold noisy data where fast lz4 gives nearly
+    the ratio of the slower codecs.  Annotation channels (uint64) hold long runs
+    of the same id that zstd compresses much better, and byte shuffling groups
+    the mostly zero high bytes of the ids together.
+
+    Args:
+        dtype (numpy.dtype): Data type of the channel
+
+    Returns:
+        (dict): cname, clevel and shuffle arguments for blosc.compress()
+    """
+    dtype = np.dtype(dtype)
+    if dtype.itemsize >= 4:
+        return {'cname': 'zstd', 'clevel': 1, 'shuffle': blosc.SHUFFLE}
+    if dtype.itemsize > 1:
+        return {'cname': 'lz4', 'clevel': 5, 'shuffle': blosc.SHUFFLE}
+    # Shuffling single byte values has no effect
+    return {'cname': 'lz4', 'clevel': 5, 'shuffle': blosc.NOSHUFFLE}
+
+
+def get_blosc_args(query_params, dtype):
+    """Get the blosc.compress() options for a cutout request
+
+    Args:
+        query_params (QueryDict): Query parameters of the request
+        dtype (numpy.dtype): Data type of the channel
+
+    Returns:
+        (dict): cname, clevel and shuffle arguments for blosc.compress()
+
+    Raises:
+        (BossError): If a query parameter is invalid
+    """
+    auto = auto_blosc_args(dtype)
+    args = {}
+
+    codec = query_params.get('blosc-codec', getattr(settings, 'BLOSC_CODEC', DEFAULT_CODEC)).lower()
+    if codec == AUTO:
+        args['cname'] = auto['cname']
+    elif codec in CODECS and codec in blosc.compressor_list():
+        args['cname'] = codec
+    else:
+        raise BossError("Unsupported blosc-codec, possible values are {}".format(
+                        ', '.join((AUTO,) + tuple(c for c in CODECS if c in blosc.compressor_list()))),
+                        ErrorCodes.INVALID_CUTOUT_ARGS)
+
+    clevel = str(query_params.get('blosc-clevel', getattr(settings, 'BLOSC_CLEVEL', DEFAULT_CLEVEL))).lower()
+    if clevel == AUTO:
+        args['clevel'] = auto['clevel']
+    elif clevel.isdigit() and 0 <= int(clevel) <= 9:
+        args['clevel'] = int(clevel)
+    else:
+        raise BossError("Incorrect blosc-clevel, must be auto or 0 to 9", ErrorCodes.INVALID_CUTOUT_ARGS)
+
+    shuffle = query_params.get('blosc-shuffle', getattr(settings, 'BLOSC_SHUFFLE', DEFAULT_SHUFFLE)).lower()
+    if shuffle == AUTO:
+        args['shuffle'] = auto['shuffle']
+    elif shuffle in SHUFFLES:
+        args['shuffle'] = SHUFFLES[shuffle]
+    else:
+        raise BossError("Incorrect blosc-shuffle, possible values are {}".format(
+                        ', '.join((AUTO,) + tuple(SHUFFLES))), ErrorCodes.INVALID_CUTOUT_ARGS)
+
+    set_blosc_threads()
+    return args
+
+
+def set_blosc_threads():
+    """Set the number of threads blosc uses in this process from the BLOSC_NTHREADS setting"""
+    global _threads_set
+    if _threads_set:
+        return
+    with _threads_lock:
+        if not _threads_set:
+            nthreads = getattr(settings, 'BLOSC_NTHREADS', None)
+            if nthreads:
+                blosc.set_nthreads(nthreads)
+            _threads_set = True
@@ -14,14 +14,19 @@
 
 import boto3
 from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
 from django.http import HttpResponse
 import json
 
+from boss import metrics
+from bosscore import dirty_region
 from bosscore.error import BossError, BossHTTPError, BossParserError, ErrorCodes
 from bosscore.models import Channel
 import bossutils
-from bossutils.aws import get_account_id, get_region, get_session
+from bossutils.aws import get_account_id, get_region
+from boss.aws import get_session
 from bossutils.configuration import BossConfig
+from spdb.spatialdb.spatialdb import CUBOIDSIZE
 
 DOWNSAMPLE_CANNOT_BE_QUEUED_ERR_MSG = 'Downsample already queued or in progress'
 
@@ -45,12 +50,6 @@ def start(request, resource):
     elif chan_status == Channel.DownsampleStatus.DOWNSAMPLED and not request.user.is_staff:
         return BossHTTPError("Channel is already downsampled. Invalid Request.", ErrorCodes.INVALID_STATE)
 
-    if request.user.is_staff:
-        # DP HACK: allow admin users to override the coordinate frame
-        frame = request.data
-    else:
-        frame = {}
-
     boss_config = BossConfig()
     collection = resource.get_collection()
     experiment = resource.get_experiment()
@@ -58,6 +57,14 @@ def start(request, resource):
     lookup_key = resource.get_lookup_key()
     col_id, exp_id, ch_id = lookup_key.split("&")
 
+    if request.user.is_staff and request.data:
+        # DP HACK: allow admin users to override the coordinate frame
+        frame = request.data
+        write_generation = None
+    else:
+        # Only downsample the region written since the last downsample, if it is known
+        frame, write_generation = get_dirty_frame(int(ch_id), coord_frame, CUBOIDSIZE[int(channel.base_resolution)])
+
     def get_frame(idx):
         return int(frame.get(idx, getattr(coord_frame, idx)))
 
@@ -113,11 +120,11 @@ def start(request, resource):
     downsample_sqs = boss_config['aws']['downsample-queue']
 
     try:
-        enqueue_job(session, args, downsample_sqs)
+        enqueue_job(session, args, downsample_sqs, write_generation)
     except BossError as be:
         return BossHTTPError(be.message, be.error_code)
 
-    compute_usage_metrics(session, args, boss_config['system']['fqdn'],
+    compute_usage_metrics(args, boss_config['system']['fqdn'],
                           request.user.username or "public",
                           collection.name, experiment.name, channel.name)
 
@@ -133,22 +140,60 @@ def start(request, resource):
 
     return HttpResponse(status=201)
 
-def enqueue_job(session, args, downsample_sqs):
+def get_dirty_frame(channel_id, coord_frame, cuboid_size):
+    """Get the region of a channel to downsample
+
+    The dirty region of the channel, expanded to whole cuboids and clipped to the coordinate frame.
+
+    Args:
+        channel_id (int): Channel id
+        coord_frame (CoordinateFrame): Coordinate frame of the channel
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the channel's base resolution
+
+    Returns:
+        (dict, int): x, y and z start and stop of the region, {} to downsample the whole coordinate frame, and the
+            write generation of the channel the region was read at
+    """
+    channel = Channel.objects.get(id=channel_id)
+    region = dirty_region.get_region(channel)
+    if not region or channel.downsample_status.upper() != Channel.DownsampleStatus.NOT_DOWNSAMPLED:
+        # Unknown or empty, e.g. after a failed or cancelled downsample
+        return {}, channel.write_generation
+
+    frame = {}
+    for idx, axis in enumerate(dirty_region.AXES):
+        start_key, stop_key = '{}_start'.format(axis), '{}_stop'.format(axis)
+        size = cuboid_size[idx]
+        frame[start_key] = max(region[start_key] // size * size, getattr(coord_frame, start_key))
+        frame[stop_key] = min(-(-region[stop_key] // size) * size, getattr(coord_frame, stop_key))
+    return frame, channel.write_generation
+
+def enqueue_job(session, args, downsample_sqs, write_generation=None):
     """Enqueue downsample job
 
+    The dirty region of the channel is emptied by the same UPDATE that queues the job, unless the channel was written
+    after the region was read, in which case it is kept for the next downsample.
+
     Args:
         session (boto3.session):
         args (dict): Arguments passed to the downsample step function via SQS
         downsample_sqs (str): URL of SQS queue
+        write_generation (optional[int]): Write generation the job's region was read at, None to keep the dirty region
 
     Raises:
         (BossError): If failed to enqueue job.
     """
+    updates = {'downsample_status': Channel.DownsampleStatus.QUEUED}
+    if write_generation is not None:
+        unchanged = Q(write_generation=write_generation)
+        for field, empty in dirty_region.EMPTY_REGION.items():
+            updates[field] = Case(When(unchanged, then=Value(empty)), default=F(field))
+
     rows_updated = (Channel.objects
         .filter(id=args['channel_id'])
         .exclude(downsample_status=Channel.DownsampleStatus.IN_PROGRESS)
         .exclude(downsample_status=Channel.DownsampleStatus.QUEUED)
-        .update(downsample_status=Channel.DownsampleStatus.QUEUED)
+        .update(**updates)
         )
     if rows_updated == 0:
         raise BossError(DOWNSAMPLE_CANNOT_BE_QUEUED_ERR_MSG, ErrorCodes.BAD_REQUEST)
@@ -185,12 +230,10 @@ def check_for_running_sfn(session, arn):
     resp = client.list_executions(stateMachineArn=arn, statusFilter='RUNNING', maxResults=1)
     return 'executions' in resp and len(resp['executions']) > 0
 
-def compute_usage_metrics(session, args, fqdn, user,
-                          collection, experiment, channel):
+def compute_usage_metrics(args, fqdn, user, collection, experiment, channel):
     """Add metrics to cloudwatch
 
     Args:
-        session (boto3.session):
         args (dict): contains [x|y|z]_[start|stop] for computing extents
         fqdn (str): fully qualified domain name of the endpoint
         user (str): name of user invoking downsample
@@ -219,21 +262,10 @@ def compute_usage_metrics(session, args, fqdn, user,
         {'Name': 'stack', 'Value': fqdn},
     ]
 
-    client = session.client('cloudwatch')
-    client.put_metric_data(
-        Namespace = "BOSS/Downsample",
-        MetricData = [{
-            'MetricName': 'InvokeCount',
-            'Dimensions': dimensions,
-            'Value': 1.0,
-            'Unit': 'Count'
-        }, {
-            'MetricName': 'ComputeCost',
-            'Dimensions': dimensions,
-            'Value': cost,
-            'Unit': 'Count'
-        }]
-    )
+    metrics.emit("BOSS/Downsample", dimensions, [
+        ('InvokeCount', 1.0, 'Count'),
+        ('ComputeCost', cost, 'Count'),
+    ])
 
 def delete_queued_job(session, chan_id):
     """Removed the given job from the downsample queue
@@ -0,0 +1,100 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Zero filling ("blacking out") of a region of a channel.
+
+The region is described by its corner and extent and is written one cuboid
+aligned block at a time.  SpatialDB.write_cuboid(..., to_black=True) zeros
+the voxels where its mask is non-zero, so each block only needs a mask of
+its own size, which consecutive blocks of the same size share.  Peak memory
+is bounded by a block instead of the whole region.
+"""
+
+import numpy as np
+from spdb.spatialdb.spatialdb import CUBOIDSIZE
+
+from .chunking import aligned_ranges
+
+
+def count_cuboids(corner, extent, cuboid_size):
+    """Count the cuboids touched by a region
+
+    Args:
+        corner ((int, int, int)): (x, y, z) corner of the region
+        extent ((int, int, int)): (x, y, z) extent of the region
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the region's resolution
+
+    Returns:
+        (int)
+    """
+    count = 1
+    for axis in range(3):
+        count *= len(aligned_ranges(corner[axis], corner[axis] + extent[axis], cuboid_size[axis]))
+    return count
+
+
+def fill_blocks(corner, extent, cuboid_size, row_cuboids=1):
+    """Split a region into cuboid aligned blocks
+
+    Each block is one cuboid deep in z and y and up to row_cuboids cuboids wide in x.  Only blocks on the edges of the
+    region can be partial cuboids.
+
+    Args:
+        corner ((int, int, int)): (x, y, z) corner of the region
+        extent ((int, int, int)): (x, y, z) extent of the region
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the region's resolution
+        row_cuboids (int): Maximum number of cuboids in x in a block
+
+    Returns:
+        (list[((int, int, int), (int, int, int))]): (corner, extent) of each block, in z, y, x order
+    """
+    x_ranges = aligned_ranges(corner[0], corner[0] + extent[0], cuboid_size[0] * max(int(row_cuboids), 1))
+    y_ranges = aligned_ranges(corner[1], corner[1] + extent[1], cuboid_size[1])
+    z_ranges = aligned_ranges(corner[2], corner[2] + extent[2], cuboid_size[2])
+    return [((x_start, y_start, z_start), (x_stop - x_start, y_stop - y_start, z_stop - z_start))
+            for z_start, z_stop in z_ranges
+            for y_start, y_stop in y_ranges
+            for x_start, x_stop in x_ranges]
+
+
+def fill_region(cache, resource, corner, extent, resolution, time_range, dtype, iso=False, row_cuboids=1):
+    """Zero a region of a channel, a cuboid aligned block at a time
+
+    Args:
+        cache (SpatialDB): Interface used to write the data
+        resource (BossResourceDjango): Channel being written
+        corner ((int, int, int)): (x, y, z) corner of the region
+        extent ((int, int, int)): (x, y, z) extent of the region
+        resolution (int): Resolution level
+        time_range ([int, int]): [start, stop) time samples
+        dtype (numpy.dtype): Data type of the channel
+        iso (bool): Write the isotropic copy of the resolution
+        row_cuboids (int): Maximum number of cuboids in x written by one call to write_cuboid()
+
+    Returns:
+        (int): Number of calls to write_cuboid()
+    """
+    mask = None
+    writes = 0
+    for block_corner, block_extent in fill_blocks(corner, extent, CUBOIDSIZE[resolution], row_cuboids):
+        shape = (1, block_extent[2], block_extent[1], block_extent[0])
+        if mask is None or mask.shape != shape:
+            # Consecutive interior blocks have the same shape and reuse the mask
+            mask = np.ones(shape, dtype=dtype)
+
+        for t in range(time_range[0], time_range[1]):
+            cache.write_cuboid(resource, block_corner, resolution, mask, t, iso=iso, to_black=True)
+            writes += 1
+    return writes
@@ -0,0 +1,183 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+JPEG encoding of uint8 cutouts.
+
+A (z, y, x) cutout is returned either as one image with the z-slices laid
+out in a grid, or as one image per z-slice in a multipart/mixed response.
+
+    stack:  z-slices concatenated vertically, a (z * y, x) image
+    atlas:  z-slices in row major order in a grid of `columns` columns,
+            unused cells at the end of the last row are black
+
+A JPEG image can not be larger than MAX_JPEG_DIMENSION in either dimension,
+so deep stacks must use the atlas layout or the multipart response.  Slices
+of a multipart response are encoded concurrently, PIL releases the GIL while
+encoding.
+"""
+
+import io
+import math
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from bosscore.error import BossError, ErrorCodes
+
+# Largest width or height of a JPEG image
+MAX_JPEG_DIMENSION = 65535
+
+LAYOUTS = ('stack', 'atlas')
+
+
+def encode_image(image, quality=85):
+    """Encode a 2D uint8 matrix as a JPEG image
+
+    Args:
+        image (numpy.ndarray): (y, x) matrix
+        quality (int): JPEG quality, 1 to 95
+
+    Returns:
+        (bytes)
+    """
+    img_file = io.BytesIO()
+    Image.fromarray(image).save(img_file, "JPEG", quality=quality)
+    return img_file.getvalue()
+
+
+def atlas_columns(shape, columns=None):
+    """Get the number of columns of an atlas
+
+    Without an explicit number of columns the atlas is made as close to square
+    as possible.
+
+    Args:
+        shape (tuple): (z, y, x) shape of the cutout
+        columns (optional[int]): Requested number of columns
+
+    Returns:
+        (int): Number of columns, between 1 and z
+
+    Raises:
+        (BossError): If the atlas is larger than a JPEG image allows
+    """
+    z, y, x = shape
+    if columns is None:
+        columns = int(math.ceil(math.sqrt(z * y / x)))
+    columns = max(1, min(columns, z))
+    rows = int(math.ceil(z / columns))
+
+    if rows * y > MAX_JPEG_DIMENSION or columns * x > MAX_JPEG_DIMENSION:
+        raise BossError("A {}x{} JPEG atlas of the cutout is larger than {} pixels. Reduce the cutout or use the "
+                        "multipart/mixed JPEG response".format(rows * y, columns * x, MAX_JPEG_DIMENSION),
+                        ErrorCodes.REQUEST_TOO_LARGE)
+    return columns
+
+
+def build_atlas(volume, columns):
+    """Lay out the z-slices of a cutout in a grid
+
+    Args:
+        volume (numpy.ndarray): (z, y, x) uint8 matrix
+        columns (int): Number of columns of the grid
+
+    Returns:
+        (numpy.ndarray): (rows * y, columns * x) matrix
+    """
+    z, y, x = volume.shape
+    rows = int(math.ceil(z / columns))
+    atlas = np.zeros((rows * y, columns * x), dtype=volume.dtype)
+    for index in range(z):
+        row, col = divmod(index, columns)
+        atlas[row * y:(row + 1) * y, col * x:(col + 1) * x] = volume[index]
+    return atlas
+
+
+def encode_volume(volume, layout='stack', columns=None, quality=85):
+    """Encode a cutout as a single JPEG image
+
+    Args:
+        volume (numpy.ndarray): (z, y, x) uint8 matrix
+        layout (str): One of LAYOUTS
+        columns (optional[int]): Number of columns of an atlas
+        quality (int): JPEG quality, 1 to 95
+
+    Returns:
+        (bytes)
+
+    Raises:
+        (BossError): If the image is larger than a JPEG image allows
+    """
+    z, y, x = volume.shape
+    if layout == 'atlas':
+        image = build_atlas(volume, atlas_columns(volume.shape, columns))
+    else:
+        if z * y > MAX_JPEG_DIMENSION:
+            raise BossError("The stacked JPEG image of the cutout is {} pixels high, larger than {} pixels. Use "
+                            "jpeg-layout=atlas or the multipart/mixed JPEG response".format(z * y, MAX_JPEG_DIMENSION),
+                            ErrorCodes.REQUEST_TOO_LARGE)
+        # Stacking a C contiguous matrix is a view, not a copy
+        image = np.reshape(volume, (z * y, x), order="C")
+
+    return encode_image(image, quality)
+
+
+def encode_slices(volume, quality=85, max_workers=4):
+    """Encode each z-slice of a cutout as a JPEG image, concurrently
+
+    Args:
+        volume (numpy.ndarray): (z, y, x) uint8 matrix
+        quality (int): JPEG quality, 1 to 95
+        max_workers (int): Maximum number of slices encoded concurrently
+
+    Returns:
+        (list[bytes]): Image of each z-slice, in z order
+    """
+    if max_workers <= 1 or volume.shape[0] == 1:
+        return [encode_image(image, quality) for image in volume]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, volume.shape[0])) as executor:
+        return list(executor.map(lambda image: encode_image(image, quality), volume))
+
+
+def multipart_body(images, z_start=0, boundary=None):
+    """Build a multipart/mixed body with one image/jpeg part per z-slice
+
+    Each part has a Content-ID header of <z-N>, where N is the z index of the
+    slice in the channel.
+
+    Args:
+        images (list[bytes]): JPEG image of each z-slice
+        z_start (int): z index of the first slice
+        boundary (optional[str]): Multipart boundary, random if not given
+
+    Returns:
+        (tuple): (boundary, body bytes)
+    """
+    if boundary is None:
+        boundary = uuid.uuid4().hex
+    delimiter = '--{}\r\n'.format(boundary).encode()
+
+    parts = []
+    for index, image in enumerate(images):
+        parts.append(delimiter)
+        parts.append('Content-Type: image/jpeg\r\nContent-ID: <z-{}>\r\nContent-Length: {}\r\n\r\n'
+                     .format(z_start + index, len(image)).encode())
+        parts.append(image)
+        parts.append(b'\r\n')
+    parts.append('--{}--\r\n'.format(boundary).encode())
+    return boundary, b''.join(parts)
@@ -18,13 +18,105 @@ from django.conf import settings
 import blosc
 import numpy as np
 import zlib
-import io
 
 from bosscore.request import BossRequest
 from bosscore.error import BossParserError, BossError, ErrorCodes
 
 import spdb
 
+# Size of the compressed reads and decompressed writes used when inflating npygz data
+INFLATE_CHUNK_SIZE = 4 * 1048576
+
+
+def get_expected_shape(request_obj):
+    """Method to get the shape of the matrix a cutout POST should contain
+
+    Args:
+        request_obj (BossRequest): Validated cutout request
+
+    Returns:
+        (tuple[int]): (t, z, y, x) for time series requests, otherwise (z, y, x)
+    """
+    shape = (request_obj.get_z_span(), request_obj.get_y_span(), request_obj.get_x_span())
+    if request_obj.time_request:
+        shape = (len(request_obj.get_time()),) + shape
+    return shape
+
+
+def iter_inflate(stream, chunk_size=INFLATE_CHUNK_SIZE):
+    """Generator that incrementally decompresses a zlib stream
+
+    Neither the compressed input nor the decompressed output are ever held in memory in full, each yielded chunk
+    is at most chunk_size bytes.
+
+    Args:
+        stream (stream-like object): Stream of zlib compressed data
+        chunk_size (int): Maximum number of bytes read or yielded at a time
+
+    Yields:
+        (bytes): Decompressed data
+
+    Raises:
+        (EOFError): If the stream ended before the end of the compressed data
+        (zlib.error): If the data is not valid zlib data
+    """
+    decompressor = zlib.decompressobj()
+    pending = b''
+    while not decompressor.eof:
+        if not pending:
+            pending = stream.read(chunk_size)
+            if not pending:
+                break
+        chunk = decompressor.decompress(pending, chunk_size)
+        pending = decompressor.unconsumed_tail
+        if chunk:
+            yield chunk
+
+    if not decompressor.eof:
+        raise EOFError("Compressed data ended before the end-of-stream marker was reached")
+
+
+class ChunkReader:
+    """
+    File-like wrapper around a generator of byte chunks that allows reading exact sizes or reading directly into
+    a preallocated buffer.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = b''
+        self.offset = 0
+
+    def _next(self):
+        if self.offset >= len(self.buffer):
+            self.buffer = next(self.chunks, b'')
+            self.offset = 0
+        return len(self.buffer) - self.offset
+
+    def read(self, size):
+        """Read up to size bytes"""
+        parts = []
+        while size > 0 and self._next() > 0:
+            part = self.buffer[self.offset:self.offset + size]
+            self.offset += len(part)
+            size -= len(part)
+            parts.append(part)
+        return b''.join(parts)
+
+    def readinto(self, view):
+        """Fill the given memoryview, returning the number of bytes written"""
+        written = 0
+        while written < len(view) and self._next() > 0:
+            count = min(len(view) - written, len(self.buffer) - self.offset)
+            view[written:written + count] = self.buffer[self.offset:self.offset + count]
+            self.offset += count
+            written += count
+        return written
+
+    def at_end(self):
+        """Check if all data has been consumed"""
+        return self._next() == 0
+
 
 def is_too_large(request_obj, bit_depth):
     """Method to check if a request is too large to handle
@@ -123,10 +215,13 @@ class BloscParser(BaseParser, ConsumeReqMixin):
             return BossParserError("Cutout request is over 500MB when uncompressed. Reduce cutout dimensions.",
                                    ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Time series requests (even if single time point) get a 4D matrix, otherwise a 3D matrix
+        dtype = np.dtype(resource.get_numpy_data_type())
+        expected_shape = get_expected_shape(req)
+
         try:
-            # Decompress
-            raw_data = blosc.decompress(stream.read())
-            data_mat = np.fromstring(raw_data, dtype=resource.get_numpy_data_type())
+            compressed = stream.read()
+            num_bytes, _, _ = blosc.get_cbuffer_sizes(compressed)
         except MemoryError:
             return BossParserError("Ran out of memory decompressing data.",
                                     ErrorCodes.BOSS_SYSTEM_ERROR)
@@ -134,23 +229,25 @@ class BloscParser(BaseParser, ConsumeReqMixin):
             return BossParserError("Failed to decompress data. Verify the datatype/bitdepth of your data "
                                    "matches the channel.", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
-        # Reshape and return
-        try:
-            if req.time_request:
-                # Time series request (even if single time point) - Get 4D matrix
-                parsed_data = np.reshape(data_mat,
-                                         (len(req.get_time()),
-                                          req.get_z_span(),
-                                          req.get_y_span(),
-                                          req.get_x_span()),
-                                         order='C')
-            else:
-                # Not a time series request (time range [0,1] auto-populated) - Get 3D matrix
-                parsed_data = np.reshape(data_mat, (req.get_z_span(), req.get_y_span(), req.get_x_span()), order='C')
-        except ValueError:
+        # Verify the size of the decompressed data before allocating anything
+        if num_bytes % dtype.itemsize != 0:
+            return BossParserError("Failed to decompress data. Verify the datatype/bitdepth of your data "
+                                   "matches the channel.", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
+        if num_bytes != int(np.prod(expected_shape)) * dtype.itemsize:
             return BossParserError("Failed to unpack data. Verify the datatype of your POSTed data and "
                                    "xyz dimensions used in the POST URL.", ErrorCodes.DATA_DIMENSION_MISMATCH)
 
+        # Decompress directly into the final, C-ordered matrix
+        try:
+            parsed_data = np.empty(expected_shape, dtype=dtype)
+            blosc.decompress_ptr(compressed, parsed_data.__array_interface__['data'][0])
+        except MemoryError:
+            return BossParserError("Ran out of memory decompressing data.",
+                                    ErrorCodes.BOSS_SYSTEM_ERROR)
+        except:
+            return BossParserError("Failed to decompress data. Verify the datatype/bitdepth of your data "
+                                   "matches the channel.", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
+
         return req, resource, parsed_data
 
 
@@ -281,18 +378,114 @@ class NpygzParser(BaseParser, ConsumeReqMixin):
             return BossParserError("Cutout request is over 500MB when uncompressed. Reduce cutout dimensions.",
                                    ErrorCodes.REQUEST_TOO_LARGE)
 
-        # Decompress and return
+        # Decompress incrementally, reading the npy header first so the matrix can be allocated once and filled
+        # directly from the zlib stream
         try:
-            data_bytes = zlib.decompress(stream.read())
-
-            # Open
-            data_obj = io.BytesIO(data_bytes)
-            parsed_data = np.load(data_obj)
+            reader = ChunkReader(iter_inflate(stream))
+            version = np.lib.format.read_magic(reader)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(reader)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(reader)
+
+            if dtype != np.dtype(resource.get_numpy_data_type()):
+                self.consume_request(stream)
+                return BossParserError("Datatype does not match channel", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
+            if int(np.prod(shape)) != int(np.prod(get_expected_shape(req))):
+                self.consume_request(stream)
+                return BossParserError("Failed to unpack data. Verify the datatype of your POSTed data and "
+                                       "xyz dimensions used in the POST URL.", ErrorCodes.DATA_DIMENSION_MISMATCH)
+
+            if fortran_order:
+                parsed_data = np.empty(shape[::-1], dtype=dtype).T
+                buffer = memoryview(parsed_data.T).cast('B')
+            else:
+                parsed_data = np.empty(shape, dtype=dtype)
+                buffer = memoryview(parsed_data).cast('B')
+
+            if reader.readinto(buffer) != len(buffer):
+                raise EOFError("npy data ended early")
+            if not reader.at_end():
+                self.consume_request(stream)
+                return BossParserError("Failed to unpack data. Verify the datatype of your POSTed data and "
+                                       "xyz dimensions used in the POST URL.", ErrorCodes.DATA_DIMENSION_MISMATCH)
         except MemoryError:
             return BossParserError("Ran out of memory decompressing data.",
                                     ErrorCodes.BOSS_SYSTEM_ERROR)
-        except EOFError:
+        except (EOFError, ValueError):
+            self.consume_request(stream)
             return BossParserError("Failed to unpack data. Verify the datatype of your POSTed data and "
                                    "xyz dimensions used in the POST URL.", ErrorCodes.DATA_DIMENSION_MISMATCH)
+        except zlib.error:
+            self.consume_request(stream)
+            return BossParserError("Failed to decompress data. Verify the datatype/bitdepth of your data "
+                                   "matches the channel.", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
         return req, resource, parsed_data
+
+
+def _filter_ids_size_error(nbytes):
+    """Check the size of a POSTed filter id list before reading it
+
+    Returns:
+        (BossParserError|None)
+    """
+    max_ids = getattr(settings, 'CUTOUT_FILTER_MAX_IDS', None)
+    if max_ids is not None and nbytes > max_ids * 8:
+        return BossParserError("Filter id list is larger than {} ids".format(max_ids), ErrorCodes.REQUEST_TOO_LARGE)
+    return None
+
+
+class FilterIdsRawParser(BaseParser, ConsumeReqMixin):
+    """
+    Parser for the ids a cutout is filtered by, as little endian uint64
+    """
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Method to read the little endian uint64 filter ids POSTed to the filtered cutout service
+
+        :param stream: Request stream
+        :param media_type:
+        :param parser_context:
+        :return: numpy.ndarray of uint64 ids or BossParserError
+        """
+        data = stream.read() if stream is not None else b''
+        err = _filter_ids_size_error(len(data))
+        if err is not None:
+            return err
+        if len(data) % 8 != 0:
+            return BossParserError("Filter ids must be little endian uint64 values", ErrorCodes.INVALID_POST_ARGUMENT)
+        return np.frombuffer(data, dtype='<u8')
+
+
+class FilterIdsBloscParser(BaseParser, ConsumeReqMixin):
+    """
+    Parser for the ids a cutout is filtered by, as blosc compressed little endian uint64
+    """
+    media_type = 'application/blosc'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Method to decompress the filter ids POSTed to the filtered cutout service
+
+        :param stream: Request stream
+        :param media_type:
+        :param parser_context:
+        :return: numpy.ndarray of uint64 ids or BossParserError
+        """
+        data = stream.read() if stream is not None else b''
+        try:
+            nbytes, _, _ = blosc.get_cbuffer_sizes(data)
+        except Exception:
+            return BossParserError("Failed to decompress filter ids", ErrorCodes.INVALID_POST_ARGUMENT)
+        err = _filter_ids_size_error(nbytes)
+        if err is not None:
+            return err
+
+        try:
+            data = blosc.decompress(data)
+        except Exception:
+            return BossParserError("Failed to decompress filter ids", ErrorCodes.INVALID_POST_ARGUMENT)
+        if len(data) % 8 != 0:
+            return BossParserError("Filter ids must be little endian uint64 values", ErrorCodes.INVALID_POST_ARGUMENT)
+        return np.frombuffer(data, dtype='<u8')
@@ -18,9 +18,13 @@ import blosc
 import numpy as np
 import zlib
 import io
-from PIL import Image
+from django.conf import settings
 
+from bosscore.error import BossError, ErrorCodes
 from bosscore.renderer_helper import check_for_403, check_for_429
+from . import jpeg
+from .streaming import blosc_stream, npygz_stream
+from .batch import batch_stream
 
 class BloscPythonRenderer(renderers.BaseRenderer):
     """ A DRF renderer for a blosc encoded cube of data using the numpy interface
@@ -39,11 +43,13 @@ class BloscPythonRenderer(renderers.BaseRenderer):
         if not data["data"].data.flags['C_CONTIGUOUS']:
             data["data"].data = np.ascontiguousarray(data["data"].data, dtype=data["data"].data.dtype)
 
+        blosc_args = data.get("blosc_args", {})
+
         # Return data, squeezing time dimension if only a single point
         if data["time_request"]:
-            return blosc.pack_array(data["data"].data)
+            return blosc.pack_array(data["data"].data, **blosc_args)
         else:
-            return blosc.pack_array(np.squeeze(data["data"].data, axis=(0,)))
+            return blosc.pack_array(np.squeeze(data["data"].data, axis=(0,)), **blosc_args)
 
 
 class BloscRenderer(renderers.BaseRenderer):
@@ -71,12 +77,14 @@ class BloscRenderer(renderers.BaseRenderer):
         if not data["data"].data.flags['C_CONTIGUOUS']:
             data["data"].data = np.ascontiguousarray(data["data"].data, dtype=data["data"].data.dtype)
 
+        blosc_args = data.get("blosc_args", {})
+        typesize = data["data"].data.dtype.itemsize
+
         # Return data, squeezing time dimension if only a single point
         if data["time_request"]:
-            return blosc.compress(data["data"].data, typesize=renderer_context['view'].bit_depth)
+            return blosc.compress(data["data"].data, typesize=typesize, **blosc_args)
         else:
-            return blosc.compress(np.squeeze(data["data"].data, axis=(0,)),
-                                  typesize=renderer_context['view'].bit_depth)
+            return blosc.compress(np.squeeze(data["data"].data, axis=(0,)), typesize=typesize, **blosc_args)
 
 
 class NpygzRenderer(renderers.BaseRenderer):
@@ -113,56 +121,153 @@ class NpygzRenderer(renderers.BaseRenderer):
         return npy_gz_file.read()
 
 
-class JpegRenderer(renderers.BaseRenderer):
-    """ A DRF renderer for a jpeg 'sprite sheet' encoded cube of data. Here, we concat z-slices
+class BloscStreamRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for a framed, multi-chunk blosc stream of a cube of data
 
+    The Cutout view emits this format with a StreamingHttpResponse, compressing the volume one cuboid aligned slab
+    at a time.  See bossspatialdb.streaming for the wire format.
     """
-    media_type = 'image/jpeg'
-    format = 'jpg'
+    media_type = 'application/blosc-stream'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+    streaming = True
+
+    def stream(self, slabs, shape, dtype, blosc_args=None):
+        return blosc_stream(slabs, shape, dtype, **(blosc_args or {}))
+
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        return b''.join(data)
+
+
+class NpygzStreamRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for a streamed, gzip compressed npy encoded cube of data
+
+    The body is byte compatible with application/npygz, but is compressed incrementally as the cutout is read.
+    """
+    media_type = 'application/npygz-stream'
+    format = 'bin'
     charset = None
     render_style = 'binary'
+    streaming = True
+
+    def stream(self, slabs, shape, dtype, blosc_args=None):
+        return npygz_stream(slabs, shape, dtype)
 
     @check_for_403
     @check_for_429
     def render(self, data, media_type=None, renderer_context=None):
+        return b''.join(data)
+
+
+class BloscBatchRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for many blosc encoded cubes of data returned by the batch cutout service
 
+    The CutoutBatch view emits this format with a StreamingHttpResponse.  See bossspatialdb.batch for the wire format.
+    """
+    media_type = 'application/blosc-batch'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+    streaming = True
+
+    def stream(self, arrays, count, blosc_args=None):
+        return batch_stream(arrays, count, **(blosc_args or {}))
+
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        return b''.join(data)
+
+
+class JpegRenderer(renderers.BaseRenderer):
+    """ A DRF renderer for a jpeg 'sprite sheet' encoded cube of data. Here, we concat z-slices
+
+    The jpeg-layout query parameter selects how the z-slices are laid out, 'stack' (default) concatenates them
+    vertically and 'atlas' places them in a grid of jpeg-columns columns (near square by default).  See
+    bossspatialdb.jpeg for details.
+    """
+    media_type = 'image/jpeg'
+    format = 'jpg'
+    charset = None
+    render_style = 'binary'
+
+    def error(self, renderer_context, status, message, code):
+        """Render a JSON error instead of an image"""
+        renderer_context["response"].status_code = status
+        renderer_context['response']['Content-Type'] = 'application/json'
+        renderer_context["accepted_media_type"] = 'application/json'
+        self.media_type = 'application/json'
+        self.format = 'json'
+        err_msg = {"status": status, "message": message, "code": code}
+        jr = JSONRenderer()
+        return jr.render(err_msg, 'application/json', renderer_context)
+
+    def get_volume(self, data, renderer_context):
+        """Get the 3D uint8 matrix to encode
+
+        Returns:
+            (tuple): (matrix, None) or (None, rendered JSON error)
+        """
         # Return data, squeezing time dimension as this only works with 3D data
-        if not data["time_request"]:
-            self.render_style = 'binary'
-            data["data"].data = np.squeeze(data["data"].data, axis=(0,))
-        else:
+        if data["time_request"]:
             # This appears to contain time data. Error out
-            renderer_context["response"].status_code = 400
-            renderer_context['response']['Content-Type'] = 'application/json'
-            renderer_context["accepted_media_type"] = 'application/json'
-            self.media_type = 'application/json'
-            self.format = 'json'
-            err_msg = {"status": 400, "message": "The cutout service JPEG interface does not support 4D cutouts",
-                       "code": 2005}
-            jr = JSONRenderer()
-            return jr.render(err_msg, 'application/json', renderer_context)
+            return None, self.error(renderer_context, 400,
+                                    "The cutout service JPEG interface does not support 4D cutouts", 2005)
 
         if renderer_context['view'].bit_depth != 8:
             # This renderer only works on uint8 data
-            renderer_context["response"].status_code = 400
-            renderer_context['response']['Content-Type'] = 'application/json'
-            renderer_context["accepted_media_type"] = 'application/json'
-            self.media_type = 'application/json'
-            self.format = 'json'
-            err_msg = {"status": 400, "message": "The cutout service JPEG interface only supports uint8 image data",
-                       "code": 2001}
-            jr = JSONRenderer()
-            return jr.render(err_msg, 'application/json', renderer_context)
+            return None, self.error(renderer_context, 400,
+                                    "The cutout service JPEG interface only supports uint8 image data", 2001)
 
-        # Reshape matrix
-        d_shape = data["data"].data.shape
-        data["data"].data = np.reshape(data["data"].data, (d_shape[0] * d_shape[1], d_shape[2]), order="C")
+        return np.ascontiguousarray(np.squeeze(data["data"].data, axis=(0,))), None
 
-        # Save to Image
-        jpeg_image = Image.fromarray(data["data"].data)
-        img_file = io.BytesIO()
-        jpeg_image.save(img_file, "JPEG", quality=85)
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        volume, err = self.get_volume(data, renderer_context)
+        if err is not None:
+            return err
+
+        query_params = renderer_context['request'].query_params
+        layout = query_params.get('jpeg-layout', 'stack').lower()
+        if layout not in jpeg.LAYOUTS:
+            return self.error(renderer_context, 400, "Unsupported jpeg-layout, possible values are {}"
+                              .format(', '.join(jpeg.LAYOUTS)), ErrorCodes.INVALID_ARGUMENT)
+        columns = query_params.get('jpeg-columns')
+        if columns is not None:
+            if not columns.isdigit() or int(columns) == 0:
+                return self.error(renderer_context, 400, "Incorrect jpeg-columns, must be a positive integer",
+                                  ErrorCodes.INVALID_ARGUMENT)
+            columns = int(columns)
+
+        try:
+            return jpeg.encode_volume(volume, layout, columns)
+        except BossError as err:
+            return self.error(renderer_context, 413, err.message, err.error_code)
+
+
+class MultipartJpegRenderer(JpegRenderer):
+    """ A DRF renderer for a cube of data with each z-slice encoded as its own jpeg, in a multipart/mixed body
+
+    The slices are encoded concurrently.  See bossspatialdb.jpeg.multipart_body() for the format of the parts.
+    """
+    media_type = 'multipart/mixed'
+    format = 'jpgs'
+    charset = None
+    render_style = 'binary'
 
-        # Send file
-        img_file.seek(0)
-        return img_file.read()
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        volume, err = self.get_volume(data, renderer_context)
+        if err is not None:
+            return err
+
+        images = jpeg.encode_slices(volume, max_workers=getattr(settings, 'JPEG_ENCODE_THREADS', 4))
+        z_start = int(renderer_context['kwargs']['z_range'].split(':')[0])
+        boundary, body = jpeg.multipart_body(images, z_start)
+        renderer_context['response']['Content-Type'] = 'multipart/mixed; boundary={}'.format(boundary)
+        return body
@@ -0,0 +1,195 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming cutout support.
+
+Instead of assembling the whole cutout in memory and compressing it in one
+call, the volume is read one cuboid aligned z-slab at a time and each slab is
+compressed and sent to the client before the next one is read.  Peak memory
+per request is bounded by the size of a slab instead of the full cutout.
+
+Two wire formats are supported:
+
+    application/blosc-stream
+        A framed, multi-chunk blosc format:
+
+            header: 8 byte magic (b'BOSSBLSC')
+                    4 byte numpy dtype string (e.g. b'<u8\\x00')
+                    1 byte number of dimensions (N)
+                    N little endian uint64 dimensions (C order)
+            frames: little endian uint64 number of compressed bytes, followed
+                    by a blosc compressed buffer
+            end:    a frame length of 0
+
+        Concatenating the decompressed frames gives the C ordered array.  A
+        missing end marker indicates that the stream was truncated.
+
+    application/npygz-stream
+        A single zlib stream of a npy file, byte compatible with the existing
+        application/npygz format so existing clients can decode it unchanged.
+"""
+
+import io
+import struct
+import zlib
+
+import blosc
+import numpy as np
+
+from bossutils.logger import bossLogger
+from spdb.spatialdb.spatialdb import CUBOIDSIZE
+
+from .chunking import z_slabs
+
+BLOSC_STREAM_MAGIC = b'BOSSBLSC'
+FRAME_LENGTH = struct.Struct('<Q')
+
+
+def iter_cutout_slabs(cache, resource, corner, extent, resolution, time_range, slab_cuboids=1, **cutout_args):
+    """Generator that reads a cutout one cuboid aligned z-slab at a time
+
+    Slabs are produced in C order of the full (t, z, y, x) volume so the caller
+    can emit them back to back.
+
+    Args:
+        cache (SpatialDB|CloudVolumeDB): Interface used to read the data
+        resource (BossResourceDjango): Channel being read
+        corner ((int, int, int)): (x, y, z) corner of the cutout
+        extent ((int, int, int)): (x, y, z) extent of the cutout
+        resolution (int): Resolution level
+        time_range ([int, int]): [start, stop) time samples
+        slab_cuboids (int): Number of cuboids deep each slab should be
+        **cutout_args: Additional keyword arguments passed to cache.cutout()
+
+    Yields:
+        (numpy.ndarray): C contiguous (z, y, x) array for one slab of one time sample
+    """
+    for t in range(time_range[0], time_range[1]):
+        for z_start, z_stop in z_slabs(corner[2], corner[2] + extent[2], CUBOIDSIZE[resolution], slab_cuboids):
+            cube = cache.cutout(resource, (corner[0], corner[1], z_start), (extent[0], extent[1], z_stop - z_start),
+                                resolution, [t, t + 1], **cutout_args)
+            yield np.ascontiguousarray(cube.data[0])
+
+
+def _log_stream_errors(chunks):
+    """Log errors raised while a response is being streamed
+
+    Once streaming has started the status code has already been sent, so the
+    only option is to log and abort the connection.
+
+    Args:
+        chunks (generator): Generator producing the response body
+
+    Yields:
+        (bytes)
+    """
+    try:
+        yield from chunks
+    except Exception as e:
+        log = bossLogger()
+        log.exception('Error while streaming cutout: {}'.format(e))
+        raise
+
+
+def blosc_stream(slabs, shape, dtype, **compress_args):
+    """Generator producing an application/blosc-stream body
+
+    Args:
+        slabs (iterable[numpy.ndarray]): Slabs in C order of the full volume
+        shape (tuple[int]): Shape of the full volume
+        dtype (numpy.dtype): Data type of the volume
+        **compress_args: Additional keyword arguments passed to blosc.compress()
+
+    Yields:
+        (bytes)
+    """
+    def frames():
+        dt = np.dtype(dtype)
+        yield struct.pack('<8s4sB', BLOSC_STREAM_MAGIC, dt.str.encode(), len(shape))
+        yield struct.pack('<{}Q'.format(len(shape)), *shape)
+        for slab in slabs:
+            compressed = blosc.compress(slab, typesize=dt.itemsize, **compress_args)
+            yield FRAME_LENGTH.pack(len(compressed)) + compressed
+        yield FRAME_LENGTH.pack(0)
+
+    return _log_stream_errors(frames())
+
+
+def read_blosc_stream(buffer):
+    """Decode a complete application/blosc-stream body
+
+    Args:
+        buffer (bytes): Stream body
+
+    Returns:
+        (numpy.ndarray)
+
+    Raises:
+        (ValueError): If the stream is malformed or truncated
+    """
+    view = memoryview(buffer)
+    magic, dtype_str, ndim = struct.unpack_from('<8s4sB', view, 0)
+    if magic != BLOSC_STREAM_MAGIC:
+        raise ValueError("Not a blosc stream")
+    offset = struct.calcsize('<8s4sB')
+    shape = struct.unpack_from('<{}Q'.format(ndim), view, offset)
+    offset += 8 * ndim
+
+    data = np.empty(shape, dtype=np.dtype(dtype_str.rstrip(b'\x00').decode()))
+    flat = data.reshape(-1).view(np.uint8)
+    position = 0
+    while True:
+        if offset + FRAME_LENGTH.size > len(view):
+            raise ValueError("Blosc stream truncated")
+        (length,) = FRAME_LENGTH.unpack_from(view, offset)
+        offset += FRAME_LENGTH.size
+        if length == 0:
+            break
+        raw = blosc.decompress(bytes(view[offset:offset + length]))
+        flat[position:position + len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+        position += len(raw)
+        offset += length
+
+    if position != flat.size:
+        raise ValueError("Blosc stream size does not match the header")
+    return data
+
+
+def npygz_stream(slabs, shape, dtype, level=zlib.Z_DEFAULT_COMPRESSION):
+    """Generator producing a zlib compressed npy file incrementally
+
+    Args:
+        slabs (iterable[numpy.ndarray]): Slabs in C order of the full volume
+        shape (tuple[int]): Shape of the full volume
+        dtype (numpy.dtype): Data type of the volume
+        level (int): zlib compression level
+
+    Yields:
+        (bytes)
+    """
+    def chunks():
+        compressor = zlib.compressobj(level)
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                      'fortran_order': False,
+                                                      'shape': tuple(shape)})
+        yield compressor.compress(header.getvalue())
+        for slab in slabs:
+            chunk = compressor.compress(slab)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    return _log_stream_errors(chunks())
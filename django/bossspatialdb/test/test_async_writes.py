@@ -0,0 +1,115 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+
+from bossspatialdb import async_writes
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-writes'}}
+
+
+@override_settings(CACHES=CACHES)
+class TestAsyncWrites(SimpleTestCase):
+
+    def setUp(self):
+        self.stage_dir = tempfile.mkdtemp()
+        self.queue = async_writes.WriteQueue(self.stage_dir, max_workers=1, max_pending=1)
+
+    def wait(self):
+        self.queue.executor.shutdown(wait=True)
+
+    def test_write_is_applied_from_staged_volume(self):
+        data = np.arange(24, dtype=np.uint16).reshape((1, 2, 3, 4))
+        written = []
+
+        job_id = self.queue.submit(AnonymousUser(), 'col/exp/chan', data, lambda volume: written.append(np.array(volume)))
+        self.wait()
+
+        np.testing.assert_array_equal(written[0], data)
+        job = async_writes.get_status(job_id)
+        self.assertEqual(job['status'], async_writes.COMPLETE)
+        self.assertEqual(job['user'], 'public')
+        self.assertEqual(job['resource'], 'col/exp/chan')
+        self.assertEqual(os.listdir(self.stage_dir), [])
+
+    def test_failed_write(self):
+        def write(volume):
+            raise ValueError('cache unavailable')
+
+        job_id = self.queue.submit(AnonymousUser(), 'col/exp/chan', np.zeros((1, 1, 1, 1), np.uint8), write)
+        self.wait()
+
+        job = async_writes.get_status(job_id)
+        self.assertEqual(job['status'], async_writes.FAILED)
+        self.assertEqual(job['error'], 'cache unavailable')
+
+    def test_full_queue_returns_none(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def write(volume):
+            started.set()
+            release.wait(5)
+
+        data = np.zeros((1, 1, 1, 1), np.uint8)
+        self.assertIsNotNone(self.queue.submit(AnonymousUser(), 'col/exp/chan', data, write))
+        started.wait(5)
+        self.assertIsNone(self.queue.submit(AnonymousUser(), 'col/exp/chan', data, write))
+        release.set()
+        self.wait()
+
+    def test_unknown_job(self):
+        self.assertIsNone(async_writes.get_status('0' * 32))
+
+    def test_job_of_stopped_process_is_reported_failed(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def write(volume):
+            started.set()
+            release.wait(5)
+
+        job_id = self.queue.submit(AnonymousUser(), 'col/exp/chan', np.zeros((1, 1, 1, 1), np.uint8), write)
+        started.wait(5)
+        self.assertEqual(async_writes.get_status(job_id)['status'], async_writes.RUNNING)
+
+        # The heartbeat of a process expires when it exits
+        async_writes._cache().delete(async_writes._worker_key(self.queue.worker))
+        job = async_writes.get_status(job_id)
+        self.assertEqual(job['status'], async_writes.FAILED)
+        self.assertEqual(job['error'], async_writes.LOST_ERROR)
+
+        release.set()
+        self.wait()
+
+    def test_lost_volumes_are_removed(self):
+        old = time.time() - 3600
+        for job_id, worker in (('lost', 'gone'), ('expired', None)):
+            path = os.path.join(self.stage_dir, '{}.npy'.format(job_id))
+            np.save(path, np.zeros((1, 1, 1, 1), np.uint8))
+            os.utime(path, (old, old))
+            if worker is not None:
+                async_writes.set_status(job_id, async_writes.QUEUED, worker=worker)
+        np.save(os.path.join(self.stage_dir, 'new.npy'), np.zeros((1, 1, 1, 1), np.uint8))
+
+        self.queue.remove_lost_volumes()
+
+        self.assertEqual(os.listdir(self.stage_dir), ['new.npy'])
@@ -0,0 +1,81 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from bosscore.error import BossError, ErrorCodes
+from bossspatialdb.batch import parse_regions, batch_stream, read_batch_stream
+
+
+class TestParseRegions(SimpleTestCase):
+
+    def test_parse(self):
+        regions = parse_regions({'regions': [
+            {'resolution': 0, 'x_range': '0:64', 'y_range': '0:64', 'z_range': '0:8'},
+            {'resolution': '1', 'x_range': '64:128', 'y_range': '0:64', 'z_range': '0:8', 't_range': '0:2'},
+        ]}, 10)
+        self.assertEqual(regions[0], {'resolution': 0, 'x_range': '0:64', 'y_range': '0:64', 'z_range': '0:8',
+                                      't_range': None})
+        self.assertEqual(regions[1]['resolution'], 1)
+        self.assertEqual(regions[1]['t_range'], '0:2')
+
+    def test_empty(self):
+        with self.assertRaises(BossError) as ctx:
+            parse_regions({'regions': []}, 10)
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_POST_ARGUMENT)
+
+    def test_too_many(self):
+        region = {'resolution': 0, 'x_range': '0:64', 'y_range': '0:64', 'z_range': '0:8'}
+        with self.assertRaises(BossError) as ctx:
+            parse_regions({'regions': [region] * 3}, 2)
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.REQUEST_TOO_LARGE)
+
+    def test_missing_range(self):
+        with self.assertRaises(BossError) as ctx:
+            parse_regions({'regions': [{'resolution': 0, 'x_range': '0:64', 'y_range': '0:64'}]}, 10)
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_POST_ARGUMENT)
+
+    def test_malformed_range(self):
+        for x_range in ('5', 5, '5:', ':5', '-1:5', '0:64\n', [0, 64]):
+            region = {'resolution': 0, 'x_range': x_range, 'y_range': '0:64', 'z_range': '0:8'}
+            with self.assertRaises(BossError) as ctx:
+                parse_regions({'regions': [region]}, 10)
+            self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_POST_ARGUMENT)
+
+    def test_malformed_time_range(self):
+        region = {'resolution': 0, 'x_range': '0:64', 'y_range': '0:64', 'z_range': '0:8', 't_range': '1'}
+        with self.assertRaises(BossError) as ctx:
+            parse_regions({'regions': [region]}, 10)
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_POST_ARGUMENT)
+
+
+class TestBatchStream(SimpleTestCase):
+
+    def test_round_trip(self):
+        arrays = [np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4),
+                  np.arange(5 * 2 * 3 * 4, dtype=np.uint64).reshape(5, 2, 3, 4),
+                  np.zeros((1, 1, 1), dtype=np.uint16)]
+        body = b''.join(batch_stream(iter(arrays), len(arrays), cname='lz4', clevel=5))
+        result = read_batch_stream(body)
+
+        self.assertEqual(len(result), len(arrays))
+        for expected, actual in zip(arrays, result):
+            self.assertEqual(actual.dtype, expected.dtype)
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_truncated(self):
+        body = b''.join(batch_stream([np.ones((4, 4, 4), dtype=np.uint8)], 1))
+        with self.assertRaises(ValueError):
+            read_batch_stream(body[:-1])
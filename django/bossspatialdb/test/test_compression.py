@@ -0,0 +1,64 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import blosc
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from bosscore.error import BossError
+from bossspatialdb.compression import get_blosc_args
+
+
+@override_settings(BLOSC_CODEC='auto', BLOSC_CLEVEL='auto', BLOSC_SHUFFLE='auto')
+class TestBloscArgs(SimpleTestCase):
+
+    def test_auto_annotation(self):
+        args = get_blosc_args({}, np.uint64)
+        self.assertEqual(args, {'cname': 'zstd', 'clevel': 1, 'shuffle': blosc.SHUFFLE})
+
+    def test_auto_image(self):
+        args = get_blosc_args({}, np.uint8)
+        self.assertEqual(args, {'cname': 'lz4', 'clevel': 5, 'shuffle': blosc.NOSHUFFLE})
+
+    def test_query_params(self):
+        args = get_blosc_args({'blosc-codec': 'blosclz', 'blosc-clevel': '9', 'blosc-shuffle': 'bitshuffle'},
+                              np.uint16)
+        self.assertEqual(args, {'cname': 'blosclz', 'clevel': 9, 'shuffle': blosc.BITSHUFFLE})
+
+    @override_settings(BLOSC_CODEC='lz4hc')
+    def test_settings(self):
+        self.assertEqual(get_blosc_args({}, np.uint8)['cname'], 'lz4hc')
+
+    def test_invalid(self):
+        with self.assertRaises(BossError):
+            get_blosc_args({'blosc-codec': 'gzip'}, np.uint8)
+        with self.assertRaises(BossError):
+            get_blosc_args({'blosc-clevel': '10'}, np.uint8)
+        with self.assertRaises(BossError):
+            get_blosc_args({'blosc-shuffle': 'yes'}, np.uint8)
+
+    def test_round_trip(self):
+        data = np.arange(4096, dtype=np.uint64).reshape(16, 16, 16)
+        args = get_blosc_args({}, data.dtype)
+        compressed = blosc.compress(data, typesize=data.dtype.itemsize, **args)
+        result = np.frombuffer(blosc.decompress(compressed), dtype=data.dtype).reshape(data.shape)
+        np.testing.assert_array_equal(result, data)
+
+
+class TestBloscDefaults(SimpleTestCase):
+
+    def test_defaults_are_blosc_defaults(self):
+        for dtype in (np.uint8, np.uint16, np.uint64):
+            args = get_blosc_args({}, dtype)
+            self.assertEqual(args, {'cname': 'blosclz', 'clevel': 9, 'shuffle': blosc.SHUFFLE})
@@ -0,0 +1,58 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from django.conf import settings
+
+from bosscore.test.setup_db import SetupTestDB
+from bossspatialdb.views import CutoutFilter
+
+version = settings.BOSS_VERSION
+
+
+class CutoutFilterBodyTests(APITestCase):
+    """
+    Class to test the validation of the ids POSTed to the filtered cutout service
+    """
+
+    def setUp(self):
+        """
+            Initialize the database
+            :return:
+        """
+        self.rf = APIRequestFactory()
+
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user()
+        dbsetup.set_user(self.user)
+        dbsetup.insert_spatialdb_test_data()
+
+    def post_ids(self, body):
+        url = '/' + version + '/cutout/filter/col1/exp1/layer1/0/0:128/0:128/0:16/'
+        request = self.rf.post(url, body, format='json')
+        force_authenticate(request, user=self.user)
+        return CutoutFilter.as_view()(request, collection='col1', experiment='exp1', channel='layer1',
+                                      resolution='0', x_range='0:128', y_range='0:128', z_range='0:16')
+
+    def test_missing_ids(self):
+        """ Test that a body without ids is a bad request"""
+        for body in ({}, {'ids': []}, []):
+            self.assertEqual(self.post_ids(body).status_code, 400)
+
+    def test_ids_not_a_list(self):
+        """ Test that ids that are not a list are a bad request, not a server error"""
+        for body in (5, {'ids': 5}, {'ids': {'1': 2}}, {'ids': None}):
+            self.assertEqual(self.post_ids(body).status_code, 400)
@@ -0,0 +1,100 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from bosscore import dirty_region
+from bosscore.generation import record_write
+from bosscore.models import Channel, Collection, CoordinateFrame, Experiment
+from bossspatialdb.downsample import enqueue_job, get_dirty_frame
+
+CUBOID_SIZE = [512, 512, 16]
+
+
+class TestDirtyRegion(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser')
+        self.frame = CoordinateFrame.objects.create(name='frame', creator=user,
+                                                    x_start=0, x_stop=2000, y_start=0, y_stop=2000,
+                                                    z_start=0, z_stop=100, x_voxel_size=10, y_voxel_size=10,
+                                                    z_voxel_size=10, voxel_unit='nanometers')
+        col = Collection.objects.create(name='col', creator=user)
+        exp = Experiment.objects.create(name='exp', collection=col, creator=user, coord_frame=self.frame)
+        self.channel = Channel.objects.create(name='chan', experiment=exp, creator=user, type='image',
+                                              datatype='uint8')
+
+    def empty_region(self):
+        Channel.objects.filter(id=self.channel.id).update(**dirty_region.EMPTY_REGION)
+
+    def get_region(self):
+        self.channel.refresh_from_db()
+        return dirty_region.get_region(self.channel)
+
+    def test_unknown_region_stays_unknown(self):
+        record_write(self.channel.id, ((10, 20, 30), (5, 5, 5)))
+        self.assertIsNone(self.get_region())
+
+    def test_writes_grow_region(self):
+        self.empty_region()
+        self.assertEqual(self.get_region(), {})
+
+        record_write(self.channel.id, ((10, 20, 30), (5, 5, 5)))
+        record_write(self.channel.id, ((600, 0, 31), (10, 10, 2)))
+        record_write(self.channel.id)
+
+        self.assertEqual(self.get_region(), {'x_start': 10, 'x_stop': 610,
+                                             'y_start': 0, 'y_stop': 25,
+                                             'z_start': 30, 'z_stop': 35})
+
+    def test_dirty_frame_is_cuboid_aligned_and_clipped(self):
+        self.empty_region()
+        record_write(self.channel.id, ((600, 20, 90), (10, 10, 5)))
+
+        frame, generation = get_dirty_frame(self.channel.id, self.frame, CUBOID_SIZE)
+        self.assertEqual(frame, {'x_start': 512, 'x_stop': 1024,
+                                 'y_start': 0, 'y_stop': 512,
+                                 'z_start': 80, 'z_stop': 96})
+        self.assertEqual(generation, 1)
+
+    def test_unknown_region_downsamples_frame(self):
+        frame, _ = get_dirty_frame(self.channel.id, self.frame, CUBOID_SIZE)
+        self.assertEqual(frame, {})
+
+    @patch('bossspatialdb.downsample._sqs_enqueue')
+    def test_enqueue_empties_region(self, fake_enqueue):
+        self.empty_region()
+        record_write(self.channel.id, ((600, 20, 90), (10, 10, 5)))
+        _, generation = get_dirty_frame(self.channel.id, self.frame, CUBOID_SIZE)
+
+        enqueue_job(None, {'channel_id': self.channel.id}, 'queue', generation)
+
+        self.assertEqual(self.get_region(), {})
+        self.assertEqual(self.channel.downsample_status, Channel.DownsampleStatus.QUEUED)
+
+    @patch('bossspatialdb.downsample._sqs_enqueue')
+    def test_enqueue_keeps_region_written_after_it_was_read(self, fake_enqueue):
+        self.empty_region()
+        record_write(self.channel.id, ((600, 20, 90), (10, 10, 5)))
+        _, generation = get_dirty_frame(self.channel.id, self.frame, CUBOID_SIZE)
+        record_write(self.channel.id, ((0, 0, 0), (1, 1, 1)))
+
+        enqueue_job(None, {'channel_id': self.channel.id}, 'queue', generation)
+
+        self.assertEqual(self.get_region(), {'x_start': 0, 'x_stop': 610,
+                                             'y_start': 0, 'y_stop': 30,
+                                             'z_start': 0, 'z_stop': 95})
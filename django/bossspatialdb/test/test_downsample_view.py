@@ -58,8 +58,7 @@ def mock_check_for_running_sfn(session, arn):
     return False
 
 
-def mock_compute_usage_metrics(session, args, fqdn, user,
-                               collection, experiment, channel):
+def mock_compute_usage_metrics(args, fqdn, user, collection, experiment, channel):
     pass
 
 
@@ -0,0 +1,71 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from bossspatialdb.fill import count_cuboids, fill_blocks, fill_region
+from spdb.spatialdb.spatialdb import CUBOIDSIZE
+
+
+class FakeCache:
+    """Applies to_black writes to an in-memory (t, z, y, x) volume"""
+    def __init__(self, volume):
+        self.volume = volume
+        self.calls = []
+
+    def write_cuboid(self, resource, corner, resolution, data, time_sample_start, iso=False, to_black=False):
+        self.calls.append((corner, data.shape, time_sample_start))
+        t, z, y, x = data.shape
+        region = self.volume[time_sample_start:time_sample_start + t,
+                             corner[2]:corner[2] + z,
+                             corner[1]:corner[1] + y,
+                             corner[0]:corner[0] + x]
+        region[data != 0] = 0
+
+
+class TestFill(unittest.TestCase):
+
+    def test_count_cuboids(self):
+        self.assertEqual(count_cuboids((0, 0, 0), (512, 512, 16), [512, 512, 16]), 1)
+        self.assertEqual(count_cuboids((500, 0, 10), (20, 512, 10), [512, 512, 16]), 4)
+
+    def test_fill_blocks_are_cuboid_aligned(self):
+        blocks = fill_blocks((5, 0, 14), (30, 8, 4), [8, 8, 16], row_cuboids=2)
+        self.assertEqual(blocks, [((5, 0, 14), (11, 8, 2)), ((16, 0, 14), (16, 8, 2)), ((32, 0, 14), (3, 8, 2)),
+                                  ((5, 0, 16), (11, 8, 2)), ((16, 0, 16), (16, 8, 2)), ((32, 0, 16), (3, 8, 2))])
+
+    def test_fill_blocks_cover_region(self):
+        covered = np.zeros((40, 30, 50), dtype=np.uint8)
+        for corner, extent in fill_blocks((3, 7, 1), (45, 20, 37), [16, 8, 4], row_cuboids=3):
+            covered[corner[2]:corner[2] + extent[2],
+                    corner[1]:corner[1] + extent[1],
+                    corner[0]:corner[0] + extent[0]] += 1
+        expected = np.zeros_like(covered)
+        expected[1:38, 7:27, 3:48] = 1
+        np.testing.assert_array_equal(covered, expected)
+
+    def test_fill_region(self):
+        x_size, y_size, z_size = CUBOIDSIZE[0]
+        volume = np.ones((2, z_size + 4, 10, x_size + 10), dtype=np.uint16)
+        cache = FakeCache(volume)
+
+        writes = fill_region(cache, None, (x_size - 3, 2, z_size - 1), (6, 5, 3), 0, [0, 2], np.uint16)
+
+        # 2 cuboids in x, 2 in z, for both time samples
+        self.assertEqual(writes, 8)
+        expected = np.ones_like(volume)
+        expected[:, z_size - 1:z_size + 2, 2:7, x_size - 3:x_size + 3] = 0
+        np.testing.assert_array_equal(volume, expected)
@@ -0,0 +1,69 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+
+import numpy as np
+from PIL import Image
+from django.test import SimpleTestCase
+
+from bosscore.error import BossError, ErrorCodes
+from bossspatialdb import jpeg
+
+
+class TestJpeg(SimpleTestCase):
+
+    def test_atlas_columns_square(self):
+        self.assertEqual(jpeg.atlas_columns((16, 512, 512)), 4)
+
+    def test_atlas_columns_limited_to_z(self):
+        self.assertEqual(jpeg.atlas_columns((2, 16, 16), columns=10), 2)
+
+    def test_atlas_too_large(self):
+        with self.assertRaises(BossError) as ctx:
+            jpeg.atlas_columns((4, 65536, 16))
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.REQUEST_TOO_LARGE)
+
+    def test_build_atlas(self):
+        volume = np.arange(1, 4, dtype=np.uint8).reshape(3, 1, 1) * np.ones((3, 2, 2), dtype=np.uint8)
+        atlas = jpeg.build_atlas(volume, 2)
+        self.assertEqual(atlas.shape, (4, 4))
+        np.testing.assert_array_equal(atlas[0:2, 0:2], 1)
+        np.testing.assert_array_equal(atlas[0:2, 2:4], 2)
+        np.testing.assert_array_equal(atlas[2:4, 0:2], 3)
+        np.testing.assert_array_equal(atlas[2:4, 2:4], 0)
+
+    def test_encode_volume_atlas(self):
+        volume = np.zeros((9, 32, 32), dtype=np.uint8)
+        image = Image.open(io.BytesIO(jpeg.encode_volume(volume, 'atlas')))
+        self.assertEqual(image.size, (96, 96))
+
+    def test_stack_too_high(self):
+        volume = np.zeros((1025, 64, 1), dtype=np.uint8)
+        with self.assertRaises(BossError):
+            jpeg.encode_volume(volume, 'stack')
+
+    def test_multipart(self):
+        volume = np.zeros((5, 16, 16), dtype=np.uint8)
+        images = jpeg.encode_slices(volume, max_workers=3)
+        self.assertEqual(len(images), 5)
+
+        boundary, body = jpeg.multipart_body(images, z_start=10, boundary='b')
+        parts = body.split(b'--b\r\n')[1:]
+        self.assertEqual(len(parts), 5)
+        self.assertIn(b'Content-ID: <z-10>', parts[0])
+        self.assertIn(b'Content-ID: <z-14>', parts[4])
+        self.assertTrue(body.endswith(b'--b--\r\n'))
+        headers, image = parts[0].split(b'\r\n\r\n', 1)
+        self.assertEqual(image[:-2], images[0])
@@ -0,0 +1,45 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import zlib
+import unittest
+
+import numpy as np
+
+from bossspatialdb.parsers import iter_inflate, ChunkReader
+
+
+class TestIncrementalInflate(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.arange(100000, dtype=np.uint64).tobytes()
+        self.compressed = zlib.compress(self.data)
+
+    def test_chunks_are_bounded(self):
+        chunks = list(iter_inflate(io.BytesIO(self.compressed), chunk_size=1000))
+        self.assertTrue(all(len(c) <= 1000 for c in chunks))
+        self.assertEqual(b''.join(chunks), self.data)
+
+    def test_truncated(self):
+        with self.assertRaises(EOFError):
+            list(iter_inflate(io.BytesIO(self.compressed[:-10]), chunk_size=1000))
+
+    def test_readinto_preallocated(self):
+        reader = ChunkReader(iter_inflate(io.BytesIO(self.compressed), chunk_size=1000))
+        self.assertEqual(reader.read(8), self.data[:8])
+        out = np.empty(99999, dtype=np.uint64)
+        self.assertEqual(reader.readinto(memoryview(out).cast('B')), out.nbytes)
+        np.testing.assert_array_equal(out, np.arange(1, 100000, dtype=np.uint64))
+        self.assertTrue(reader.at_end())
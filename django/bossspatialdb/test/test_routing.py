@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from django.urls import resolve
-from ..views import Cutout
+from ..views import Cutout, CutoutBatch, CutoutFilter, CutoutWriteJob
 
 from rest_framework.test import APITestCase
 
@@ -48,3 +48,26 @@ class CutoutInterfaceRoutingTests(APITestCase):
         view_based_cutout = resolve('/' + version + '/cutout/col1/exp1/ds1/2/0:5/0:6/0:2/5:57')
         self.assertEqual(view_based_cutout.func.__name__, Cutout.as_view().__name__)
 
+    def test_batch_cutout_resolves_to_cutout_batch(self):
+        """
+        Test to make sure the batch cutout URL resolves
+        :return:
+        """
+        view_based_cutout = resolve('/' + version + '/cutout/batch/col1/exp1/ds1')
+        self.assertEqual(view_based_cutout.func.__name__, CutoutBatch.as_view().__name__)
+
+    def test_filtered_cutout_resolves_to_cutout_filter(self):
+        """
+        Test to make sure the filtered cutout URL resolves
+        :return:
+        """
+        view_based_cutout = resolve('/' + version + '/cutout/filter/col1/exp1/ds1/2/0:5/0:6/0:2')
+        self.assertEqual(view_based_cutout.func.__name__, CutoutFilter.as_view().__name__)
+
+    def test_write_job_resolves_to_cutout_write_job(self):
+        """
+        Test to make sure the asynchronous write status URL resolves
+        :return:
+        """
+        view_based_cutout = resolve('/' + version + '/cutout/jobs/0123456789abcdef0123456789abcdef/')
+        self.assertEqual(view_based_cutout.func.__name__, CutoutWriteJob.as_view().__name__)
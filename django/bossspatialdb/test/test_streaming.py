@@ -0,0 +1,76 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import zlib
+import unittest
+
+import numpy as np
+
+from bossspatialdb.chunking import aligned_ranges
+from bossspatialdb.streaming import iter_cutout_slabs, blosc_stream, read_blosc_stream, npygz_stream
+
+
+class FakeCube:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeCache:
+    """Serves cutouts out of an in-memory (t, z, y, x) volume"""
+    def __init__(self, volume):
+        self.volume = volume
+        self.calls = []
+
+    def cutout(self, resource, corner, extent, resolution, time_range, **kwargs):
+        self.calls.append((corner, extent, time_range))
+        return FakeCube(self.volume[time_range[0]:time_range[1],
+                                    corner[2]:corner[2] + extent[2],
+                                    corner[1]:corner[1] + extent[1],
+                                    corner[0]:corner[0] + extent[0]])
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.volume = np.random.randint(0, 5000, size=(2, 40, 8, 6)).astype(np.uint64)
+        self.cache = FakeCache(self.volume)
+
+    def test_aligned_ranges(self):
+        self.assertEqual(aligned_ranges(5, 40, 16), [(5, 16), (16, 32), (32, 40)])
+        self.assertEqual(aligned_ranges(16, 32, 16), [(16, 32)])
+
+    def test_slabs_are_cuboid_aligned(self):
+        slabs = list(iter_cutout_slabs(self.cache, None, (0, 0, 5), (6, 8, 30), 0, [0, 2]))
+        self.assertEqual(len(slabs), 6)
+        self.assertEqual([c[0][2] for c in self.cache.calls], [5, 16, 32] * 2)
+        np.testing.assert_array_equal(np.concatenate(slabs[:3]), self.volume[0, 5:35])
+
+    def test_blosc_stream_round_trip(self):
+        expected = self.volume[:, 5:35]
+        slabs = iter_cutout_slabs(self.cache, None, (0, 0, 5), (6, 8, 30), 0, [0, 2])
+        body = b''.join(blosc_stream(slabs, expected.shape, expected.dtype))
+        np.testing.assert_array_equal(read_blosc_stream(body), expected)
+
+    def test_blosc_stream_truncated(self):
+        slabs = iter_cutout_slabs(self.cache, None, (0, 0, 0), (6, 8, 40), 0, [0, 1])
+        body = b''.join(blosc_stream(slabs, (40, 8, 6), np.uint64))
+        with self.assertRaises(ValueError):
+            read_blosc_stream(body[:-8])
+
+    def test_npygz_stream_is_npygz_compatible(self):
+        expected = self.volume[1, 3:33]
+        slabs = iter_cutout_slabs(self.cache, None, (0, 0, 3), (6, 8, 30), 0, [1, 2])
+        body = b''.join(npygz_stream(slabs, expected.shape, expected.dtype))
+        np.testing.assert_array_equal(np.load(io.BytesIO(zlib.decompress(body))), expected)
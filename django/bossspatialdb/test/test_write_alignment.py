@@ -0,0 +1,33 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from bossspatialdb.chunking import partial_cuboids
+from bossspatialdb.views import add_alignment_headers
+
+
+class TestWriteAlignment(SimpleTestCase):
+
+    def test_partial_cuboids(self):
+        self.assertEqual(partial_cuboids((0, 0, 0), (32, 16, 32), [16, 16, 16]), 0)
+        self.assertEqual(partial_cuboids((0, 0, 5), (32, 16, 30), [16, 16, 16]), 4)
+        self.assertEqual(partial_cuboids((3, 0, 0), (6, 16, 16), [16, 16, 16]), 1)
+
+    def test_alignment_headers(self):
+        response = add_alignment_headers(HttpResponse(status=201), (0, 0, 5), (32, 16, 30), [16, 16, 16])
+        self.assertEqual(response['Boss-Cuboid-Size'], '16,16,16')
+        self.assertEqual(response['Boss-Cuboid-Aligned'], 'false')
+        self.assertEqual(response['Boss-Partial-Cuboids'], '4')
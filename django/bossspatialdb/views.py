@@ -21,17 +21,27 @@ from rest_framework import authentication, permissions
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework.parsers import JSONParser
 
-from .parsers import BloscParser, BloscPythonParser, NpygzParser, is_too_large
-from .renderers import BloscRenderer, BloscPythonRenderer, NpygzRenderer, JpegRenderer
-
-from django.http import HttpResponse
+from .parsers import (BloscParser, BloscPythonParser, NpygzParser, FilterIdsRawParser, FilterIdsBloscParser,
+                      is_too_large)
+from .renderers import (BloscRenderer, BloscPythonRenderer, NpygzRenderer, JpegRenderer,
+                        BloscStreamRenderer, NpygzStreamRenderer, BloscBatchRenderer, MultipartJpegRenderer)
+from .streaming import iter_cutout_slabs
+from .batch import parse_regions, read_regions
+from .compression import get_blosc_args
+from .fill import count_cuboids, fill_region
+from .chunking import partial_cuboids
+from . import async_writes
+
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
 
 from bosscore.request import BossRequest
 from bosscore.error import BossError, BossHTTPError, BossParserError, ErrorCodes
 from bosscore.models import Channel
+from bosscore.generation import record_write
 
 from boss import utils
+from boss import aws, metrics
 from boss.throttling import BossThrottle
 from bosscore.models import ThrottleMetric
 
@@ -46,6 +56,48 @@ from bossutils.logger import bossLogger
 from bossspatialdb.downsample import delete_queued_job, start
 
 
+def mark_written(req, corner, extent, iso=False):
+    """Record that the data of a channel changed after a write
+
+    Args:
+        req (BossRequest): Validated request of the write
+        corner ((int, int, int)): (x, y, z) corner of the region written
+        extent ((int, int, int)): (x, y, z) extent of the region written
+        iso (bool): True if the isotropic copy of the resolution was written
+    """
+    # Only writes to the base resolution have to be downsampled again
+    region = None
+    if req.get_resolution() == req.channel.base_resolution and not iso:
+        region = (corner, extent)
+
+    # Cached tiles and validators of the channel are no longer current, and if the channel status is DOWNSAMPLED
+    # it changes to NOT_DOWNSAMPLED since you just wrote data
+    record_write(req.channel.pk, region)
+
+
+def add_alignment_headers(response, corner, extent, cuboid_size):
+    """Describe the cuboid alignment of a written region in the response headers
+
+    Boss-Cuboid-Size is the x,y,z size of a cuboid at the resolution written, Boss-Cuboid-Aligned is true if the
+    region only covers whole cuboids and Boss-Partial-Cuboids is the number of cuboids it partially covers.  The
+    headers are only hints, aligned and unaligned regions are written the same way.
+
+    Args:
+        response (HttpResponse): Response to add the headers to
+        corner ((int, int, int)): (x, y, z) corner of the region
+        extent ((int, int, int)): (x, y, z) extent of the region
+        cuboid_size (list[int]): [x, y, z] size of a cuboid at the region's resolution
+
+    Returns:
+        (HttpResponse): The response
+    """
+    partial = partial_cuboids(corner, extent, cuboid_size)
+    response['Boss-Cuboid-Size'] = ','.join(str(size) for size in cuboid_size)
+    response['Boss-Cuboid-Aligned'] = 'true' if partial == 0 else 'false'
+    response['Boss-Partial-Cuboids'] = str(partial)
+    return response
+
+
 class Cutout(APIView):
     """
     View to handle spatial cutouts by providing all datamodel fields
@@ -54,8 +106,8 @@ class Cutout(APIView):
     """
     # Set Parser and Renderer
     parser_classes = (BloscParser, BloscPythonParser, NpygzParser, BrowsableAPIRenderer)
-    renderer_classes = (BloscRenderer, BloscPythonRenderer, NpygzRenderer, JpegRenderer,
-                        JSONRenderer, BrowsableAPIRenderer)
+    renderer_classes = (BloscRenderer, BloscPythonRenderer, NpygzRenderer, JpegRenderer, MultipartJpegRenderer,
+                        BloscStreamRenderer, NpygzStreamRenderer, JSONRenderer, BrowsableAPIRenderer)
 
     def __init__(self):
         super().__init__()
@@ -83,6 +135,30 @@ class Cutout(APIView):
         else:
             ids = None
 
+        if isinstance(request.data, BossParserError):
+            return request.data.to_http()
+
+        return self.read_cutout(request, collection, experiment, channel, resolution, x_range, y_range, z_range,
+                                t_range, ids)
+
+    def read_cutout(self, request, collection, experiment, channel, resolution, x_range, y_range, z_range, t_range,
+                    ids, conditional=True):
+        """
+        Read a cuboid of data and build the response
+
+        :param request: DRF Request object
+        :param collection: Unique Collection identifier, indicating which collection you want to access
+        :param experiment: Experiment identifier, indicating which experiment you want to access
+        :param channel: Channel identifier, indicating which channel you want to access
+        :param resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+        :param x_range: Python style range indicating the X coordinates of the cuboid (eg. 100:200)
+        :param y_range: Python style range indicating the Y coordinates of the cuboid (eg. 100:200)
+        :param z_range: Python style range indicating the Z coordinates of the cuboid (eg. 100:200)
+        :param t_range: Python style range indicating the time samples of the cuboid (eg. 0:2) or None
+        :param ids: Ids to filter the cuboid by (comma separated string or numpy array) or None
+        :param conditional: If the response may be a 304 Not Modified (only for GET requests)
+        :return:
+        """
         if "iso" in request.query_params:
             if request.query_params["iso"].lower() == "true":
                 iso = True
@@ -94,13 +170,11 @@ class Cutout(APIView):
         # Define access mode.
         access_mode = utils.get_access_mode(request)
 
-        if isinstance(request.data, BossParserError):
-            return request.data.to_http()
-
-        # Process request and validate
+        # Process request and validate, reading data is always validated as a GET
         try:
             request_args = {
                 "service": "cutout",
+                "method": "GET",
                 "collection_name": collection,
                 "experiment_name": experiment,
                 "channel_name": channel,
@@ -129,6 +203,18 @@ class Cutout(APIView):
             return BossHTTPError("Cutout request is over 500MB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Get the compression options of the blosc formats
+        try:
+            blosc_args = get_blosc_args(request.query_params, resource.get_numpy_data_type())
+        except BossError as err:
+            return err.to_http()
+
+        # Let the client reuse its copy if the data has not changed
+        etag = utils.get_etag(request, req) if conditional else None
+        response = utils.not_modified(request, etag)
+        if response is not None:
+            return response
+
         # Add metrics to CloudWatch
         cost = ( req.get_x_span()
                * req.get_y_span()
@@ -152,28 +238,10 @@ class Cutout(APIView):
             {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
         ]
 
-        session = bossutils.aws.get_session()
-        client = session.client('cloudwatch')
-
-        try:
-            client.put_metric_data(
-                Namespace="BOSS/Cutout",
-                MetricData=[{
-                    'MetricName': 'InvokeCount',
-                    'Dimensions': dimensions,
-                    'Value': 1.0,
-                    'Unit': 'Count'
-                }, {
-                    'MetricName': 'EgressCost',
-                    'Dimensions': dimensions,
-                    'Value': cost,
-                    'Unit': 'Bytes'
-                }]
-            )
-        except Exception as e:
-            log = bossLogger()
-            log.exception('Error during put_metric_data: {}'.format(e))
-            log.exception('Allowing bossDB to continue after logging')
+        metrics.emit("BOSS/Cutout", dimensions, [
+            ('InvokeCount', 1.0, 'Count'),
+            ('EgressCost', cost, 'Bytes'),
+        ])
 
 
 
@@ -190,14 +258,30 @@ class Cutout(APIView):
         corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
         extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
 
+        # Streaming formats read and compress the volume a slab at a time while the response is being sent
+        renderer = getattr(request, 'accepted_renderer', None)
+        if getattr(renderer, 'streaming', False):
+            slabs = iter_cutout_slabs(cache, resource, corner, extent, req.get_resolution(),
+                                      [req.get_time().start, req.get_time().stop],
+                                      slab_cuboids=settings.CUTOUT_STREAM_SLAB_CUBOIDS,
+                                      filter_ids=req.get_filter_ids(), iso=iso, access_mode=access_mode)
+            shape = (req.get_z_span(), req.get_y_span(), req.get_x_span())
+            if req.time_request:
+                shape = (len(req.get_time()),) + shape
+            response = StreamingHttpResponse(renderer.stream(slabs, shape, resource.get_numpy_data_type(),
+                                                             blosc_args=blosc_args),
+                                             content_type=renderer.media_type)
+            return utils.add_validators(response, etag)
+
         # Get a Cube instance with all time samples
         data = cache.cutout(resource, corner, extent, req.get_resolution(), [req.get_time().start, req.get_time().stop],
                             filter_ids=req.get_filter_ids(), iso=iso, access_mode=access_mode)
         to_renderer = {"time_request": req.time_request,
-                       "data": data}
+                       "data": data,
+                       "blosc_args": blosc_args}
 
         # Send data to renderer
-        return Response(to_renderer)
+        return utils.add_validators(Response(to_renderer), etag)
 
     def post(self, request, collection, experiment, channel, resolution, x_range, y_range, z_range, t_range=None):
         """
@@ -275,62 +359,236 @@ class Cutout(APIView):
             {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
         ]
 
-        session = bossutils.aws.get_session()
-        client = session.client('cloudwatch')
+        metrics.emit("BOSS/Cutout", dimensions, [
+            ('InvokeCount', 1.0, 'Count'),
+            ('IngressCost', cost, 'Bytes'),
+        ])
 
-        try:
-            client.put_metric_data(
-                Namespace="BOSS/Cutout",
-                MetricData=[{
-                    'MetricName': 'InvokeCount',
-                    'Dimensions': dimensions,
-                    'Value': 1.0,
-                    'Unit': 'Count'
-                }, {
-                    'MetricName': 'IngressCost',
-                    'Dimensions': dimensions,
-                    'Value': cost,
-                    'Unit': 'Bytes'
-                }]
-            )
-        except Exception as e:
-            log = bossLogger()
-            log.exception('Error during put_metric_data: {}'.format(e))
-            log.exception('Allowing bossDB to continue after logging')
 
 
-
-        # Get interface to SPDB cache
-        cache = SpatialDB(settings.KVIO_SETTINGS,
-                          settings.STATEIO_CONFIG,
-                          settings.OBJECTIO_CONFIG)
-
         # Write block to cache
         corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+        cuboid_size = CUBOIDSIZE[req.get_resolution()]
+        data = request.data[2] if len(request.data[2].shape) == 4 else np.expand_dims(request.data[2], axis=0)
+
+        def write(volume):
+            cache = SpatialDB(settings.KVIO_SETTINGS,
+                              settings.STATEIO_CONFIG,
+                              settings.OBJECTIO_CONFIG)
+            cache.write_cuboid(resource, corner, req.get_resolution(), volume, req.get_time()[0], iso=iso)
+            mark_written(req, corner, extent, iso)
+
+        # Check for optional async flag, large uploads can be applied by a background thread
+        queue = async_writes.get_queue()
+        if request.query_params.get("async", "").lower() == "true" and queue is not None:
+            try:
+                job_id = queue.submit(request.user, '{}/{}/{}'.format(collection, experiment, channel), data, write)
+            except Exception as e:
+                return BossHTTPError('Unable to stage the write: {}'.format(e), ErrorCodes.BOSS_SYSTEM_ERROR)
+            if job_id is not None:
+                response = JsonResponse({"id": job_id, "status": async_writes.QUEUED}, status=202)
+                response['Location'] = '/{}/cutout/jobs/{}/'.format(request.version, job_id)
+                return add_alignment_headers(response, corner, extent, cuboid_size)
 
         try:
-            if len(request.data[2].shape) == 4:
-                cache.write_cuboid(resource, corner, req.get_resolution(), request.data[2], req.get_time()[0], iso=iso)
-            else:
-                cache.write_cuboid(resource, corner, req.get_resolution(),
-                                   np.expand_dims(request.data[2], axis=0), req.get_time()[0], iso=iso)
+            write(data)
         except Exception as e:
             # TODO: Eventually remove as this level of detail should not be sent to the user
             return BossHTTPError('Error during write_cuboid: {}'.format(e), ErrorCodes.BOSS_SYSTEM_ERROR)
 
-        # If the channel status is DOWNSAMPLED change status to NOT_DOWNSAMPLED since you just wrote data
-        channel = resource.get_channel()
-        if channel.downsample_status.upper() == "DOWNSAMPLED":
-            # Get Channel object and update status
-            lookup_key = resource.get_lookup_key()
-            _, exp_id, _ = lookup_key.split("&")
-            channel_obj = Channel.objects.get(name=channel.name, experiment=int(exp_id))
-            channel_obj.downsample_status = "NOT_DOWNSAMPLED"
-            channel_obj.downsample_arn = ""
-            channel_obj.save()
+        # Let ingest tools know how to align their writes
+        response = HttpResponse(status=201)
+        add_alignment_headers(response, corner, extent, cuboid_size)
+        return response
 
-        # Send data to renderer
-        return HttpResponse(status=201)
+
+class CutoutFilter(Cutout):
+    """
+    View to handle spatial cutouts filtered by a list of ids POSTed in the body
+
+    The ids are little endian uint64 (application/octet-stream), blosc compressed little endian uint64
+    (application/blosc) or JSON ({"ids": [...]}).  Use it instead of the filter query parameter for id lists too long
+    for a URL.
+
+    * Requires authentication.
+    """
+    parser_classes = (FilterIdsRawParser, FilterIdsBloscParser, JSONParser)
+
+    def get(self, request, *args, **kwargs):
+        return self.http_method_not_allowed(request, *args, **kwargs)
+
+    def post(self, request, collection, experiment, channel, resolution, x_range, y_range, z_range, t_range=None):
+        """
+        View to handle POST requests for a cuboid of data filtered by the ids in the body
+
+        :param request: DRF Request object
+        :type request: rest_framework.request.Request
+        :param collection: Unique Collection identifier, indicating which collection you want to access
+        :param experiment: Experiment identifier, indicating which experiment you want to access
+        :param channel: Channel identifier, indicating which channel you want to access
+        :param resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+        :param x_range: Python style range indicating the X coordinates of the cuboid (eg. 100:200)
+        :param y_range: Python style range indicating the Y coordinates of the cuboid (eg. 100:200)
+        :param z_range: Python style range indicating the Z coordinates of the cuboid (eg. 100:200)
+        :return:
+        """
+        if isinstance(request.data, BossParserError):
+            return request.data.to_http()
+
+        ids = request.data
+        if isinstance(ids, dict):
+            ids = ids.get('ids')
+        if not isinstance(ids, (list, str, np.ndarray)) or len(ids) == 0:
+            return BossHTTPError("The body must contain the ids to filter the cutout by",
+                                 ErrorCodes.INVALID_POST_ARGUMENT)
+
+        return self.read_cutout(request, collection, experiment, channel, resolution, x_range, y_range, z_range,
+                                t_range, ids, conditional=False)
+
+
+class CutoutBatch(APIView):
+    """
+    View to read many regions of a channel in one request
+
+    * Requires authentication.
+    """
+    parser_classes = (JSONParser,)
+    renderer_classes = (BloscBatchRenderer, JSONRenderer)
+
+    def post(self, request, collection, experiment, channel):
+        """
+        View to handle POST requests for a batch of cuboids of data
+
+        The body is a JSON object with a list of regions, each with a resolution, x_range, y_range, z_range and
+        optional t_range in the same format as the cutout service URL, e.g.
+        {"regions": [{"resolution": 0, "x_range": "0:64", "y_range": "0:64", "z_range": "0:8"}]}
+
+        The channel and permissions are validated and the request is throttled once for the whole batch.  The regions
+        are read concurrently and returned in request order as application/blosc-batch.
+
+        :param request: DRF Request object
+        :type request: rest_framework.request.Request
+        :param collection: Unique Collection identifier, indicating which collection you want to access
+        :param experiment: Experiment identifier, indicating which experiment you want to access
+        :param channel: Channel identifier, indicating which channel you want to access
+        :return:
+        """
+        if "iso" in request.query_params:
+            if request.query_params["iso"].lower() == "true":
+                iso = True
+            else:
+                iso = False
+        else:
+            iso = False
+
+        # Define access mode.
+        access_mode = utils.get_access_mode(request)
+
+        # Process request and validate, reading data with a POST so validate as a GET
+        try:
+            regions = parse_regions(request.data, settings.CUTOUT_BATCH_MAX_REGIONS)
+            first = regions[0]
+            request_args = {
+                "service": "cutout",
+                "method": "GET",
+                "collection_name": collection,
+                "experiment_name": experiment,
+                "channel_name": channel,
+                "resolution": first['resolution'],
+                "x_args": first['x_range'],
+                "y_args": first['y_range'],
+                "z_args": first['z_range'],
+                "time_args": first['t_range'],
+            }
+            req = BossRequest(request, request_args)
+            reqs = [req] + [req.copy_for_region(r['resolution'], r['x_range'], r['y_range'], r['z_range'],
+                                                r['t_range'])
+                            for r in regions[1:]]
+        except BossError as err:
+            return err.to_http()
+
+        # Convert to Resource
+        resource = project.BossResourceDjango(req)
+
+        # Get bit depth
+        try:
+            self.bit_depth = resource.get_bit_depth()
+            blosc_args = get_blosc_args(request.query_params, resource.get_numpy_data_type())
+        except ValueError:
+            return BossHTTPError("Unsupported data type: {}".format(resource.get_data_type()), ErrorCodes.TYPE_ERROR)
+        except BossError as err:
+            return err.to_http()
+
+        # Make sure the whole batch is under the cutout limit UNCOMPRESSED
+        cost = sum(r.get_x_span() * r.get_y_span() * r.get_z_span() * (r.get_time().stop - r.get_time().start)
+                   for r in reqs) * self.bit_depth / 8
+        if cost > settings.CUTOUT_MAX_SIZE:
+            return BossHTTPError("Batch cutout request is over 500MB when uncompressed. Reduce the regions.",
+                                 ErrorCodes.REQUEST_TOO_LARGE)
+
+        BossThrottle().check('cutout', ThrottleMetric.METRIC_TYPE_EGRESS,
+                             request.user,
+                             cost, ThrottleMetric.METRIC_UNITS_BYTES)
+
+        boss_config = bossutils.configuration.BossConfig()
+        dimensions = [
+            {'Name': 'User', 'Value': request.user.username or "public"},
+            {'Name': 'Resource', 'Value': '{}/{}/{}'.format(collection,
+                                                            experiment,
+                                                            channel)},
+            {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
+        ]
+
+        metrics.emit("BOSS/Cutout", dimensions, [
+            ('InvokeCount', 1.0, 'Count'),
+            ('EgressCost', cost, 'Bytes'),
+        ])
+
+        # Get interface to SPDB or CVDB cache for each worker thread
+        if resource.get_channel().is_cloudvolume():
+            cache_factory = CloudVolumeDB
+        else:
+            def cache_factory():
+                return SpatialDB(settings.KVIO_SETTINGS,
+                                 settings.STATEIO_CONFIG,
+                                 settings.OBJECTIO_CONFIG)
+
+        arrays = read_regions(cache_factory, resource, reqs, settings.CUTOUT_BATCH_THREADS,
+                              iso=iso, access_mode=access_mode)
+        renderer = BloscBatchRenderer()
+        return StreamingHttpResponse(renderer.stream(arrays, len(reqs), blosc_args=blosc_args),
+                                     content_type=renderer.media_type)
+
+
+class CutoutWriteJob(APIView):
+    """
+    View to get the status of an asynchronous cutout write
+
+    * Requires authentication.
+    """
+    renderer_classes = (JSONRenderer,)
+
+    def get(self, request, job_id):
+        """
+        View to handle GET requests for the status of a write job started by a cutout POST with ?async=true
+
+        The status is one of queued, running, complete or failed, with the error of failed jobs.
+
+        :param request: DRF Request object
+        :type request: rest_framework.request.Request
+        :param job_id: Id of the write job returned by the cutout POST
+        :return:
+        """
+        job = async_writes.get_status(job_id)
+
+        # Jobs of other users are reported as missing so their ids can not be probed
+        if job is None or job.get('user') != (request.user.username or 'public'):
+            return BossHTTPError("Write job {} not found. Job statuses expire after {} seconds.".format(
+                                 job_id, getattr(settings, 'ASYNC_WRITE_STATUS_TTL', 86400)),
+                                 ErrorCodes.RESOURCE_NOT_FOUND)
+
+        return Response(job)
 
 
 class Downsample(APIView):
@@ -479,7 +737,7 @@ class Downsample(APIView):
         _, exp_id, chan_id = lookup_key.split("&")
         channel_obj = Channel.objects.get(name=channel.name, experiment=int(exp_id))
 
-        session = bossutils.aws.get_session()
+        session = aws.get_session()
         if status == Channel.DownsampleStatus.IN_PROGRESS:
             # Call cancel on the Step Function
             bossutils.aws.sfn_cancel(session, channel_obj.downsample_arn, error="User Cancel",
@@ -562,49 +820,34 @@ class CutoutToBlack(APIView):
         except ValueError:
             return BossHTTPError("Unsupported data type: {}".format(resource.get_data_type()), ErrorCodes.TYPE_ERROR)
     
-        # Set a limit of CUTOUT_MAX_SIZE 
-        if is_too_large(req, self.bit_depth):
-            return BossHTTPError("Cutout overwrite is over 500MB when uncompressed. Reduce overwrite dimensions.", ErrorCodes.REQUEST_TOO_LARGE)
-    
-        # Get the shape of the requested data clear
-        if len(req.get_time()) > 2:
-            expected_shape = (len(req.get_time()), req.get_z_span(), req.get_y_span(), req.get_x_span())
-        else:
-            expected_shape = (req.get_z_span(), req.get_y_span(), req.get_x_span())
-
-        # Create a binary numpy array for overwrite with specified shape and dtype
-        black_cuboid = np.ones(expected_shape, dtype=expected_data_type)
+        # The region is zeroed a cuboid aligned block at a time, so its size is limited by the bytes of the cuboids
+        # written to the cache instead of the bytes of the region
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+        time_range = req.get_time()
+        cuboid_size = CUBOIDSIZE[req.get_resolution()]
+        num_cuboids = count_cuboids(corner, extent, cuboid_size) * len(time_range)
+        fill_size = num_cuboids * cuboid_size[0] * cuboid_size[1] * cuboid_size[2] * (self.bit_depth // 8)
+        if fill_size > settings.CUTOUT_FILL_MAX_SIZE:
+            return BossHTTPError("Cutout overwrite touches {} cuboids ({} bytes), the maximum is {} bytes. Reduce "
+                                 "overwrite dimensions.".format(num_cuboids, fill_size, settings.CUTOUT_FILL_MAX_SIZE),
+                                 ErrorCodes.REQUEST_TOO_LARGE)
 
         # Get interface to SPDB cache
         cache = SpatialDB(settings.KVIO_SETTINGS,
                           settings.STATEIO_CONFIG,
                           settings.OBJECTIO_CONFIG)
 
-        # Write block to cache
-        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
-
         try:
-            if len(black_cuboid.shape) == 4:
-                cache.write_cuboid(resource, corner, req.get_resolution(), black_cuboid, req.get_time()[0], iso=iso, to_black=True)
-            else:
-                cache.write_cuboid(resource, corner, req.get_resolution(),
-                                   np.expand_dims(black_cuboid, axis=0), req.get_time()[0], iso=iso, to_black=True)
+            fill_region(cache, resource, corner, extent, req.get_resolution(), [time_range.start, time_range.stop],
+                        expected_data_type, iso=iso, row_cuboids=settings.CUTOUT_FILL_ROW_CUBOIDS)
         except Exception as e:
             # TODO: Eventually remove as this level of detail should not be sent to the user
-            log = BossLogger().logger
+            log = bossLogger()
             log.exception('Error during write_cuboid: {}'.format(e))
             return BossHTTPError('Error during write_cuboid: {}'.format(e), ErrorCodes.BAD_REQUEST)
 
-        # If the channel status is DOWNSAMPLED change status to NOT_DOWNSAMPLED since you just wrote data
-        channel = resource.get_channel()
-        if channel.downsample_status.upper() == "DOWNSAMPLED":
-            # Get Channel object and update status
-            lookup_key = resource.get_lookup_key()
-            _, exp_id, _ = lookup_key.split("&")
-            channel_obj = Channel.objects.get(name=channel.name, experiment=int(exp_id))
-            channel_obj.downsample_status = "NOT_DOWNSAMPLED"
-            channel_obj.downsample_arn = ""
-            channel_obj.save()
+        mark_written(req, corner, extent, iso)
 
         # Send data to renderer
         return HttpResponse(status=200)
@@ -0,0 +1,158 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Intensity windowing of image channel tiles.
+
+The tile and image services accept optional query parameters that map the
+values of uint8 and uint16 channels to an 8-bit image before encoding:
+
+    window=<min>:<max>     values at or below min are black, at or above max white
+    level=<c>&width=<w>    the window centered on c, w wide
+    gamma=<g>              out = in ** (1 / g) after windowing, g > 1 brightens
+    depth=8                only convert to 8 bits, the window is the full range
+
+The mapping is a lookup table with an entry for every possible value of the
+channel, so applying it is a single vectorized indexing operation.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from bosscore.error import BossError, ErrorCodes
+
+PARAMS = ('window', 'level', 'width', 'gamma', 'depth')
+
+
+@lru_cache(maxsize=64)
+def build_lut(bit_depth, low, high, gamma):
+    """Build the lookup table of an intensity window
+
+    Args:
+        bit_depth (int): Bit depth of the channel, 8 or 16
+        low (float): Value mapped to 0
+        high (float): Value mapped to 255
+        gamma (float): Gamma applied after windowing
+
+    Returns:
+        (numpy.ndarray): uint8 table with 2 ** bit_depth entries
+    """
+    values = np.arange(2 ** bit_depth, dtype=np.float64)
+    scaled = np.clip((values - low) / (high - low), 0.0, 1.0)
+    if gamma != 1.0:
+        scaled = np.power(scaled, 1.0 / gamma)
+    lut = np.rint(scaled * 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+class IntensityWindow(object):
+    """Maps the values of a tile to an 8-bit image
+
+    Attributes:
+        bit_depth (int): Bit depth of the channel
+        low (float): Value mapped to 0
+        high (float): Value mapped to 255
+        gamma (float): Gamma applied after windowing
+    """
+
+    def __init__(self, bit_depth, low, high, gamma=1.0):
+        self.bit_depth = bit_depth
+        self.low = low
+        self.high = high
+        self.gamma = gamma
+
+    def cache_key(self):
+        """Get the parameters that change the rendered tile, for the tile cache key
+
+        Returns:
+            (tuple)
+        """
+        return ('window', self.low, self.high, self.gamma)
+
+    def apply(self, img):
+        """Apply the window to an image
+
+        Args:
+            img (PIL.Image.Image): Image from a cutout of a uint8 or uint16 channel
+
+        Returns:
+            (PIL.Image.Image): 8-bit grayscale image
+        """
+        lut = build_lut(self.bit_depth, self.low, self.high, self.gamma)
+        values = np.asarray(img)
+        if values.dtype.itemsize > 2 or values.dtype.kind != 'u':
+            # 16-bit images may be stored as 32-bit signed integers by PIL
+            values = np.clip(values, 0, lut.size - 1).astype(np.uint16)
+        return Image.fromarray(lut[values], mode='L')
+
+
+def _parse_float(query_params, name):
+    try:
+        return float(query_params[name])
+    except ValueError:
+        raise BossError("Incorrect {}, must be a number".format(name), ErrorCodes.INVALID_ARGUMENT)
+
+
+def get_intensity_window(query_params, bit_depth):
+    """Get the intensity window requested by the query parameters of a tile or image request
+
+    Args:
+        query_params (QueryDict): Query parameters of the request
+        bit_depth (int): Bit depth of the channel
+
+    Returns:
+        (IntensityWindow|None): None if no intensity parameters were given
+
+    Raises:
+        (BossError): If a query parameter is invalid or the channel is not a uint8 or uint16 channel
+    """
+    if not any(name in query_params for name in PARAMS):
+        return None
+
+    if bit_depth not in (8, 16):
+        raise BossError("Intensity windowing is only supported for uint8 and uint16 channels",
+                        ErrorCodes.DATATYPE_NOT_SUPPORTED)
+
+    if 'depth' in query_params and query_params['depth'] != '8':
+        raise BossError("Incorrect depth, tiles can only be converted to 8 bits", ErrorCodes.INVALID_ARGUMENT)
+
+    low, high = 0.0, float(2 ** bit_depth - 1)
+    if 'window' in query_params:
+        if 'level' in query_params or 'width' in query_params:
+            raise BossError("Use either window or level and width", ErrorCodes.INVALID_ARGUMENT)
+        try:
+            low, high = (float(v) for v in query_params['window'].split(':'))
+        except ValueError:
+            raise BossError("Incorrect window, must be <min>:<max>", ErrorCodes.INVALID_ARGUMENT)
+    elif 'level' in query_params or 'width' in query_params:
+        if 'level' not in query_params or 'width' not in query_params:
+            raise BossError("Both level and width are required", ErrorCodes.INVALID_ARGUMENT)
+        level = _parse_float(query_params, 'level')
+        width = _parse_float(query_params, 'width')
+        low, high = level - width / 2, level + width / 2
+
+    if not high > low:
+        raise BossError("The intensity window must have a maximum larger than its minimum",
+                        ErrorCodes.INVALID_ARGUMENT)
+
+    gamma = 1.0
+    if 'gamma' in query_params:
+        gamma = _parse_float(query_params, 'gamma')
+        if not gamma > 0:
+            raise BossError("Incorrect gamma, must be larger than 0", ErrorCodes.INVALID_ARGUMENT)
+
+    return IntensityWindow(bit_depth, low, high, gamma)
@@ -0,0 +1,68 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bosscore.error import BossError
+from bosstiles.pyramid import build_pyramid
+
+
+def _range(value):
+    try:
+        start, stop = (int(v) for v in value.split(':'))
+    except ValueError:
+        raise CommandError("Invalid range {}, must be <start>:<stop>".format(value))
+    if stop <= start:
+        raise CommandError("Invalid range {}, stop must be larger than start".format(value))
+    return start, stop
+
+
+class Command(BaseCommand):
+    help = ("Pre-render the XY tile pyramid of a channel into the tile cache or an S3 prefix. "
+            "Run it again after writing to the channel or downsampling it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection')
+        parser.add_argument('experiment')
+        parser.add_argument('channel')
+        parser.add_argument('--user', default='bossadmin',
+                            help="User the tiles are read as (default: bossadmin)")
+        parser.add_argument('--resolutions', help="Resolutions to render as <start>:<stop> (default: all)")
+        parser.add_argument('--z-range', help="z slices to render at the base resolution as <start>:<stop> "
+                                              "(default: all)")
+        parser.add_argument('--t-range', help="Time samples to render as <start>:<stop> "
+                                              "(default: the default time sample)")
+        parser.add_argument('--tile-size', type=int, default=512, help="Tile size (default: 512)")
+        parser.add_argument('--format', default='png', help="Tile format, png, jpg or webp (default: png)")
+        parser.add_argument('--destination', default='cache',
+                            help="'cache' or s3://<bucket>/<prefix> (default: cache)")
+        parser.add_argument('--processes', type=int, help="Number of worker processes (default: number of CPUs)")
+
+    def handle(self, *args, **options):
+        resolutions = range(*_range(options['resolutions'])) if options['resolutions'] else None
+        z_range = _range(options['z_range']) if options['z_range'] else None
+        t_range = _range(options['t_range']) if options['t_range'] else None
+
+        try:
+            stored = build_pyramid(options['user'], options['collection'], options['experiment'],
+                                   options['channel'], resolutions=resolutions, z_range=z_range, t_range=t_range,
+                                   tile_size=options['tile_size'], fmt=options['format'],
+                                   destination=options['destination'], processes=options['processes'])
+        except BossError as err:
+            raise CommandError(err.message)
+        except ValueError as err:
+            raise CommandError(str(err))
+
+        for res, count in sorted(stored.items()):
+            self.stdout.write("Resolution {}: {} tiles".format(res, count))
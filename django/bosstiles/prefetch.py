@@ -0,0 +1,248 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Read-ahead of XY tiles.
+
+After an XY tile is requested, the neighboring tiles in x and y, the tiles
+at z - 1 and z + 1 and the tile of the next coarser resolution are rendered
+into the tile cache by a bounded pool of background threads, so a viewer
+panning or scrolling through the data finds them already rendered.
+
+Prefetching is limited per user by a token bucket and per process by the
+number of pending tiles.  Both limits are kept in memory, so they apply to
+each uwsgi worker separately.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from bosscore.error import BossError
+from bosscore.generation import get_generation
+from bossutils.logger import bossLogger
+
+import spdb
+
+from . import tile_cache
+
+
+class TokenBucket(object):
+    """Per-user token bucket
+
+    Attributes:
+        rate (float): Tokens added per second
+        burst (float): Maximum number of tokens
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def take(self, user, count=1, now=None):
+        """Take tokens from a user's bucket
+
+        Args:
+            user (str): Name of the user
+            count (int): Number of tokens wanted
+            now (optional[float]): Current time, for tests
+
+        Returns:
+            (int): Number of tokens taken, up to count
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens, last = self.buckets.get(user, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            taken = min(count, int(tokens))
+            self.buckets[user] = (tokens - taken, now)
+
+            # Forget users whose bucket is full again
+            if len(self.buckets) > 10000:
+                self.buckets = {u: (t, l) for u, (t, l) in self.buckets.items()
+                                if t + (now - l) * self.rate < self.burst}
+            return taken
+
+
+def get_neighbors(resolution, x_idx, y_idx, z_idx, max_resolution):
+    """Get the tiles to prefetch after an XY tile, closest first
+
+    Args:
+        resolution (int): Resolution of the requested tile
+        x_idx (int): X tile index
+        y_idx (int): Y tile index
+        z_idx (int): Z index
+        max_resolution (int): Coarsest resolution of the channel
+
+    Returns:
+        (list[tuple]): (resolution, x_idx, y_idx, z_idx) of each tile
+    """
+    neighbors = [(resolution, x_idx + dx, y_idx + dy, z_idx)
+                 for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+    neighbors += [(resolution, x_idx, y_idx, z_idx + dz) for dz in (-1, 1)]
+    if resolution < max_resolution:
+        # Downsampling halves x and y
+        neighbors.append((resolution + 1, x_idx // 2, y_idx // 2, z_idx))
+    return [n for n in neighbors if min(n[1:]) >= 0]
+
+
+class TilePrefetcher(object):
+    """Renders tiles into the tile cache with a pool of background threads
+
+    The pool is recreated after a fork so uwsgi workers never share it.
+
+    Attributes:
+        max_workers (int): Number of background threads
+        max_pending (int): Maximum number of tiles waiting to be rendered
+        limiter (TokenBucket): Per-user limit on the number of tiles prefetched
+    """
+
+    def __init__(self, max_workers, max_pending, limiter):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.limiter = limiter
+        self.lock = threading.Lock()
+        self.pid = None
+        self.executor = None
+        self.pending = set()
+        self.local = threading.local()
+
+    def _get_executor(self):
+        # Called with the lock held
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.pending = set()
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='boss-prefetch')
+        return self.executor
+
+    def schedule(self, user, req, resource, tile_size, x_idx, y_idx, z_idx, renderer, encode_args, window):
+        """Prefetch the tiles around an XY tile
+
+        Args:
+            user (User): User that requested the tile
+            req (BossRequest): Validated request of the tile
+            resource (BossResourceDjango): Channel of the tile
+            tile_size (int): Width and height of the tile
+            x_idx (int): X tile index
+            y_idx (int): Y tile index
+            z_idx (int): Z index
+            renderer (ImageRenderer): Renderer of the tile
+            encode_args (dict): Encoder options of the renderer
+            window (IntensityWindow|None): Intensity window applied to the tile
+
+        Returns:
+            (int): Number of tiles scheduled
+        """
+        channel = req.channel
+        max_resolution = channel.base_resolution + req.experiment.num_hierarchy_levels - 1
+        time_range = req.get_time()
+        extra = tile_cache.get_tile_extra(window, encode_args)
+
+        # All the tiles belong to the same channel, so its generation is read once
+        generation = get_generation(channel.pk)
+        if generation is None:
+            return 0
+
+        tiles = []
+        for res, x, y, z in get_neighbors(req.get_resolution(), x_idx, y_idx, z_idx, max_resolution):
+            try:
+                tile_req = req.copy_for_region(res, "{}:{}".format(x * tile_size, (x + 1) * tile_size),
+                                               "{}:{}".format(y * tile_size, (y + 1) * tile_size),
+                                               "{}:{}".format(z, z + 1),
+                                               "{}:{}".format(time_range.start, time_range.stop))
+            except BossError:
+                # Outside of the coordinate frame
+                continue
+            key = tile_cache.get_tile_key(tile_req, 'xy', renderer.format, extra, generation)
+            if key is not None:
+                tiles.append((key, tile_req))
+
+        tiles = tiles[:self.limiter.take(user.username or 'public', len(tiles))]
+
+        scheduled = 0
+        with self.lock:
+            executor = self._get_executor()
+            for key, tile_req in tiles:
+                if len(self.pending) >= self.max_pending or key in self.pending:
+                    continue
+                self.pending.add(key)
+                executor.submit(self._render, key, tile_req, resource, renderer, encode_args, window)
+                scheduled += 1
+        return scheduled
+
+    def _render(self, key, req, resource, renderer, encode_args, window):
+        try:
+            if tile_cache.get_tile(key) is not None:
+                return
+
+            if not hasattr(self.local, 'cache'):
+                self.local.cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
+                                                            settings.STATEIO_CONFIG,
+                                                            settings.OBJECTIO_CONFIG)
+            data = self.local.cache.cutout(resource, (req.get_x_start(), req.get_y_start(), req.get_z_start()),
+                                           (req.get_x_span(), req.get_y_span(), req.get_z_span()),
+                                           req.get_resolution(), [req.get_time().start, req.get_time().stop])
+            img = data.xy_image()
+            if window is not None:
+                img = window.apply(img)
+            tile_cache.put_tile(key, renderer.encode(img, encode_args))
+        except Exception as e:
+            bossLogger().warning("Unable to prefetch tile {}: {}".format(key, e))
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Get the tile prefetcher configured by the TILE_PREFETCH_* settings
+
+    Returns:
+        (TilePrefetcher|None): None if prefetching is disabled
+    """
+    global _prefetcher
+    if getattr(settings, 'TILE_PREFETCH_THREADS', 0) <= 0:
+        return None
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                limiter = TokenBucket(getattr(settings, 'TILE_PREFETCH_RATE', 10),
+                                      getattr(settings, 'TILE_PREFETCH_BURST', 50))
+                _prefetcher = TilePrefetcher(settings.TILE_PREFETCH_THREADS,
+                                             getattr(settings, 'TILE_PREFETCH_MAX_PENDING', 256),
+                                             limiter)
+    return _prefetcher
+
+
+def prefetch(user, req, resource, tile_size, x_idx, y_idx, z_idx, renderer, encode_args, window):
+    """Prefetch the tiles around an XY tile, if prefetching is enabled
+
+    See TilePrefetcher.schedule() for the arguments.
+    """
+    prefetcher = get_prefetcher()
+    if prefetcher is None or tile_cache.get_store() is None:
+        return
+    try:
+        prefetcher.schedule(user, req, resource, tile_size, x_idx, y_idx, z_idx, renderer, encode_args, window)
+    except Exception as e:
+        bossLogger().warning("Unable to schedule tile prefetch: {}".format(e))
@@ -0,0 +1,339 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pre-rendering of XY tile pyramids.
+
+Every XY tile of a channel, for each resolution of the downsample hierarchy,
+is rendered as the tile service would render it and stored either in the
+tile cache, where the tile service finds it, or in S3 under
+
+    <prefix>/<collection>/<experiment>/<channel>/xy/<tile size>/<resolution>/<x>/<y>/<z>/<t>.<format>
+
+which mirrors the tile service URLs so the bucket can be served as static
+files.  Rows of tiles are read with a single cutout and rendered by a pool
+of worker processes.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import RequestFactory
+
+from boss import aws
+from bosscore.error import BossError
+from bosscore.request import BossRequest
+from bossutils.logger import bossLogger
+
+import spdb
+
+from . import tile_cache
+from .renderers import TILE_RENDERERS
+
+
+def get_renderer(fmt):
+    """Get the tile renderer of a format
+
+    Args:
+        fmt (str): Renderer format, e.g. png
+
+    Returns:
+        (ImageRenderer)
+
+    Raises:
+        (ValueError): If the format is not supported
+    """
+    for renderer_class in TILE_RENDERERS:
+        if renderer_class.format == fmt:
+            return renderer_class()
+    raise ValueError("Unsupported tile format {}, possible values are {}".format(
+                     fmt, ', '.join(r.format for r in TILE_RENDERERS)))
+
+
+def tile_indices(start, stop, tile_size):
+    """Get the indices of the tiles covering a range of voxels
+
+    Args:
+        start (int): First voxel
+        stop (int): Voxel after the last voxel
+        tile_size (int): Width of a tile
+
+    Returns:
+        (range)
+    """
+    return range(start // tile_size, int(math.ceil(stop / tile_size)))
+
+
+def get_tasks(frame, extents, resolutions, z_range, t_range, tile_size, row_tiles):
+    """Split the tiles of a pyramid into rows of tiles read with one cutout
+
+    Args:
+        frame (dict): x, y and z start and stop of the coordinate frame at the base resolution
+        extents (list[list[int]]): x, y and z extent of each resolution
+        resolutions (iterable[int]): Resolutions to render
+        z_range (optional[tuple]): z start and stop at the base resolution, the whole frame if None
+        t_range (tuple): Time sample start and stop
+        tile_size (int): Width and height of a tile
+        row_tiles (int): Maximum number of tiles read with one cutout
+
+    Returns:
+        (list[tuple]): (resolution, t, z, y_idx, x_idx_start, x_idx_stop) of each row of tiles
+    """
+    base = extents[0]
+    tasks = []
+    for res in resolutions:
+        extent = extents[res]
+
+        def scale(axis, value):
+            # Voxel index at this resolution of a voxel index at the base resolution
+            return value * extent[axis] // base[axis]
+
+        x_start, x_stop = scale(0, frame['x_start']), scale(0, frame['x_start']) + extent[0]
+        y_start, y_stop = scale(1, frame['y_start']), scale(1, frame['y_start']) + extent[1]
+        if z_range is None:
+            z_start, z_stop = scale(2, frame['z_start']), scale(2, frame['z_start']) + extent[2]
+        else:
+            z_start, z_stop = scale(2, z_range[0]), max(scale(2, z_range[1]), scale(2, z_range[0]) + 1)
+
+        x_indices = tile_indices(x_start, x_stop, tile_size)
+        for t in range(*t_range):
+            for z in range(z_start, z_stop):
+                for y_idx in tile_indices(y_start, y_stop, tile_size):
+                    for x_idx in range(x_indices.start, x_indices.stop, row_tiles):
+                        tasks.append((res, t, z, y_idx, x_idx, min(x_idx + row_tiles, x_indices.stop)))
+    return tasks
+
+
+class S3TileWriter(object):
+    """Writes tiles to S3 under the tile service URL layout
+
+    Attributes:
+        bucket (str): Name of the bucket
+        prefix (str): Key prefix, without a trailing slash
+    """
+
+    def __init__(self, bucket, prefix=''):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def get_key(self, req, tile_size, res, x_idx, y_idx, z, t, fmt):
+        parts = [req.collection.name, req.experiment.name, req.channel.name, 'xy', tile_size, res,
+                 x_idx, y_idx, z, '{}.{}'.format(t, fmt)]
+        if self.prefix:
+            parts.insert(0, self.prefix)
+        return '/'.join(str(p) for p in parts)
+
+    def write(self, req, tile_size, res, x_idx, y_idx, z, t, renderer, tile):
+        aws.get_client('s3').put_object(Bucket=self.bucket,
+                                        Key=self.get_key(req, tile_size, res, x_idx, y_idx, z, t, renderer.format),
+                                        Body=tile, ContentType=renderer.media_type)
+        return True
+
+
+class CacheTileWriter(object):
+    """Writes tiles to the tile cache, keyed as the tile service looks them up"""
+
+    def write(self, req, tile_size, res, x_idx, y_idx, z, t, renderer, tile):
+        key = tile_cache.get_tile_key(req, 'xy', renderer.format,
+                                      tile_cache.get_tile_extra(None, renderer.get_encode_args({})))
+        if key is None:
+            return False
+        tile_cache.put_tile(key, tile)
+        return True
+
+
+def get_writer(destination):
+    """Get the tile writer of a destination
+
+    Args:
+        destination (str): 'cache' or s3://<bucket>/<prefix>
+
+    Returns:
+        (CacheTileWriter|S3TileWriter)
+
+    Raises:
+        (ValueError): If the destination is invalid or the tile cache is disabled
+    """
+    if destination == 'cache':
+        if tile_cache.get_store() is None:
+            raise ValueError("The tile cache is disabled, set TILE_CACHE_BACKEND")
+        return CacheTileWriter()
+    if destination.startswith('s3://'):
+        bucket, _, prefix = destination[len('s3://'):].partition('/')
+        if not bucket:
+            raise ValueError("Missing bucket in {}".format(destination))
+        return S3TileWriter(bucket, prefix)
+    raise ValueError("Unsupported destination {}, use cache or s3://<bucket>/<prefix>".format(destination))
+
+
+def get_request(username, collection, experiment, channel):
+    """Validate access to a channel as a user, as the tile service would
+
+    Args:
+        username (str): Django user the tiles are read as
+        collection (str): Collection name
+        experiment (str): Experiment name
+        channel (str): Channel name
+
+    Returns:
+        (BossRequest): Request for the first voxel of the channel's coordinate frame
+
+    Raises:
+        (BossError): If the channel does not exist or the user can not read it
+    """
+    request = RequestFactory().get('/')
+    request.user = User.objects.get(username=username)
+    request.version = settings.BOSS_VERSION
+
+    # Resolve the channel first to find a valid region of its coordinate frame
+    req = BossRequest(request, {
+        "service": "downsample",
+        "collection_name": collection,
+        "experiment_name": experiment,
+        "channel_name": channel,
+    })
+    frame = req.coord_frame
+    return BossRequest(request, {
+        "service": "cutout",
+        "collection_name": collection,
+        "experiment_name": experiment,
+        "channel_name": channel,
+        "resolution": req.channel.base_resolution,
+        "x_args": "{}:{}".format(frame.x_start, frame.x_start + 1),
+        "y_args": "{}:{}".format(frame.y_start, frame.y_start + 1),
+        "z_args": "{}:{}".format(frame.z_start, frame.z_start + 1),
+        "time_args": None,
+    })
+
+
+# State of a worker process, set by _init_worker()
+_worker = {}
+
+
+def _init_worker(username, collection, experiment, channel, tile_size, fmt, destination):
+    req = get_request(username, collection, experiment, channel)
+    _worker.update({
+        'req': req,
+        'resource': spdb.project.BossResourceDjango(req),
+        'cache': spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
+                                          settings.STATEIO_CONFIG,
+                                          settings.OBJECTIO_CONFIG),
+        'tile_size': tile_size,
+        'renderer': get_renderer(fmt),
+        'writer': get_writer(destination),
+    })
+
+
+def render_row(task):
+    """Render and store a row of tiles, in a worker process
+
+    Tiles outside of the coordinate frame, which the tile service rejects, are skipped.
+
+    Args:
+        task (tuple): Row of tiles from get_tasks()
+
+    Returns:
+        (int): Number of tiles stored
+    """
+    res, t, z, y_idx, x_idx_start, x_idx_stop = task
+    req = _worker['req']
+    tile_size = _worker['tile_size']
+    renderer = _worker['renderer']
+
+    tiles = []
+    for x_idx in range(x_idx_start, x_idx_stop):
+        try:
+            tiles.append((x_idx, req.copy_for_region(
+                res, "{}:{}".format(x_idx * tile_size, (x_idx + 1) * tile_size),
+                "{}:{}".format(y_idx * tile_size, (y_idx + 1) * tile_size),
+                "{}:{}".format(z, z + 1), "{}:{}".format(t, t + 1))))
+        except BossError:
+            continue
+    if len(tiles) == 0:
+        return 0
+
+    x_start = tiles[0][0] * tile_size
+    corner = (x_start, y_idx * tile_size, z)
+    extent = ((tiles[-1][0] + 1) * tile_size - x_start, tile_size, 1)
+    row = _worker['cache'].cutout(_worker['resource'], corner, extent, res, [t, t + 1],
+                                  access_mode='no_cache').xy_image()
+
+    stored = 0
+    for x_idx, tile_req in tiles:
+        left = x_idx * tile_size - x_start
+        img = row.crop((left, 0, left + tile_size, tile_size))
+        tile = renderer.encode(img)
+        if _worker['writer'].write(tile_req, tile_size, res, x_idx, y_idx, z, t, renderer, tile):
+            stored += 1
+    return stored
+
+
+def build_pyramid(username, collection, experiment, channel, resolutions=None, z_range=None, t_range=None,
+                  tile_size=512, fmt='png', destination='cache', processes=None, row_tiles=16):
+    """Render and store the XY tile pyramid of a channel
+
+    Args:
+        username (str): Django user the tiles are read as
+        collection (str): Collection name
+        experiment (str): Experiment name
+        channel (str): Channel name
+        resolutions (optional[iterable[int]]): Resolutions to render, all levels of the experiment if None
+        z_range (optional[tuple]): z start and stop at the base resolution, the whole frame if None
+        t_range (optional[tuple]): Time sample start and stop, the default time sample if None
+        tile_size (int): Width and height of a tile
+        fmt (str): Tile format, e.g. png
+        destination (str): 'cache' or s3://<bucket>/<prefix>
+        processes (optional[int]): Number of worker processes, the number of CPUs if None
+        row_tiles (int): Maximum number of tiles read with one cutout
+
+    Returns:
+        (dict): Number of tiles stored for each resolution
+
+    Raises:
+        (BossError): If the channel does not exist or the user can not read it
+        (ValueError): If an argument is invalid
+    """
+    # Validate the arguments before starting the workers
+    get_renderer(fmt)
+    get_writer(destination)
+    req = get_request(username, collection, experiment, channel)
+    resource = spdb.project.BossResourceDjango(req)
+
+    base_res = req.channel.base_resolution
+    if resolutions is None:
+        resolutions = range(base_res, base_res + req.experiment.num_hierarchy_levels)
+    if t_range is None:
+        t_range = (req.channel.default_time_sample, req.channel.default_time_sample + 1)
+
+    frame = req.coord_frame
+    frame = {'x_start': frame.x_start, 'y_start': frame.y_start, 'z_start': frame.z_start}
+    tasks = get_tasks(frame, resource.get_downsampled_extent_dims(), resolutions, z_range, t_range,
+                      tile_size, row_tiles)
+
+    log = bossLogger()
+    log.info("Rendering {} rows of tiles of {}/{}/{}".format(len(tasks), collection, experiment, channel))
+
+    # Worker processes must open their own database connections
+    connections.close_all()
+
+    stored = {res: 0 for res in resolutions}
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(username, collection, experiment, channel, tile_size, fmt,
+                                       destination)) as executor:
+        for task, count in zip(tasks, executor.map(render_row, tasks, chunksize=4)):
+            stored[task[0]] += count
+    return stored
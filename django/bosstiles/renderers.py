@@ -14,39 +14,128 @@
 import io
 from rest_framework import renderers
 from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from PIL import features
+
+from bosscore.error import BossError, ErrorCodes
 from bosscore.renderer_helper import check_for_403, check_for_429
 
 
-class PNGRenderer(renderers.BaseRenderer):
-    """ A DRF renderer for rendering an XY image as a png
+def _get_int(query_params, name, default, minimum, maximum):
+    value = query_params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = None
+    if value is None or not minimum <= value <= maximum:
+        raise BossError("Incorrect {}, must be an integer from {} to {}".format(name, minimum, maximum),
+                        ErrorCodes.INVALID_ARGUMENT)
+    return value
+
+
+def _get_bool(query_params, name, default):
+    if name not in query_params:
+        return default
+    return query_params[name].lower() == "true"
+
+
+class ImageRenderer(renderers.BaseRenderer):
+    """ Base class of the DRF renderers for an image
+
+    The view validates the encoder options of the request with get_encode_args() and keeps them in its
+    encode_args attribute, where render() picks them up.
     """
-    media_type = 'image/png'
-    format = 'png'
     charset = None
     render_style = 'binary'
+    pil_format = None
+
+    def get_encode_args(self, query_params):
+        """Get the PIL save() options of a request, from the settings and query parameters
+
+        Args:
+            query_params (QueryDict): Query parameters of the request
+
+        Returns:
+            (dict): Keyword arguments for PIL.Image.save()
+
+        Raises:
+            (BossError): If a query parameter is invalid
+        """
+        return {}
+
+    def encode(self, img, encode_args=None):
+        """Encode an image
+
+        Args:
+            img (PIL.Image.Image): Image to encode
+            encode_args (optional[dict]): Options from get_encode_args(), the defaults if None
+
+        Returns:
+            (bytes)
+        """
+        if encode_args is None:
+            encode_args = self.get_encode_args({})
 
-    @check_for_403
-    @check_for_429
-    def render(self, data, media_type=None, renderer_context=None):
         file_obj = io.BytesIO()
-        data.save(file_obj, "PNG")
+        img.save(file_obj, self.pil_format, **encode_args)
         file_obj.seek(0)
         return file_obj.read()
 
+    @check_for_403
+    @check_for_429
+    def render(self, data, media_type=None, renderer_context=None):
+        view = (renderer_context or {}).get('view')
+        return self.encode(data, getattr(view, 'encode_args', None))
+
 
-class JPEGRenderer(renderers.BaseRenderer):
+class PNGRenderer(ImageRenderer):
+    """ A DRF renderer for rendering an XY image as a png
+
+    The zlib level comes from TILE_PNG_COMPRESS_LEVEL or the png-level query parameter (0 to 9).
+    """
+    media_type = 'image/png'
+    format = 'png'
+    pil_format = 'PNG'
+
+    def get_encode_args(self, query_params):
+        return {'compress_level': _get_int(query_params, 'png-level', settings.TILE_PNG_COMPRESS_LEVEL, 0, 9)}
+
+
+class JPEGRenderer(ImageRenderer):
     """ A DRF renderer for rendering an XY image as a jpeg
+
+    The quality comes from TILE_JPEG_QUALITY or the quality query parameter (1 to 95) and the optimize flag from
+    TILE_JPEG_OPTIMIZE or the optimize query parameter.
     """
     media_type = 'image/jpeg'
     format = 'jpg'
-    charset = None
-    render_style = 'binary'
+    pil_format = 'JPEG'
+
+    def get_encode_args(self, query_params):
+        return {
+            'quality': _get_int(query_params, 'quality', settings.TILE_JPEG_QUALITY, 1, 95),
+            'optimize': _get_bool(query_params, 'optimize', settings.TILE_JPEG_OPTIMIZE),
+        }
+
+
+class WebPRenderer(ImageRenderer):
+    """ A DRF renderer for rendering an XY image as a webp
+
+    Images are lossless if TILE_WEBP_LOSSLESS or the lossless query parameter is true.  The quality (0 to 100)
+    comes from TILE_WEBP_QUALITY or the quality query parameter.  For lossless images it trades encoding time
+    for size instead of fidelity.
+    """
+    media_type = 'image/webp'
+    format = 'webp'
+    pil_format = 'WEBP'
+
+    def get_encode_args(self, query_params):
+        return {
+            'lossless': _get_bool(query_params, 'lossless', settings.TILE_WEBP_LOSSLESS),
+            'quality': _get_int(query_params, 'quality', settings.TILE_WEBP_QUALITY, 0, 100),
+            'method': settings.TILE_WEBP_METHOD,
+        }
 
-    @check_for_403
-    @check_for_429
-    def render(self, data, media_type=None, renderer_context=None):
-        file_obj = io.BytesIO()
-        data.save(file_obj, "JPEG")
-        file_obj.seek(0)
-        return file_obj.read()
 
+# WebP is only offered if PIL was built with libwebp
+TILE_RENDERERS = (PNGRenderer, JPEGRenderer) + ((WebPRenderer,) if features.check('webp') else ())
@@ -0,0 +1,69 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from PIL import Image
+from django.test import SimpleTestCase
+
+from bosscore.error import BossError, ErrorCodes
+from bosstiles.intensity import build_lut, get_intensity_window
+
+
+class TestIntensityWindow(SimpleTestCase):
+
+    def test_no_params(self):
+        self.assertIsNone(get_intensity_window({}, 16))
+
+    def test_window(self):
+        window = get_intensity_window({'window': '100:1100'}, 16)
+        self.assertEqual((window.low, window.high, window.gamma), (100, 1100, 1.0))
+
+    def test_level_width(self):
+        window = get_intensity_window({'level': '600', 'width': '1000'}, 16)
+        self.assertEqual((window.low, window.high), (100, 1100))
+
+    def test_depth_only(self):
+        window = get_intensity_window({'depth': '8'}, 16)
+        self.assertEqual((window.low, window.high), (0, 65535))
+
+    def test_invalid(self):
+        for params in ({'window': '10'}, {'window': '10:5'}, {'level': '5'}, {'gamma': '0'},
+                       {'depth': '4'}, {'window': '0:10', 'width': '5'}):
+            with self.assertRaises(BossError) as ctx:
+                get_intensity_window(params, 16)
+            self.assertEqual(ctx.exception.error_code, ErrorCodes.INVALID_ARGUMENT)
+
+    def test_annotation_channel(self):
+        with self.assertRaises(BossError) as ctx:
+            get_intensity_window({'window': '0:10'}, 64)
+        self.assertEqual(ctx.exception.error_code, ErrorCodes.DATATYPE_NOT_SUPPORTED)
+
+    def test_lut(self):
+        lut = build_lut(16, 100.0, 1100.0, 1.0)
+        self.assertEqual(lut.size, 65536)
+        self.assertEqual(lut[0], 0)
+        self.assertEqual(lut[100], 0)
+        self.assertEqual(lut[600], 128)
+        self.assertEqual(lut[1100], 255)
+        self.assertEqual(lut[65535], 255)
+
+    def test_gamma(self):
+        lut = build_lut(8, 0.0, 255.0, 2.0)
+        self.assertGreater(lut[64], 64)
+
+    def test_apply_uint16(self):
+        data = np.array([[0, 500], [1000, 60000]], dtype=np.uint16)
+        img = get_intensity_window({'window': '0:1000'}, 16).apply(Image.fromarray(data))
+        self.assertEqual(img.mode, 'L')
+        np.testing.assert_array_equal(np.asarray(img), [[0, 128], [255, 255]])
@@ -0,0 +1,66 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from bosstiles.prefetch import TilePrefetcher, TokenBucket, get_neighbors, get_prefetcher
+
+
+class TestPrefetch(SimpleTestCase):
+
+    def test_neighbors(self):
+        neighbors = get_neighbors(0, 4, 6, 10, 3)
+        self.assertEqual(neighbors, [(0, 3, 6, 10), (0, 5, 6, 10), (0, 4, 5, 10), (0, 4, 7, 10),
+                                     (0, 4, 6, 9), (0, 4, 6, 11), (1, 2, 3, 10)])
+
+    def test_neighbors_edges(self):
+        neighbors = get_neighbors(3, 0, 0, 0, 3)
+        self.assertEqual(neighbors, [(3, 1, 0, 0), (3, 0, 1, 0), (3, 0, 0, 1)])
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, burst=5)
+        self.assertEqual(bucket.take('user1', 4, now=0), 4)
+        self.assertEqual(bucket.take('user1', 4, now=0), 1)
+        self.assertEqual(bucket.take('user1', 4, now=0), 0)
+
+        # Other users have their own bucket
+        self.assertEqual(bucket.take('user2', 4, now=0), 4)
+
+        # Refilled at the rate, up to the burst
+        self.assertEqual(bucket.take('user1', 4, now=1), 2)
+        self.assertEqual(bucket.take('user1', 10, now=100), 5)
+
+    @override_settings(TILE_PREFETCH_THREADS=0)
+    def test_disabled(self):
+        self.assertIsNone(get_prefetcher())
+
+    @patch('bosstiles.tile_cache.get_generation')
+    @patch('bosstiles.prefetch.get_generation', return_value=42)
+    def test_generation_read_once(self, prefetch_generation, tile_generation):
+        req = MagicMock()
+        req.channel.base_resolution = 0
+        req.experiment.num_hierarchy_levels = 3
+        req.get_resolution.return_value = 0
+        req.get_time.return_value = range(0, 1)
+        renderer = MagicMock()
+        renderer.format = 'png'
+
+        # No tokens, so the keys are built but no tile is rendered
+        prefetcher = TilePrefetcher(1, 10, TokenBucket(rate=0, burst=0))
+        self.assertEqual(prefetcher.schedule(MagicMock(), req, None, 512, 1, 1, 1, renderer, {}, None), 0)
+
+        self.assertEqual(prefetch_generation.call_count, 1)
+        tile_generation.assert_not_called()
@@ -0,0 +1,64 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+
+from bosstiles.pyramid import get_tasks, get_writer, tile_indices, S3TileWriter
+
+
+class TestPyramid(SimpleTestCase):
+
+    def test_tile_indices(self):
+        self.assertEqual(tile_indices(0, 1024, 512), range(0, 2))
+        self.assertEqual(tile_indices(100, 1025, 512), range(0, 3))
+
+    def test_tasks(self):
+        frame = {'x_start': 0, 'y_start': 0, 'z_start': 0}
+        extents = [[2048, 1024, 4], [1024, 512, 4]]
+        tasks = get_tasks(frame, extents, [0, 1], None, (0, 1), 512, 3)
+
+        # Resolution 0: 4 z slices, 2 rows of 4 tiles split into rows of 3 and 1
+        res0 = [t for t in tasks if t[0] == 0]
+        self.assertEqual(len(res0), 4 * 2 * 2)
+        self.assertIn((0, 0, 0, 0, 0, 3), res0)
+        self.assertIn((0, 0, 0, 0, 3, 4), res0)
+
+        # Resolution 1: 4 z slices, 1 row of 2 tiles
+        res1 = [t for t in tasks if t[0] == 1]
+        self.assertEqual(res1, [(1, 0, z, 0, 0, 2) for z in range(4)])
+
+    def test_tasks_z_range(self):
+        frame = {'x_start': 0, 'y_start': 0, 'z_start': 0}
+        tasks = get_tasks(frame, [[512, 512, 16]], [0], (4, 6), (0, 2), 512, 16)
+        self.assertEqual(tasks, [(0, t, z, 0, 0, 1) for t in range(2) for z in (4, 5)])
+
+    def test_s3_key(self):
+        req = MagicMock()
+        req.collection.name = 'col1'
+        req.experiment.name = 'exp1'
+        req.channel.name = 'chan1'
+        writer = S3TileWriter('bucket', '/tiles/')
+        self.assertEqual(writer.get_key(req, 512, 2, 3, 4, 5, 0, 'png'),
+                         'tiles/col1/exp1/chan1/xy/512/2/3/4/5/0.png')
+
+    @override_settings(TILE_CACHE_BACKEND=None)
+    def test_writer(self):
+        writer = get_writer('s3://bucket/prefix')
+        self.assertEqual((writer.bucket, writer.prefix), ('bucket', 'prefix'))
+        with self.assertRaises(ValueError):
+            get_writer('cache')
+        with self.assertRaises(ValueError):
+            get_writer('/tmp/tiles')
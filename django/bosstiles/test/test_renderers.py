@@ -0,0 +1,65 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import unittest
+
+import numpy as np
+from PIL import Image, features
+from django.test import SimpleTestCase, override_settings
+
+from bosscore.error import BossError
+from bosstiles.renderers import PNGRenderer, JPEGRenderer, WebPRenderer
+
+
+class View(object):
+
+    def __init__(self, encode_args):
+        self.encode_args = encode_args
+
+
+@override_settings(TILE_PNG_COMPRESS_LEVEL=6, TILE_JPEG_QUALITY=75, TILE_JPEG_OPTIMIZE=False,
+                   TILE_WEBP_LOSSLESS=False, TILE_WEBP_QUALITY=80, TILE_WEBP_METHOD=4)
+class TestTileRenderers(SimpleTestCase):
+
+    def setUp(self):
+        self.img = Image.fromarray(np.random.randint(0, 255, (64, 64), dtype=np.uint8))
+
+    def test_png_defaults(self):
+        self.assertEqual(PNGRenderer().get_encode_args({}), {'compress_level': 6})
+
+    def test_png_level(self):
+        self.assertEqual(PNGRenderer().get_encode_args({'png-level': '1'}), {'compress_level': 1})
+        with self.assertRaises(BossError):
+            PNGRenderer().get_encode_args({'png-level': '10'})
+
+    def test_jpeg_args(self):
+        args = JPEGRenderer().get_encode_args({'quality': '90', 'optimize': 'true'})
+        self.assertEqual(args, {'quality': 90, 'optimize': True})
+        with self.assertRaises(BossError):
+            JPEGRenderer().get_encode_args({'quality': 'high'})
+
+    def test_render_uses_view_args(self):
+        renderer = JPEGRenderer()
+        low = renderer.render(self.img, renderer_context={'view': View({'quality': 10, 'optimize': False})})
+        high = renderer.render(self.img, renderer_context={'view': View({'quality': 95, 'optimize': False})})
+        self.assertLess(len(low), len(high))
+
+    @unittest.skipUnless(features.check('webp'), 'PIL was built without WebP support')
+    def test_webp_lossless(self):
+        renderer = WebPRenderer()
+        args = renderer.get_encode_args({'lossless': 'true'})
+        data = renderer.render(self.img, renderer_context={'view': View(args)})
+        np.testing.assert_array_equal(np.asarray(Image.open(io.BytesIO(data)).convert('L')),
+                                      np.asarray(self.img))
@@ -0,0 +1,72 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from bosstiles.tile_cache import DiskTileStore, TMP_PREFIX
+
+
+class TestDiskTileStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_get_set(self):
+        store = DiskTileStore(self.directory)
+        self.assertIsNone(store.get('boss:tile:a'))
+        store.set('boss:tile:a', b'png')
+        self.assertEqual(store.get('boss:tile:a'), b'png')
+
+    def test_expired(self):
+        store = DiskTileStore(self.directory, ttl=60)
+        store.set('boss:tile:a', b'png')
+        path = store._path('boss:tile:a')
+        old = time.time() - 120
+        os.utime(path, (old, old))
+        self.assertIsNone(store.get('boss:tile:a'))
+
+    def test_sweep_evicts_least_recently_used(self):
+        store = DiskTileStore(self.directory, max_bytes=8, sweep_interval=0)
+        for i, key in enumerate(['a', 'b', 'c']):
+            store.set(key, b'1234')
+            then = time.time() - 100 + i
+            os.utime(store._path(key), (then, then))
+
+        # Reading a tile makes it the most recently used
+        self.assertEqual(store.get('a'), b'1234')
+
+        store.sweep()
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), b'1234')
+        self.assertEqual(store.get('c'), b'1234')
+
+    def test_sweep_skips_temporary_files(self):
+        store = DiskTileStore(self.directory, max_bytes=0, sweep_interval=0)
+        tmp = os.path.join(self.directory, TMP_PREFIX + 'write-in-progress')
+        with open(tmp, 'wb') as fh:
+            fh.write(b'1234')
+
+        store.sweep()
+        self.assertTrue(os.path.exists(tmp))
+
+        # Unless a writer died and left it behind
+        old = time.time() - store.ttl - 1
+        os.utime(tmp, (old, old))
+        store.sweep()
+        self.assertFalse(os.path.exists(tmp))
@@ -0,0 +1,280 @@
+# Copyright 2021 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of rendered tiles and images.
+
+Entries are keyed by the channel's write generation (see
+bosscore.generation) and downsample status, so writing to a channel or
+finishing a downsample makes the old entries unreachable and they age out
+of the store.
+"""
+
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from bosscore.generation import get_generation
+from bosscore.models import Channel
+from bossutils.logger import bossLogger
+
+# Prefix of the temporary files tiles are written to before they are renamed into place
+TMP_PREFIX = '.tmp-'
+
+
+class CacheTileStore(object):
+    """Keeps tiles in a Django cache, e.g. Redis
+
+    Attributes:
+        alias (str): Django cache alias
+        ttl (int): Seconds a tile is kept
+    """
+
+    def __init__(self, alias='default', ttl=3600):
+        self.alias = alias
+        self.ttl = ttl
+
+    def get(self, key):
+        return caches[self.alias].get(key)
+
+    def set(self, key, value):
+        caches[self.alias].set(key, value, timeout=self.ttl)
+
+
+class DiskTileStore(object):
+    """Keeps tiles in a directory on the local disk, evicting the least recently used
+
+    Reading a tile updates its modification time.  Every `sweep_interval`
+    seconds a background thread of each process removes expired tiles and the
+    oldest tiles until the directory is under `max_bytes`.  Temporary files of
+    writes in progress are left alone.
+
+    Attributes:
+        directory (str): Directory holding the tiles
+        max_bytes (int): Maximum size of all tiles
+        ttl (int): Seconds a tile is kept
+        sweep_interval (int): Seconds between sweeps, 0 to never sweep in the background
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3, ttl=3600, sweep_interval=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self.sweeper_pid = None
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) < time.time() - self.ttl:
+                return None
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        self._start_sweeper()
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial tile
+        fd, tmp = tempfile.mkstemp(prefix=TMP_PREFIX, dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(value)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def _start_sweeper(self):
+        # Threads do not survive a fork, so each uwsgi worker starts its own
+        pid = os.getpid()
+        if self.sweep_interval <= 0 or self.sweeper_pid == pid:
+            return
+        with self.lock:
+            if self.sweeper_pid == pid:
+                return
+            self.sweeper_pid = pid
+            threading.Thread(target=self._sweep_loop, name='boss-tile-sweep', daemon=True).start()
+
+    def _sweep_loop(self):
+        while True:
+            # Jitter so the workers of a server do not all walk the directory at the same time
+            time.sleep(self.sweep_interval * random.uniform(0.5, 1.5))
+            try:
+                self.sweep()
+            except Exception as e:
+                bossLogger().warning("Unable to sweep the tile cache: {}".format(e))
+
+    def sweep(self):
+        """Remove expired tiles and the least recently used tiles over max_bytes"""
+        expired = time.time() - self.ttl
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime < expired:
+                    # Includes temporary files left behind by a process that died while writing
+                    self._remove(path)
+                    continue
+                if name.startswith(TMP_PREFIX):
+                    # Another process may still be writing it
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Get the tile store configured by the TILE_CACHE_* settings
+
+    Returns:
+        (None|CacheTileStore|DiskTileStore): None if the tile cache is disabled
+    """
+    global _store
+    backend = getattr(settings, 'TILE_CACHE_BACKEND', None)
+    if backend is None:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                ttl = getattr(settings, 'TILE_CACHE_TTL', 3600)
+                if backend == 'cache':
+                    _store = CacheTileStore(getattr(settings, 'TILE_CACHE_ALIAS', 'default'), ttl)
+                elif backend == 'disk':
+                    _store = DiskTileStore(settings.TILE_CACHE_DIR,
+                                           getattr(settings, 'TILE_CACHE_MAX_BYTES', 1024 ** 3), ttl,
+                                           getattr(settings, 'TILE_CACHE_SWEEP_INTERVAL', 60))
+                else:
+                    raise ValueError("Unknown TILE_CACHE_BACKEND: {}".format(backend))
+    return _store
+
+
+def get_tile_key(req, orientation, fmt, extra=(), generation=None):
+    """Get the cache key of the tile or image for a request
+
+    Args:
+        req (BossRequest): Validated tile or image request
+        orientation (str): Image plane, xy, xz or yz
+        fmt (str): Format of the rendered tile, e.g. png
+        extra (optional[iterable]): Additional parameters that change the rendered tile
+        generation (optional[int]): Write generation of the request's channel, looked up if None
+
+    Returns:
+        (str|None): Key or None if the tile should not be cached
+    """
+    channel = req.channel
+    if (channel.downsample_status in (Channel.DownsampleStatus.QUEUED, Channel.DownsampleStatus.IN_PROGRESS) and
+            req.get_resolution() != channel.base_resolution):
+        # Downsampled resolutions change without writes until the downsample finishes
+        return None
+
+    if generation is None:
+        generation = get_generation(channel.pk)
+        if generation is None:
+            return None
+
+    time_range = req.get_time()
+    parts = [req.get_lookup_key(), generation, channel.downsample_status, req.get_resolution(), orientation,
+             req.get_x_start(), req.get_x_stop(), req.get_y_start(), req.get_y_stop(),
+             req.get_z_start(), req.get_z_stop(), time_range.start, time_range.stop, fmt]
+    parts.extend(extra)
+    return 'boss:tile:' + ':'.join(str(p) for p in parts)
+
+
+def get_tile_extra(window, encode_args):
+    """Get the parameters of a tile request that change the rendered tile
+
+    Args:
+        window (IntensityWindow|None): Intensity window applied to the tile
+        encode_args (dict): Encoder options of the tile renderer
+
+    Returns:
+        (tuple): Value of get_tile_key()'s extra argument
+    """
+    return (window.cache_key() if window is not None else ()) + tuple(sorted(encode_args.items()))
+
+
+def get_tile(key):
+    """Get a rendered tile
+
+    Args:
+        key (str): Key from get_tile_key()
+
+    Returns:
+        (bytes|None): Rendered tile or None if not cached
+    """
+    store = get_store()
+    if store is None or key is None:
+        return None
+    try:
+        return store.get(key)
+    except Exception as e:
+        bossLogger().warning("Unable to read the tile cache: {}".format(e))
+        return None
+
+
+def put_tile(key, data):
+    """Add a rendered tile to the cache
+
+    Args:
+        key (str): Key from get_tile_key()
+        data (bytes): Rendered tile
+    """
+    store = get_store()
+    if store is None or key is None:
+        return
+    if len(data) > getattr(settings, 'TILE_CACHE_MAX_TILE_BYTES', 4 * 1024 ** 2):
+        return
+    try:
+        store.set(key, data)
+    except Exception as e:
+        bossLogger().warning("Unable to write the tile cache: {}".format(e))
@@ -15,19 +15,23 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
+from django.http import HttpResponse
 
 from boss import utils
+from boss import metrics
 from boss.throttling import BossThrottle
 from bosscore.models import ThrottleMetric
 from bosscore.request import BossRequest
 from bosscore.error import BossError, BossHTTPError, ErrorCodes
-from bossutils.logger import bossLogger
 
 import spdb
 
 import bossutils
 
-from .renderers import PNGRenderer, JPEGRenderer
+from . import tile_cache
+from .intensity import get_intensity_window
+from .prefetch import prefetch
+from .renderers import TILE_RENDERERS
 
 
 class CutoutTile(APIView):
@@ -36,12 +40,13 @@ class CutoutTile(APIView):
 
     * Requires authentication.
     """
-    renderer_classes = (PNGRenderer, JPEGRenderer)
+    renderer_classes = TILE_RENDERERS
 
     def __init__(self):
         super().__init__()
         self.data_type = None
         self.bit_depth = None
+        self.encode_args = None
 
     def get(self, request, collection, experiment, channel, orientation, resolution, x_args, y_args, z_args, t_args=None):
         """
@@ -89,12 +94,25 @@ class CutoutTile(APIView):
         except ValueError:
             return BossHTTPError("Datatype does not match channel", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
+        # Get the optional intensity window applied before encoding and the encoder options
+        try:
+            window = get_intensity_window(request.query_params, self.bit_depth)
+            self.encode_args = request.accepted_renderer.get_encode_args(request.query_params)
+        except BossError as err:
+            return err.to_http()
+
         # Make sure cutout request is under 1GB UNCOMPRESSED
         total_bytes = req.get_x_span() * req.get_y_span() * req.get_z_span() * len(req.get_time()) * (self.bit_depth/8)
         if total_bytes > settings.CUTOUT_MAX_SIZE:
             return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Let the client reuse its copy if the data has not changed
+        etag = utils.get_etag(request, req)
+        response = utils.not_modified(request, etag)
+        if response is not None:
+            return response
+
         # Add metrics to CloudWatch
         cost = ( req.get_x_span()
                * req.get_y_span()
@@ -117,30 +135,22 @@ class CutoutTile(APIView):
             {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
         ]
 
-        session = bossutils.aws.get_session()
-        client = session.client('cloudwatch')
+        metrics.emit("BOSS/Image", dimensions, [
+            ('InvokeCount', 1.0, 'Count'),
+            ('EgressCost', cost, 'Bytes'),
+        ])
 
-        try:
-            client.put_metric_data(
-                Namespace="BOSS/Image",
-                MetricData=[{
-                    'MetricName': 'InvokeCount',
-                    'Dimensions': dimensions,
-                    'Value': 1.0,
-                    'Unit': 'Count'
-                }, {
-                    'MetricName': 'EgressCost',
-                    'Dimensions': dimensions,
-                    'Value': cost,
-                    'Unit': 'Bytes'
-                }]
-            )
-        except Exception as e:
-            log = bossLogger()
-            log.exception('Error during put_metric_data: {}'.format(e))
-            log.exception('Allowing bossDB to continue after logging')
 
 
+        # Serve the tile from the tile cache if it was already rendered
+        renderer = request.accepted_renderer
+        tile_key = None
+        if access_mode == "cache" and tile_cache.get_store() is not None:
+            tile_key = tile_cache.get_tile_key(req, orientation, renderer.format,
+                                               tile_cache.get_tile_extra(window, self.encode_args))
+            tile = tile_cache.get_tile(tile_key)
+            if tile is not None:
+                return utils.add_validators(HttpResponse(tile, content_type=renderer.media_type), etag)
 
         # Get interface to SPDB cache
         cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
@@ -166,7 +176,15 @@ class CutoutTile(APIView):
             return BossHTTPError("Invalid orientation: {}".format(orientation),
                                  ErrorCodes.INVALID_CUTOUT_ARGS)
 
-        return Response(img)
+        if window is not None:
+            img = window.apply(img)
+
+        if tile_key is not None:
+            tile = renderer.encode(img, self.encode_args)
+            tile_cache.put_tile(tile_key, tile)
+            return utils.add_validators(HttpResponse(tile, content_type=renderer.media_type), etag)
+
+        return utils.add_validators(Response(img), etag)
 
 
 class Tile(APIView):
@@ -175,12 +193,13 @@ class Tile(APIView):
 
     * Requires authentication.
     """
-    renderer_classes = (PNGRenderer, JPEGRenderer)
+    renderer_classes = TILE_RENDERERS
 
     def __init__(self):
         super().__init__()
         self.data_type = None
         self.bit_depth = None
+        self.encode_args = None
 
     def get(self, request, collection, experiment, channel, orientation, tile_size, resolution, x_idx, y_idx, z_idx, t_idx=None):
         """
@@ -230,12 +249,25 @@ class Tile(APIView):
         except ValueError:
             return BossHTTPError("Datatype does not match channel", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
+        # Get the optional intensity window applied before encoding and the encoder options
+        try:
+            window = get_intensity_window(request.query_params, self.bit_depth)
+            self.encode_args = request.accepted_renderer.get_encode_args(request.query_params)
+        except BossError as err:
+            return err.to_http()
+
         # Make sure cutout request is under 1GB UNCOMPRESSED
         total_bytes = req.get_x_span() * req.get_y_span() * req.get_z_span() * len(req.get_time()) * (self.bit_depth/8)
         if total_bytes > settings.CUTOUT_MAX_SIZE:
             return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Let the client reuse its copy if the data has not changed
+        etag = utils.get_etag(request, req)
+        response = utils.not_modified(request, etag)
+        if response is not None:
+            return response
+
         # Add metrics to CloudWatch
         cost = ( req.get_x_span()
                * req.get_y_span()
@@ -258,30 +290,26 @@ class Tile(APIView):
             {'Name': 'Stack', 'Value': boss_config['system']['fqdn']},
         ]
 
-        session = bossutils.aws.get_session()
-        client = session.client('cloudwatch')
+        metrics.emit("BOSS/Tile", dimensions, [
+            ('InvokeCount', 1.0, 'Count'),
+            ('EgressCost', cost, 'Bytes'),
+        ])
 
-        try:
-            client.put_metric_data(
-                Namespace="BOSS/Tile",
-                MetricData=[{
-                    'MetricName': 'InvokeCount',
-                    'Dimensions': dimensions,
-                    'Value': 1.0,
-                    'Unit': 'Count'
-                }, {
-                    'MetricName': 'EgressCost',
-                    'Dimensions': dimensions,
-                    'Value': cost,
-                    'Unit': 'Bytes'
-                }]
-            )
-        except Exception as e:
-            log = bossLogger()
-            log.exception('Error during put_metric_data: {}'.format(e))
-            log.exception('Allowing bossDB to continue after logging')
 
 
+        # Serve the tile from the tile cache if it was already rendered
+        renderer = request.accepted_renderer
+        tile_key = None
+        if access_mode == "cache" and tile_cache.get_store() is not None:
+            tile_key = tile_cache.get_tile_key(req, orientation, renderer.format,
+                                               tile_cache.get_tile_extra(window, self.encode_args))
+            if orientation == 'xy':
+                # Warm the cache with the tiles a viewer is likely to request next
+                prefetch(request.user, req, resource, int(tile_size), int(x_idx), int(y_idx), int(z_idx),
+                         renderer, self.encode_args, window)
+            tile = tile_cache.get_tile(tile_key)
+            if tile is not None:
+                return utils.add_validators(HttpResponse(tile, content_type=renderer.media_type), etag)
 
         # Get interface to SPDB cache
         cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
@@ -307,4 +335,12 @@ class Tile(APIView):
             return BossHTTPError("Invalid orientation: {}".format(orientation),
                                  ErrorCodes.INVALID_CUTOUT_ARGS)
 
-        return Response(img)
+        if window is not None:
+            img = window.apply(img)
+
+        if tile_key is not None:
+            tile = renderer.encode(img, self.encode_args)
+            tile_cache.put_tile(tile_key, tile)
+            return utils.add_validators(HttpResponse(tile, content_type=renderer.media_type), etag)
+
+        return utils.add_validators(Response(img), etag)